@@ -4,19 +4,27 @@ Usage:
     python burst_capture.py             # Default: 10 images, 1 second apart
     python burst_capture.py --count 20  # Capture 20 images
     python burst_capture.py --delay 0.5 # Capture every 0.5 seconds
+    python burst_capture.py --count 100 --workers 3 --max-inflight 6
+
+Each image is uploaded in the background while the burst continues, so the
+capture cadence never waits on the network.  Every image is also kept in
+the local folder, so anything that failed to upload can be sent later.
 """
 
 import argparse
 import datetime
 import os
 import sys
+import threading
 import time
+from collections import deque
 
 import cloudinary
-import cloudinary.uploader
 from dotenv import load_dotenv
 
 from camera import PersistentCamera
+from config import UPLOAD_BACKOFF_MAX_S, UPLOAD_BACKOFF_MIN_S, UPLOAD_MAX_ATTEMPTS, UPLOAD_TIMEOUT_S
+from uploader import UploadService
 
 load_dotenv()
 
@@ -38,20 +46,87 @@ def _ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
 
-def upload_to_cloudinary(filepath, session_id):
-    """Upload a single image to Cloudinary."""
-    tags = ["training", f"session_{session_id}", "raining"]
-    try:
-        cloudinary.uploader.upload(
-            filepath,
-            folder=CLOUD_FOLDER,
-            tags=tags,
-            context=f"session={session_id}",
-        )
+class BurstUploader:
+    """Feeds captured files to an UploadService without ever blocking capture.
+
+    At most *max_inflight* uploads are handed to the service at once (each
+    one holds its whole file in memory while it is sent); further files wait
+    as paths in a backlog and are submitted as earlier uploads finish.
+    """
+
+    def __init__(self, service, session_id, max_inflight=4):
+        self.service = service
+        self.session_id = session_id
+        self.max_inflight = max(1, int(max_inflight))
+        self.tags = ["training", f"session_{session_id}", "raining"]
+        self.uploaded = 0
+        self.failed = []
+        self._backlog = deque()
+        self._inflight = 0
+        self._cond = threading.Condition()
+
+    def add(self, filepath):
+        """Queue *filepath* for upload; returns immediately."""
+        with self._cond:
+            self._backlog.append(filepath)
+            self._pump_locked()
+
+    def _pump_locked(self):
+        while self._backlog and self._inflight < self.max_inflight:
+            filepath = self._backlog.popleft()
+            try:
+                future = self.service.submit(
+                    filepath,
+                    folder=CLOUD_FOLDER,
+                    tags=self.tags,
+                    context=f"session={self.session_id}",
+                )
+            except Exception as e:
+                self.failed.append((filepath, e))
+                continue
+            self._inflight += 1
+            future.add_done_callback(lambda f, path=filepath: self._done(path, f))
+
+    def _done(self, filepath, future):
+        error = future.exception() if not future.cancelled() else RuntimeError("cancelled")
+        with self._cond:
+            self._inflight -= 1
+            if error is None:
+                self.uploaded += 1
+            else:
+                self.failed.append((filepath, error))
+            self._pump_locked()
+            self._cond.notify_all()
+
+    @property
+    def pending(self):
+        with self._cond:
+            return len(self._backlog) + self._inflight
+
+    def progress(self):
+        with self._cond:
+            return (
+                f"uploads: {self.uploaded} done, {self._inflight} in flight, "
+                f"{len(self._backlog)} queued, {len(self.failed)} failed"
+            )
+
+    def wait(self, timeout=None, on_tick=None, tick_s=0.5):
+        """Block until every queued file is uploaded or failed; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._backlog or self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(tick_s if remaining is None else min(tick_s, remaining))
+                if on_tick is not None:
+                    on_tick()
         return True
-    except Exception as e:
-        print(f"    [FAIL] Upload error: {e}")
-        return False
+
+
+def _print_progress(line):
+    sys.stdout.write(f"\r  {line}\033[K")
+    sys.stdout.flush()
 
 
 def main():
@@ -68,11 +143,23 @@ def main():
         "--delay",
         type=float,
         default=1.0,
-        help="Seconds to wait between captures (default: 1.0)",
+        help="Seconds between captures (default: 1.0)",
     )
     parser.add_argument(
         "--no-upload", action="store_true", help="Skip uploading to Cloudinary"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Concurrent uploads (default: 2)",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=4,
+        help="Max uploads held in memory at once; later captures wait on disk (default: 4)",
+    )
     args = parser.parse_args()
 
     _ensure_dir(LOCAL_BACKUP_DIR)
@@ -84,45 +171,77 @@ def main():
     print(f"  Target: {args.count} images")
     print(f"  Speed:  1 image every {args.delay} seconds")
     print(f"  Folder: ./{LOCAL_BACKUP_DIR}/")
-    print(f"  Upload: {'Disabled' if args.no_upload else 'Enabled (after capture)'}")
+    print(
+        "  Upload: "
+        + ("Disabled" if args.no_upload else f"Background ({args.workers} workers, max {args.max_inflight} in flight)")
+    )
     print("========================================================\n")
 
     input("Press ENTER to START the burst capture (then start spraying!)...")
 
-    print("\n[CAMERA] Warming up camera...")
-    captured_files = []
-
-    with PersistentCamera() as cam:
-        print("\n[START] Burst capture sequence initiated!\n")
-
-        for i in range(1, args.count + 1):
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"burst_{session_id}_{i:03d}_{timestamp}.jpg"
-            filepath = os.path.join(LOCAL_BACKUP_DIR, filename)
-
-            try:
-                # Capture frame
-                cam.capture(filepath)
-                print(f"  [{i}/{args.count}] Captured: {filename}")
-                captured_files.append(filepath)
-            except Exception as e:
-                print(f"  [{i}/{args.count}] [ERROR] Capture failed: {e}")
-
-            # Wait before next capture (skip delay on the last image)
-            if i < args.count:
-                time.sleep(args.delay)
+    service = None
+    uploads = None
+    if not args.no_upload:
+        service = UploadService(
+            workers=args.workers,
+            max_attempts=UPLOAD_MAX_ATTEMPTS,
+            backoff_min_s=UPLOAD_BACKOFF_MIN_S,
+            backoff_max_s=UPLOAD_BACKOFF_MAX_S,
+            timeout=UPLOAD_TIMEOUT_S,
+        )
+        uploads = BurstUploader(service, session_id, max_inflight=args.max_inflight)
 
-    print("\n[DONE] Burst capture complete!")
+    print("\n[CAMERA] Warming up camera...")
+    captured = 0
 
-    # Upload phase
-    if not args.no_upload and captured_files:
-        print(f"\n[CLOUD] Uploading {len(captured_files)} images to Cloudinary...")
-        for i, filepath in enumerate(captured_files, 1):
+    try:
+        with PersistentCamera() as cam:
+            print("\n[START] Burst capture sequence initiated!\n")
+            # Shots are scheduled on a fixed grid so capture time (and any
+            # slip) does not accumulate into the cadence.
+            next_shot = time.monotonic()
+
+            for i in range(1, args.count + 1):
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+                filename = f"burst_{session_id}_{i:03d}_{timestamp}.jpg"
+                filepath = os.path.join(LOCAL_BACKUP_DIR, filename)
+
+                try:
+                    # Capture frame
+                    cam.capture(filepath)
+                    captured += 1
+                    status = f"  |  {uploads.progress()}" if uploads is not None else ""
+                    print(f"  [{i}/{args.count}] Captured: {filename}{status}")
+                    if uploads is not None:
+                        uploads.add(filepath)
+                except Exception as e:
+                    print(f"  [{i}/{args.count}] [ERROR] Capture failed: {e}")
+
+                # Wait for the next slot (skip delay on the last image)
+                if i < args.count:
+                    next_shot += args.delay
+                    time.sleep(max(0.0, next_shot - time.monotonic()))
+
+        print("\n[DONE] Burst capture complete!")
+
+        if uploads is not None and captured:
+            if uploads.pending:
+                print(f"\n[CLOUD] Finishing {uploads.pending} upload(s)...")
+                uploads.wait(on_tick=lambda: _print_progress(uploads.progress()))
+            _print_progress(uploads.progress())
+            print()
+            stats = service.stats()
+            avg = stats["avg_latency_ms"]
             print(
-                f"  [{i}/{len(captured_files)}] Uploading {os.path.basename(filepath)}..."
+                f"[CLOUD] {uploads.uploaded}/{captured} uploaded, {stats['retries']} retries, "
+                f"{stats['bytes_per_s'] / 1024:.0f} KiB/s"
+                + (f", avg latency {avg / 1000:.1f}s" if avg is not None else "")
             )
-            upload_to_cloudinary(filepath, session_id)
-        print("[CLOUD] Uploads complete!")
+            for filepath, error in uploads.failed:
+                print(f"    [FAIL] {os.path.basename(filepath)}: {error}")
+    finally:
+        if service is not None:
+            service.shutdown(wait=False, cancel_pending=True)
 
     print("\n[SUCCESS] Check your training_captures/ folder or Cloudinary dashboard.")
 
@@ -4,6 +4,8 @@ import subprocess
 import shutil
 import tempfile
 import datetime
+import io
+from dataclasses import replace
 from pathlib import Path
 
 try:
@@ -11,7 +13,10 @@ try:
 except Exception:
     ZoneInfo = None
 
-from config import TRAINING_CAPTURES_DIR, TRAINING_RAINING_DIR
+from config import FRAME_QUALITY_CHECK_ENABLED, IMAGE_CATALOG_REFRESH_S, TRAINING_CAPTURES_DIR, TRAINING_RAINING_DIR
+from frame_pipeline import FramePipeline, MetricsStage, ProcessedFrame, RejectedFrame, TransformStage
+from frame_quality import are_metrics_usable, get_frame_quality_metrics
+from image_catalog import ImageCatalog
 
 CAMERA_WIDTH         = int(os.getenv("CAMERA_WIDTH",         "1296"))
 CAMERA_HEIGHT        = int(os.getenv("CAMERA_HEIGHT",        "972"))
@@ -33,6 +38,13 @@ CAMERA_FRAME_DURATION_MAX = int(os.getenv("CAMERA_FRAME_DURATION_MAX", "500000")
 CAMERA_EXPOSURE_VALUE_DAY   = float(os.getenv("CAMERA_EXPOSURE_VALUE_DAY", os.getenv("CAMERA_EXPOSURE_VALUE", "0.0")))
 CAMERA_EXPOSURE_VALUE_NIGHT = float(os.getenv("CAMERA_EXPOSURE_VALUE_NIGHT", os.getenv("CAMERA_EXPOSURE_VALUE", "0.0")))
 
+# Low-resolution YUV420 "lores" stream configured next to "main".  Quality
+# metrics are then computed from its luminance (Y) plane with no JPEG decode,
+# and unusable frames are rejected before the main stream is ever encoded.
+CAMERA_LORES_ENABLED = os.getenv("CAMERA_LORES_ENABLED", "false").lower() == "true"
+CAMERA_LORES_WIDTH   = int(os.getenv("CAMERA_LORES_WIDTH", "320"))
+CAMERA_LORES_HEIGHT  = int(os.getenv("CAMERA_LORES_HEIGHT", "240"))
+
 # Post-capture Software Cropping
 IMAGE_CROP_ENABLED = os.getenv("IMAGE_CROP_ENABLED", "false").lower() == "true"
 IMAGE_CROP_X       = int(os.getenv("IMAGE_CROP_X", "518"))
@@ -84,50 +96,18 @@ except Exception as e:
     print(f"[CAMERA] Camera initialisation failed ({e}) — running in MOCK mode")
 
 
-def _load_images_from_dir(directory: str) -> list[Path]:
-    image_dir = Path(directory)
-    if not image_dir.exists() or not image_dir.is_dir():
-        return []
-    allowed = {".jpg", ".jpeg", ".png"}
-    images = [
-        p
-        for p in image_dir.rglob("*")
-        if p.is_file() and p.suffix.lower() in allowed
-    ]
-    return sorted(images, key=lambda p: p.relative_to(image_dir).as_posix().lower())
-
-
-_MOCK_FALLBACK_SOURCES: list[tuple[str, str]] = [
-    ("training_captures", TRAINING_CAPTURES_DIR),
-    ("training_raining", TRAINING_RAINING_DIR),
-]
-_MOCK_FALLBACK_INDICES: dict[str, int] = {label: 0 for label, _ in _MOCK_FALLBACK_SOURCES}
-_MOCK_FALLBACK_SOURCE_INDEX = 0
+_MOCK_FALLBACK_CATALOG = ImageCatalog(
+    [
+        ("training_captures", TRAINING_CAPTURES_DIR),
+        ("training_raining", TRAINING_RAINING_DIR),
+    ],
+    refresh_interval_s=IMAGE_CATALOG_REFRESH_S,
+)
 
 
 def _next_mock_fallback_image() -> tuple[str, Path] | tuple[None, None]:
     """Return the next training image for mock/no-camera fallback."""
-    global _MOCK_FALLBACK_SOURCE_INDEX
-
-    num_sources = len(_MOCK_FALLBACK_SOURCES)
-    if num_sources == 0:
-        return None, None
-
-    for _ in range(num_sources):
-        current_source_idx = _MOCK_FALLBACK_SOURCE_INDEX % num_sources
-        _MOCK_FALLBACK_SOURCE_INDEX += 1
-
-        label, directory = _MOCK_FALLBACK_SOURCES[current_source_idx]
-        images = _load_images_from_dir(directory)
-        if not images:
-            continue
-
-        idx = _MOCK_FALLBACK_INDICES[label]
-        path = images[idx % len(images)]
-        _MOCK_FALLBACK_INDICES[label] = idx + 1
-        return label, path
-
-    return None, None
+    return _MOCK_FALLBACK_CATALOG.next_image()
 
 # ── IR-CUT filter helpers ────────────────────────────────────────────────────
 
@@ -267,17 +247,22 @@ def log_ir_status(prefix: str = "[CAMERA]") -> None:
     )
 
 
+_MINIMAL_JPEG = (
+    b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    b'\xff\xdb\x00C\x00\x08\x06\x06\x07\x06\x05\x08\x07\x07\x07\t\t\x08\n\x0c'
+    b'\x14\r\x0c\x0b\x0b\x0c\x19\x12\x13\x0f\x14\x1d\x1a\x1f\x1e\x1d\x1a\x1c'
+    b'\x1c $.\'" ,#\x1c\x1c(7),01444\x1f\'9=82<.342\xff\xc0\x00\x0b\x08\x00'
+    b'\x01\x00\x01\x01\x01\x11\x00\xff\xc4\x00\x1f\x00\x00\x01\x05\x01\x01'
+    b'\x01\x01\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x01\x02\x03\x04\x05'
+    b'\x06\x07\x08\t\n\x0b\xff\xc4\x00\xb5\x10\x00\x02\x01\x03\x03\x02\x04'
+    b'\x03\x05\x05\x04\x04\x00\x00\x01}\xff\xda\x00\x08\x01\x01\x00\x00?\x00'
+    b'\xd2\xcf \xff\xd9'
+)
+
+
 def _write_minimal_jpeg(path: str) -> None:
     with open(path, 'wb') as f:
-        f.write(b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
-               b'\xff\xdb\x00C\x00\x08\x06\x06\x07\x06\x05\x08\x07\x07\x07\t\t\x08\n\x0c'
-               b'\x14\r\x0c\x0b\x0b\x0c\x19\x12\x13\x0f\x14\x1d\x1a\x1f\x1e\x1d\x1a\x1c'
-               b'\x1c $.\'" ,#\x1c\x1c(7),01444\x1f\'9=82<.342\xff\xc0\x00\x0b\x08\x00'
-               b'\x01\x00\x01\x01\x01\x11\x00\xff\xc4\x00\x1f\x00\x00\x01\x05\x01\x01'
-               b'\x01\x01\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x01\x02\x03\x04\x05'
-               b'\x06\x07\x08\t\n\x0b\xff\xc4\x00\xb5\x10\x00\x02\x01\x03\x03\x02\x04'
-               b'\x03\x05\x05\x04\x04\x00\x00\x01}\xff\xda\x00\x08\x01\x01\x00\x00?\x00'
-               b'\xd2\xcf \xff\xd9')
+        f.write(_MINIMAL_JPEG)
 
 
 def build_ir_status_image(path: str | None = None, now: datetime.datetime | None = None) -> str:
@@ -424,6 +409,103 @@ def _build_quality_controls():
     return controls
 
 
+def _crop_frame(img, scale_x: float = 1.0, scale_y: float = 1.0):
+    """Return *img* cropped to the configured Region of Interest (ROI).
+
+    The frame is returned unchanged when cropping is disabled or the ROI
+    does not intersect the image.  Slicing returns a view, so no pixel data
+    is copied here.  *scale_x*/*scale_y* map the ROI (given in main-stream
+    pixels) onto a smaller stream such as lores.
+    """
+    if not IMAGE_CROP_ENABLED or img is None:
+        return img
+
+    # Ensure crop coordinates are within image bounds
+    h, w = img.shape[:2]
+    x1 = max(0, min(int(IMAGE_CROP_X * scale_x), w - 1))
+    y1 = max(0, min(int(IMAGE_CROP_Y * scale_y), h - 1))
+    x2 = max(0, min(x1 + int(IMAGE_CROP_WIDTH * scale_x), w))
+    y2 = max(0, min(y1 + int(IMAGE_CROP_HEIGHT * scale_y), h))
+
+    # Only crop if the region is valid
+    if x2 > x1 and y2 > y1:
+        return img[y1:y2, x1:x2]
+    return img
+
+
+def _is_clahe_night_active() -> bool:
+    if not IMAGE_CLAHE_NIGHT_ENABLED:
+        return False
+    # Only apply at night
+    dt = _ir_now()
+    return not _ir_cut_controller.target_day_mode(dt)
+
+
+def _clahe_night_frame(img):
+    """Return a CLAHE-enhanced copy of a BGR frame when night mode is active."""
+    if img is None or not _is_clahe_night_active():
+        return img
+
+    import cv2
+
+    # Convert to Grayscale (removes the pink IR tint)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+    # Apply CLAHE to enhance contrast and pull details out of shadows
+    clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
+    enhanced_gray = clahe.apply(gray)
+
+    # Convert back to BGR (3 channels) so YOLOv8 doesn't crash expecting a 3D tensor
+    return cv2.cvtColor(enhanced_gray, cv2.COLOR_GRAY2BGR)
+
+
+def _decode_jpeg(data: bytes):
+    """Decode encoded image bytes to a BGR frame, or None if undecodable."""
+    import cv2
+    import numpy as np
+
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def _main_to_bgr(frame):
+    """Convert a Picamera2 main-stream array to the BGR layout OpenCV expects."""
+    import cv2
+
+    # Picamera2's "BGR888" format is laid out [R, G, B] in memory;
+    # swap the channels so OpenCV sees the BGR order it expects.
+    return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+
+
+def build_frame_pipeline(metrics: bool = True, post_process: bool = True) -> FramePipeline:
+    """Return the standard capture pipeline: crop → night CLAHE → metrics → one encode."""
+    stages = []
+    if post_process:
+        stages.append(TransformStage("crop", _crop_frame))
+        stages.append(TransformStage("clahe_night", _clahe_night_frame))
+    if metrics:
+        stages.append(MetricsStage())
+    return FramePipeline(stages, jpeg_quality=CAMERA_JPEG_QUALITY)
+
+
+def _encode_main_jpeg(request) -> bytes:
+    """Encode a request's main stream with picamera2's own JPEG encoder.
+
+    The fallback when OpenCV is missing: like the file-based capture()
+    path without cv2, software crop and night CLAHE are skipped.
+    """
+    buf = io.BytesIO()
+    request.save('main', buf, format='jpeg')
+    return buf.getvalue()
+
+
+def _cv2_available() -> bool:
+    try:
+        import cv2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
 def _apply_software_crop(path):
     """Crop the saved image to the defined Region of Interest (ROI) if enabled."""
     if not IMAGE_CROP_ENABLED or not os.path.exists(path):
@@ -433,19 +515,11 @@ def _apply_software_crop(path):
         img = cv2.imread(path)
         if img is None:
             return
-        
-        # Ensure crop coordinates are within image bounds
-        h, w = img.shape[:2]
-        x1 = max(0, min(IMAGE_CROP_X, w - 1))
-        y1 = max(0, min(IMAGE_CROP_Y, h - 1))
-        x2 = max(0, min(x1 + IMAGE_CROP_WIDTH, w))
-        y2 = max(0, min(y1 + IMAGE_CROP_HEIGHT, h))
-        
-        # Only crop if the region is valid
-        if x2 > x1 and y2 > y1:
-            cropped = img[y1:y2, x1:x2]
+
+        cropped = _crop_frame(img)
+        if cropped is not img:
             cv2.imwrite(path, cropped, [int(cv2.IMWRITE_JPEG_QUALITY), CAMERA_JPEG_QUALITY])
-            # print(f"[CAMERA] Cropped image to {x2-x1}x{y2-y1} (ROI: x={x1}, y={y1})")
+            # print(f"[CAMERA] Cropped image to {cropped.shape[1]}x{cropped.shape[0]}")
     except ImportError:
         print("[CAMERA] Warning: cv2 not installed, software crop skipped.")
     except Exception as e:
@@ -453,31 +527,17 @@ def _apply_software_crop(path):
 
 def _apply_clahe_night(path):
     """Apply CLAHE (Contrast Limited Adaptive Histogram Equalization) for better night vision visibility."""
-    if not IMAGE_CLAHE_NIGHT_ENABLED or not os.path.exists(path):
-        return
-    
-    # Only apply at night
-    dt = _ir_now()
-    is_day = _ir_cut_controller.target_day_mode(dt)
-    if is_day:
+    if not os.path.exists(path) or not _is_clahe_night_active():
         return
-        
+
     try:
         import cv2
         img = cv2.imread(path)
         if img is None:
             return
-            
-        # Convert to Grayscale (removes the pink IR tint)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Apply CLAHE to enhance contrast and pull details out of shadows
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        enhanced_gray = clahe.apply(gray)
-        
-        # Convert back to BGR (3 channels) so YOLOv8 doesn't crash expecting a 3D tensor
-        enhanced_img = cv2.cvtColor(enhanced_gray, cv2.COLOR_GRAY2BGR)
-        
+
+        enhanced_img = _clahe_night_frame(img)
+
         # Save the enhanced grayscale image
         cv2.imwrite(path, enhanced_img, [int(cv2.IMWRITE_JPEG_QUALITY), CAMERA_JPEG_QUALITY])
         # print("[CAMERA] Applied CLAHE night vision enhancement")
@@ -487,6 +547,53 @@ def _apply_clahe_night(path):
         print(f"[CAMERA] Warning: Failed to apply CLAHE enhancement: {e}")
 
 
+def _mock_frame_bytes() -> bytes:
+    """Return an encoded mock frame without writing anything to disk.
+
+    Mirrors the fallback order of capture_image(): training images first,
+    then fswebcam (streamed to stdout), then a generated PIL image.
+    """
+    fallback_label, fallback_image = _next_mock_fallback_image()
+    if fallback_image is not None:
+        try:
+            data = Path(fallback_image).read_bytes()
+            print(f"[MOCK] Using {fallback_label} fallback image: {fallback_image} (in-memory)")
+            return data
+        except Exception as e:
+            print(f"[MOCK] Failed to read {fallback_label} fallback image {fallback_image}: {e}")
+
+    if USE_FSWEBCAM:
+        try:
+            print("[MOCK] Capturing with fswebcam...")
+            result = subprocess.run(
+                ['fswebcam', '-r', '640x480', '--no-banner', '-S', '10', '-'],
+                capture_output=True,
+                timeout=15
+            )
+            if result.returncode == 0 and result.stdout:
+                print("[MOCK] fswebcam capture successful (in-memory)")
+                return result.stdout
+            print(f"[MOCK] fswebcam failed: {result.stderr.decode()}")
+        except FileNotFoundError:
+            print("[MOCK] fswebcam not installed, falling back to test image")
+        except Exception as e:
+            print(f"[MOCK] fswebcam error: {e}")
+
+    try:
+        from PIL import Image, ImageDraw
+        img = Image.new('RGB', (640, 480), color=(73, 109, 137))
+        draw = ImageDraw.Draw(img)
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        draw.text((10, 10), f"AGOS Mock Camera\n{timestamp}", fill=(255, 255, 255))
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG")
+        print("[MOCK] Generated in-memory test image")
+        return buf.getvalue()
+    except ImportError:
+        print("[MOCK] PIL not available, using minimal blank image")
+        return _MINIMAL_JPEG
+
+
 def capture_image(path=None):
     # Use cross-platform temporary directory if path not specified
     if path is None:
@@ -558,9 +665,14 @@ def capture_image(path=None):
         cam.start()
         time.sleep(2)  # Allow AEC/AWB to converge on the correct crop region
         _log_runtime_scaler_crop(cam)
-        cam.capture_file(path)
-        _apply_software_crop(path)
-        _apply_clahe_night(path)
+        if _cv2_available():
+            frame = _main_to_bgr(cam.capture_array('main'))
+            processed = build_frame_pipeline(metrics=False).process(frame)
+            Path(path).write_bytes(processed.jpeg)
+        else:
+            cam.capture_file(path)
+            _apply_software_crop(path)
+            _apply_clahe_night(path)
         print(f"[CAMERA] Captured {CAMERA_WIDTH}×{CAMERA_HEIGHT} image: {path}")
         return path
     finally:
@@ -588,8 +700,13 @@ class PersistentCamera:
     Falls back to the module-level mock path when MOCK_MODE is active.
     """
 
-    def __init__(self):
+    def __init__(self, lores: bool | None = None):
         self._cam = None
+        self._lores_enabled = CAMERA_LORES_ENABLED if lores is None else bool(lores)
+        self._lores_size = (CAMERA_LORES_WIDTH, CAMERA_LORES_HEIGHT)
+        self._pipeline = build_frame_pipeline()
+        self._encode_pipeline = build_frame_pipeline(metrics=False)
+        self._mock_pipeline = build_frame_pipeline(post_process=False)
 
     def start(self):
         """Open and configure the camera; blocks until AEC/AWB converges."""
@@ -601,8 +718,12 @@ class PersistentCamera:
         import time
         _ir_cut_controller.maybe_apply(force=True)
         self._cam = _create_camera()
+        streams = {"main": {"size": (CAMERA_WIDTH, CAMERA_HEIGHT)}}
+        if self._lores_enabled:
+            # VC4 ISPs (Pi Zero) only produce YUV420 on the lores stream.
+            streams["lores"] = {"size": self._lores_size, "format": "YUV420"}
         config = self._cam.create_still_configuration(
-            main={"size": (CAMERA_WIDTH, CAMERA_HEIGHT)},
+            **streams,
             controls=_build_quality_controls(),
             buffer_count=1,
         )
@@ -626,13 +747,151 @@ class PersistentCamera:
             return capture_image(path)  # use mock path
         log_ir_status()
         _ir_cut_controller.maybe_apply()
-        request = self._cam.capture_request(flush=True)
-        request.save('main', path)
-        request.release()
-        _apply_software_crop(path)
-        _apply_clahe_night(path)
+        if not _cv2_available():
+            request = self._cam.capture_request(flush=True)
+            request.save('main', path)
+            request.release()
+            _apply_software_crop(path)
+            _apply_clahe_night(path)
+            return path
+        # Crop and CLAHE run on one decoded array; the file is encoded once.
+        Path(path).write_bytes(self._capture_processed(self._encode_pipeline).jpeg)
         return path
 
+    def _capture_main_array(self):
+        """Grab the main stream as a BGR array straight from the request buffer."""
+        request = self._cam.capture_request(flush=True)
+        try:
+            frame = request.make_array('main')
+        finally:
+            request.release()
+        return _main_to_bgr(frame)
+
+    def _capture_main_jpeg(self):
+        """Capture the main stream as JPEG bytes without OpenCV."""
+        request = self._cam.capture_request(flush=True)
+        try:
+            return _encode_main_jpeg(request)
+        finally:
+            request.release()
+
+    def _capture_processed(self, pipeline):
+        log_ir_status()
+        _ir_cut_controller.maybe_apply()
+        return pipeline.process(self._capture_main_array())
+
+    def _lores_luma(self, request):
+        """Return the ROI-cropped Y plane of the lores stream (a view, no copy)."""
+        lores = request.make_array('lores')
+        width, height = self._lores_size
+        # YUV420 arrays are (height * 3/2, stride): the first *height* rows
+        # are the luminance plane, possibly padded to the stride on the right.
+        luma = lores[:height, :width]
+        return _crop_frame(
+            luma,
+            scale_x=width / float(CAMERA_WIDTH),
+            scale_y=height / float(CAMERA_HEIGHT),
+        )
+
+    def _lores_metrics(self, request):
+        """Score the lores luma as the encoded main frame will look.
+
+        At night the main frame is CLAHE-enhanced before encoding, so the
+        luma is enhanced too; judging the darker raw plane would reject
+        frames the full-frame gate accepts.
+        """
+        luma = self._lores_luma(request)
+        if _cv2_available():
+            luma = _clahe_night_frame(luma)
+        return get_frame_quality_metrics(luma)
+
+    def _capture_with_lores(self, reject_unusable):
+        log_ir_status()
+        _ir_cut_controller.maybe_apply()
+        request = self._cam.capture_request(flush=True)
+        try:
+            metrics = self._lores_metrics(request)
+            # Without metrics (OpenCV missing) the gate is skipped, as in
+            # frame_quality, rather than rejecting every frame.
+            if (
+                reject_unusable
+                and FRAME_QUALITY_CHECK_ENABLED
+                and metrics is not None
+                and not are_metrics_usable(metrics)
+            ):
+                # Rejected on the lores plane: the main stream is never encoded.
+                return RejectedFrame(metrics=metrics)
+            if not _cv2_available():
+                return ProcessedFrame(jpeg=_encode_main_jpeg(request), metrics=metrics)
+            frame = _main_to_bgr(request.make_array('main'))
+        finally:
+            request.release()
+        processed = self._encode_pipeline.process(frame)
+        return replace(processed, metrics=metrics) if metrics is not None else processed
+
+    def capture_frame(self, reject_unusable: bool = False):
+        """Capture a frame and return a ProcessedFrame (JPEG bytes + metrics).
+
+        Crop, night CLAHE and the quality metrics all run over one decoded
+        array and the JPEG is encoded exactly once.  In MOCK mode the
+        fallback JPEG is decoded once for metrics and passed through
+        without re-encoding.
+
+        With the lores stream enabled, metrics come from its luminance plane
+        (after night CLAHE, like the main frame) instead, and when *reject_unusable* is set a
+        frame failing the quality gate is returned as a RejectedFrame
+        (metrics only) without the main stream being converted or encoded.
+
+        Without OpenCV the main stream is encoded by picamera2 as captured
+        (no crop or CLAHE) and the frame carries no metrics.
+        """
+        if MOCK or not PICAMERA_AVAILABLE or self._cam is None:
+            data = _mock_frame_bytes()
+            try:
+                return self._mock_pipeline.process_bytes(data)
+            except (ImportError, ValueError):
+                return ProcessedFrame(jpeg=data)
+        if self._lores_enabled:
+            return self._capture_with_lores(reject_unusable)
+        if not _cv2_available():
+            log_ir_status()
+            _ir_cut_controller.maybe_apply()
+            return ProcessedFrame(jpeg=self._capture_main_jpeg())
+        return self._capture_processed(self._pipeline)
+
+    def capture_array(self):
+        """Capture a single frame as a BGR NumPy array without touching the filesystem.
+
+        Software crop and night CLAHE are applied to the array in memory.
+        In MOCK mode the fallback frame is decoded from memory instead.
+
+        Raises ImportError when OpenCV is not installed; capture_bytes()
+        works without it.
+        """
+        if not _cv2_available():
+            raise ImportError("capture_array() requires OpenCV (cv2); use capture_bytes() instead")
+        if MOCK or not PICAMERA_AVAILABLE or self._cam is None:
+            return _decode_jpeg(_mock_frame_bytes())
+        log_ir_status()
+        _ir_cut_controller.maybe_apply()
+        frame = self._capture_main_array()
+        return _clahe_night_frame(_crop_frame(frame))
+
+    def capture_bytes(self):
+        """Capture a single frame as encoded JPEG bytes without touching the filesystem.
+
+        The frame is post-processed in memory and encoded exactly once.
+        Without OpenCV, picamera2 encodes the frame as captured (no crop or
+        CLAHE).  Callers that need a file should use capture() instead.
+        """
+        if MOCK or not PICAMERA_AVAILABLE or self._cam is None:
+            return _mock_frame_bytes()
+        if not _cv2_available():
+            log_ir_status()
+            _ir_cut_controller.maybe_apply()
+            return self._capture_main_jpeg()
+        return self._capture_processed(self._encode_pipeline).jpeg
+
     def stop(self):
         """Stop and close the camera."""
         if self._cam is not None:
@@ -4,7 +4,7 @@ import time
 from datetime import datetime, timezone
 
 from camera import capture_image
-from frame_quality import are_metrics_usable, get_frame_quality_metrics
+from frame_quality import evaluate_frame
 
 
 def _utc_ts():
@@ -29,14 +29,15 @@ def run_check(continuous=False, interval_s=1.0, keep_images=False):
         path = None
         try:
             path = capture_image()
-            metrics = get_frame_quality_metrics(path)
-            if metrics is None:
+            verdict = evaluate_frame(path)
+            if verdict.metrics is None:
                 print(f"[{_utc_ts()}] quality=UNKNOWN image={path} (failed to compute metrics)")
             else:
-                usable = are_metrics_usable(metrics)
+                usable = not verdict.failed_thresholds
+                failed = f" failed={','.join(verdict.failed_thresholds)}" if not usable else ""
                 print(
                     f"[{_utc_ts()}] quality={'PASS' if usable else 'FAIL'} "
-                    f"image={path} {_format_metrics(metrics)}"
+                    f"image={path} {_format_metrics(verdict.metrics)}{failed}"
                 )
             count += 1
         except Exception as err:
@@ -6,6 +6,19 @@ CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 API_KEY = os.getenv("CLOUDINARY_API_KEY")
 API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 CLOUDINARY_URL = os.getenv("CLOUDINARY_URL")
+# Opt-in upload dedup: a SQLite index of content hash → secure_url lets
+# uploader.upload_image() answer repeat uploads (static-image modes, capture
+# retries) without a network call.  Oldest entries beyond MAX_ENTRIES are evicted.
+UPLOAD_DEDUP_ENABLED = os.getenv("UPLOAD_DEDUP_ENABLED", "false").lower() == "true"
+UPLOAD_DEDUP_DB = os.getenv("UPLOAD_DEDUP_DB", "state/upload_index.db")
+UPLOAD_DEDUP_MAX_ENTRIES = max(0, int(os.getenv("UPLOAD_DEDUP_MAX_ENTRIES", "10000")))
+# uploader.UploadService (capture tools): attempts per upload, including the
+# first, for transient Cloudinary/network errors, with full-jitter
+# exponential backoff between them, and the per-request timeout.
+UPLOAD_MAX_ATTEMPTS = max(1, int(os.getenv("UPLOAD_MAX_ATTEMPTS", "3")))
+UPLOAD_BACKOFF_MIN_S = max(0.0, float(os.getenv("UPLOAD_BACKOFF_MIN_S", "0.5")))
+UPLOAD_BACKOFF_MAX_S = max(UPLOAD_BACKOFF_MIN_S, float(os.getenv("UPLOAD_BACKOFF_MAX_S", "8.0")))
+UPLOAD_TIMEOUT_S = max(1.0, float(os.getenv("UPLOAD_TIMEOUT_S", "60")))
 SERVER_URL = os.getenv("SERVER_URL")
 IOT_API_KEY = os.getenv("IOT_API_KEY", "")
 SENSOR_DEVICE_ID = int(os.getenv("SENSOR_DEVICE_ID", "1"))
@@ -21,7 +34,51 @@ USE_TRAINING_CAPTURES = os.getenv("USE_TRAINING_CAPTURES", "false").lower() == "
 TRAINING_CAPTURES_DIR = os.getenv("TRAINING_CAPTURES_DIR", "training_captures")
 USE_TRAINING_RAINING = os.getenv("USE_TRAINING_RAINING", "false").lower() == "true"
 TRAINING_RAINING_DIR = os.getenv("TRAINING_RAINING_DIR", "training_raining")
+# Static/mock image folders are re-checked for new or deleted images at most
+# this often (seconds); a check costs one stat per directory.
+IMAGE_CATALOG_REFRESH_S = max(0.0, float(os.getenv("IMAGE_CATALOG_REFRESH_S", "1.0")))
+# Opt-in in-memory cache for static-image playback: each file is read once and
+# its bytes and quality metrics are served from memory within this budget,
+# LRU-evicted.  0 disables.
+STATIC_FRAME_CACHE_MB = max(0.0, float(os.getenv("STATIC_FRAME_CACHE_MB", "0")))
 SENSOR_POST_ENABLED = os.getenv("SENSOR_POST_ENABLED", "true").lower() == "true"
+# Readings are queued and POSTed by a background sender so a slow backend
+# never stalls sampling.  When the queue is full the oldest reading is dropped.
+SENSOR_SEND_QUEUE_SIZE = max(1, int(os.getenv("SENSOR_SEND_QUEUE_SIZE", "120")))
+SENSOR_POST_TIMEOUT_S = float(os.getenv("SENSOR_POST_TIMEOUT_S", "5.0"))
+# Opt-in batching: readings are POSTed as one JSON array when the batch holds
+# SENSOR_BATCH_MAX_SIZE readings, its oldest reading is SENSOR_BATCH_MAX_AGE_S
+# old, or the water-level risk tier changes (flushed immediately).
+SENSOR_BATCH_ENABLED = os.getenv("SENSOR_BATCH_ENABLED", "false").lower() == "true"
+SENSOR_BATCH_MAX_SIZE = max(1, int(os.getenv("SENSOR_BATCH_MAX_SIZE", "30")))
+SENSOR_BATCH_MAX_AGE_S = max(0.0, float(os.getenv("SENSOR_BATCH_MAX_AGE_S", "30.0")))
+
+# Opt-in store-and-forward spool (SQLite, WAL mode) for readings and frames
+# that could not be delivered; replayed oldest-first once the network is back.
+SPOOL_ENABLED = os.getenv("SPOOL_ENABLED", "false").lower() == "true"
+SPOOL_DIR = os.getenv("SPOOL_DIR", "spool")
+SPOOL_MAX_READINGS = max(0, int(os.getenv("SPOOL_MAX_READINGS", "100000")))
+SPOOL_MAX_FRAMES = max(0, int(os.getenv("SPOOL_MAX_FRAMES", "500")))
+# Writes are committed in batches to spare the SD card.
+SPOOL_FLUSH_BATCH = max(1, int(os.getenv("SPOOL_FLUSH_BATCH", "20")))
+SPOOL_FLUSH_INTERVAL_S = max(0.0, float(os.getenv("SPOOL_FLUSH_INTERVAL_S", "30.0")))
+# Replay throttles so backlog never crowds out live traffic.
+SPOOL_REPLAY_READINGS_PER_S = max(0.0, float(os.getenv("SPOOL_REPLAY_READINGS_PER_S", "5.0")))
+SPOOL_REPLAY_FRAMES_PER_MIN = max(0.0, float(os.getenv("SPOOL_REPLAY_FRAMES_PER_MIN", "6.0")))
+
+# ── WebSocket connection (shared, long-lived) ───────────────────────────────
+# WS_PING_INTERVAL=0 disables keepalive pings; WS_PING_TIMEOUT=0 sends pings
+# without waiting for the pong.  "none" is accepted like in ws_sender.py.
+def _env_seconds_or_zero(name, default):
+    raw = os.getenv(name, default).strip()
+    return 0.0 if raw.lower() in {"", "none"} else float(raw)
+
+
+WS_PING_INTERVAL = _env_seconds_or_zero("WS_PING_INTERVAL", "0")
+WS_PING_TIMEOUT = _env_seconds_or_zero("WS_PING_TIMEOUT", "0")
+WS_CONNECT_TIMEOUT = float(os.getenv("WS_CONNECT_TIMEOUT", "10"))
+WS_RECONNECT_BACKOFF_MIN_S = float(os.getenv("WS_RECONNECT_BACKOFF_MIN_S", "1.0"))
+WS_RECONNECT_BACKOFF_MAX_S = float(os.getenv("WS_RECONNECT_BACKOFF_MAX_S", "30.0"))
 
 # ── Timing / throughput ──────────────────────────────────────────────────────
 # How often each subsystem runs.  Adjust these (or the matching env vars) to
@@ -34,6 +91,10 @@ SENSOR_POST_ENABLED = os.getenv("SENSOR_POST_ENABLED", "true").lower() == "true"
 # AEC/AWB warm-up is paid only once at startup.
 SENSOR_INTERVAL = float(os.getenv("SENSOR_INTERVAL", "1.0"))   # seconds
 CAMERA_INTERVAL = float(os.getenv("CAMERA_INTERVAL", "0.5"))   # seconds  (2 fps)
+# Each frame is uploaded and sent over the WebSocket concurrently; each sink
+# keeps at most CAMERA_MAX_INFLIGHT_FRAMES queued/running and drops the oldest.
+CAMERA_MAX_INFLIGHT_FRAMES = max(1, int(os.getenv("CAMERA_MAX_INFLIGHT_FRAMES", "4")))
+CAMERA_UPLOAD_WORKERS = max(1, int(os.getenv("CAMERA_UPLOAD_WORKERS", "2")))
 
 # ── Sensor GPIO mapping (BCM numbering) ───────────────────────────────────
 SENSOR_TRIG_PIN = int(os.getenv("SENSOR_TRIG_PIN", "23"))
@@ -41,11 +102,55 @@ SENSOR_ECHO_PIN = int(os.getenv("SENSOR_ECHO_PIN", "24"))
 
 # ── Sensor sampling and timing ────────────────────────────────────────────
 SENSOR_TIMEOUT_S = float(os.getenv("SENSOR_TIMEOUT_S", "0.3"))
+# How echo pulses are timed: "edge" sleeps on RPi.GPIO edge callbacks
+# (falls back to "poll" if edge detection cannot be enabled); "poll" busy-waits
+# on GPIO.input().
+SENSOR_ECHO_BACKEND = os.getenv("SENSOR_ECHO_BACKEND", "edge").strip().lower()
 SENSOR_BURST_SAMPLES = max(1, int(os.getenv("SENSOR_BURST_SAMPLES", "7")))
 SENSOR_BURST_MIN_VALID = max(1, int(os.getenv("SENSOR_BURST_MIN_VALID", "3")))
 SENSOR_BURST_SAMPLE_DELAY_S = max(
     0.06, float(os.getenv("SENSOR_BURST_SAMPLE_DELAY_S", "0.06"))
 )
+# Opt-in adaptive bursts stop as soon as SENSOR_BURST_MIN_VALID valid pings agree
+# (median absolute deviation <= SENSOR_BURST_TOLERANCE_CM) and keep sampling
+# noisy bursts up to SENSOR_BURST_MAX_SAMPLES.  Disabled → fixed
+# SENSOR_BURST_SAMPLES pings.
+SENSOR_BURST_ADAPTIVE = os.getenv("SENSOR_BURST_ADAPTIVE", "false").lower() == "true"
+SENSOR_BURST_TOLERANCE_CM = max(0.0, float(os.getenv("SENSOR_BURST_TOLERANCE_CM", "0.3")))
+SENSOR_BURST_MAX_SAMPLES = max(
+    SENSOR_BURST_SAMPLES, int(os.getenv("SENSOR_BURST_MAX_SAMPLES", "15"))
+)
+# Dispersion (cm) at which the reported signal_strength reaches 0.
+SENSOR_SIGNAL_DISPERSION_FULL_SCALE_CM = max(
+    0.01, float(os.getenv("SENSOR_SIGNAL_DISPERSION_FULL_SCALE_CM", "5.0"))
+)
+# Continuous ranging: a background sampler pings the sensor back to back into
+# a ring buffer and get_water_level() returns the median of the last
+# SENSOR_CONTINUOUS_WINDOW_S seconds immediately instead of running a burst.
+SENSOR_CONTINUOUS_ENABLED = os.getenv("SENSOR_CONTINUOUS_ENABLED", "false").lower() == "true"
+SENSOR_CONTINUOUS_WINDOW_S = max(0.1, float(os.getenv("SENSOR_CONTINUOUS_WINDOW_S", "1.0")))
+SENSOR_CONTINUOUS_BUFFER_SIZE = max(1, int(os.getenv("SENSOR_CONTINUOUS_BUFFER_SIZE", "64")))
+# Readings whose newest sample is older than this are reported as missing.
+SENSOR_CONTINUOUS_MAX_AGE_S = max(0.0, float(os.getenv("SENSOR_CONTINUOUS_MAX_AGE_S", "3.0")))
+# Run the continuous sampler in its own process (publishing to a shared-memory
+# ring) so the GIL and camera/OpenCV work cannot delay echo timing.
+SENSOR_CONTINUOUS_PROCESS = os.getenv("SENSOR_CONTINUOUS_PROCESS", "false").lower() == "true"
+# Linux scheduling controls for the thread/process that pings the sensor
+# (best effort: skipped with a warning when privileges are missing).
+#   SENSOR_RT_POLICY     other (unchanged) | fifo | rr — needs CAP_SYS_NICE
+#   SENSOR_RT_PRIORITY   1–99 real-time priority for fifo/rr
+#   SENSOR_CPU_AFFINITY  comma-separated CPU numbers to pin to, e.g. "3"
+#   SENSOR_MLOCKALL      lock the pinging process's memory (no page faults);
+#                        in thread mode this covers the whole application
+SENSOR_RT_POLICY = os.getenv("SENSOR_RT_POLICY", "other").strip().lower()
+SENSOR_RT_PRIORITY = min(99, max(1, int(os.getenv("SENSOR_RT_PRIORITY", "10"))))
+SENSOR_CPU_AFFINITY = [
+    int(cpu) for cpu in os.getenv("SENSOR_CPU_AFFINITY", "").split(",") if cpu.strip()
+]
+SENSOR_MLOCKALL = os.getenv("SENSOR_MLOCKALL", "false").lower() == "true"
+# How often main.py logs the ping wake-up jitter histogram summary (0 = only
+# at shutdown).
+SENSOR_JITTER_LOG_INTERVAL_S = max(0.0, float(os.getenv("SENSOR_JITTER_LOG_INTERVAL_S", "600")))
 _temp_c_raw = os.getenv("SENSOR_TEMPERATURE_C", "").strip()
 try:
     SENSOR_TEMPERATURE_C = float(_temp_c_raw) if _temp_c_raw else None
@@ -80,6 +185,24 @@ SENSOR_FILTER_MODZ_THRESHOLD = float(os.getenv("SENSOR_FILTER_MODZ_THRESHOLD", "
 SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM = float(os.getenv("SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM", "1.0"))
 SENSOR_FILTER_REBASELINE_OUTLIER_STREAK = int(os.getenv("SENSOR_FILTER_REBASELINE_OUTLIER_STREAK", "5"))
 SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM = float(os.getenv("SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM", "8.0"))
+# "average" = WaterLevelFilter (MAD outlier check + moving average, lags a
+# trend by half the window); "kalman" = LevelTracker (constant-velocity
+# Kalman filter: follows a rising level without lag and reports the rise
+# rate).  The range and rebaseline settings above apply to both.
+SENSOR_FILTER_MODE = os.getenv("SENSOR_FILTER_MODE", "average").strip().lower()
+SENSOR_KALMAN_MEASUREMENT_STD_CM = max(0.01, float(os.getenv("SENSOR_KALMAN_MEASUREMENT_STD_CM", "1.0")))
+SENSOR_KALMAN_ACCEL_STD_CM_MIN2 = max(0.0, float(os.getenv("SENSOR_KALMAN_ACCEL_STD_CM_MIN2", "1.0")))
+SENSOR_KALMAN_GATE_SIGMA = max(0.0, float(os.getenv("SENSOR_KALMAN_GATE_SIGMA", "4.0")))
+# Kalman mode: raise the fallback risk LED tier as soon as the predicted time
+# to the next threshold drops below this many seconds (0 = current level only).
+SENSOR_RISK_LOOKAHEAD_S = max(0.0, float(os.getenv("SENSOR_RISK_LOOKAHEAD_S", "600")))
+# Opt-in warm restart: snapshot the filter state every
+# SENSOR_FILTER_SNAPSHOT_INTERVAL_S seconds and on shutdown, and restore it at
+# startup when it is no older than SENSOR_FILTER_SNAPSHOT_MAX_AGE_S.
+SENSOR_FILTER_SNAPSHOT_ENABLED = os.getenv("SENSOR_FILTER_SNAPSHOT_ENABLED", "false").lower() == "true"
+SENSOR_FILTER_SNAPSHOT_PATH = os.getenv("SENSOR_FILTER_SNAPSHOT_PATH", "state/filter.snap")
+SENSOR_FILTER_SNAPSHOT_INTERVAL_S = max(1.0, float(os.getenv("SENSOR_FILTER_SNAPSHOT_INTERVAL_S", "60")))
+SENSOR_FILTER_SNAPSHOT_MAX_AGE_S = max(0.0, float(os.getenv("SENSOR_FILTER_SNAPSHOT_MAX_AGE_S", "900")))
 
 # ── Camera frame quality gate (lightweight OpenCV checks) ──────────────────
 # Tuned for YOLOv8 detection accuracy on OV5647 output.
@@ -89,6 +212,9 @@ FRAME_QUALITY_MAX_BRIGHTNESS = float(os.getenv("FRAME_QUALITY_MAX_BRIGHTNESS", "
 FRAME_QUALITY_MIN_CONTRAST_STDDEV = float(os.getenv("FRAME_QUALITY_MIN_CONTRAST_STDDEV", "25.0"))
 FRAME_QUALITY_MIN_LAPLACIAN_VAR = float(os.getenv("FRAME_QUALITY_MIN_LAPLACIAN_VAR", "100.0"))
 FRAME_QUALITY_RESIZE_WIDTH = int(os.getenv("FRAME_QUALITY_RESIZE_WIDTH", "320"))
+# LRU cache of per-file metrics (keyed by path + mtime + size) so static-image
+# modes do not decode the same JPEG on every cycle.  0 disables the cache.
+FRAME_QUALITY_METRICS_CACHE_SIZE = max(0, int(os.getenv("FRAME_QUALITY_METRICS_CACHE_SIZE", "256")))
 
 # Fusion & Decision Engine API (leave blank to use water-level fallback only)
 RISK_SCORE_API_URL = os.getenv("RISK_SCORE_API_URL", "")
@@ -0,0 +1,178 @@
+"""
+Software stand-in for RPi.GPIO wired to a simulated JSN-SR04.
+
+Implements the subset of the RPi.GPIO API that sensor.py uses (setmode,
+setup, output, input, add_event_detect, remove_event_detect, cleanup).
+A falling edge on the TRIG pin schedules an echo pulse whose width matches
+``distance_cm`` at the configured temperature; input() reports the ECHO level
+from that schedule and edge callbacks fire from a background thread, just
+like RPi.GPIO's event thread.
+
+With ``virtual_clock=True`` the fake also owns time: clock() returns a
+``time``-like object (sleep, monotonic, perf_counter_ns) to patch into the
+module under test, every input() call advances the clock by ``poll_cost_ns``
+and edge callbacks fire synchronously at their exact edge times.  That makes
+accuracy checks deterministic on loaded or single-core machines, and the
+input() call count is a direct measure of how much a backend spins.
+
+Used by the tests to check echo-timing accuracy and reader CPU usage of both
+echo backends without a Pi.  Install it with::
+
+    fake = FakeJSNSR04GPIO(trig_pin=23, echo_pin=24, distance_cm=120.0)
+    sys.modules["RPi.GPIO"] = fake  # plus a "RPi" package whose GPIO is fake
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+
+def _speed_of_sound_cm_s(temp_c):
+    if temp_c is None:
+        return 34300.0
+    return (331.4 + (0.606 * temp_c)) * 100.0
+
+
+class FakeJSNSR04GPIO:
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(
+        self,
+        trig_pin,
+        echo_pin,
+        distance_cm=100.0,
+        temp_c=None,
+        echo_delay_s=0.0005,
+        respond=True,
+        virtual_clock=False,
+        poll_cost_ns=2_000,
+    ):
+        self.trig_pin = trig_pin
+        self.echo_pin = echo_pin
+        self.distance_cm = distance_cm
+        self.temp_c = temp_c
+        self.echo_delay_s = echo_delay_s
+        self.respond = respond
+        self.virtual_clock = virtual_clock
+        self.poll_cost_ns = int(poll_cost_ns)
+        self.now_ns = 0
+
+        self.mode = None
+        self.levels = {}
+        self._callbacks = {}
+        self._rise_ns = None
+        self._fall_ns = None
+        self._lock = threading.Lock()
+        self.triggers = 0
+        self.input_calls = 0
+
+    # ── RPi.GPIO API ────────────────────────────────────────────────────────
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def getmode(self):
+        return self.mode
+
+    def setwarnings(self, _flag):
+        pass
+
+    def setup(self, pin, direction, **_kwargs):
+        self.levels.setdefault(pin, self.LOW)
+
+    def output(self, pin, value):
+        value = self.HIGH if value else self.LOW
+        previous = self.levels.get(pin, self.LOW)
+        self.levels[pin] = value
+        if pin == self.trig_pin and previous == self.HIGH and value == self.LOW:
+            self._trigger()
+
+    def input(self, pin):
+        self.input_calls += 1
+        if self.virtual_clock:
+            self.now_ns += self.poll_cost_ns
+        if pin != self.echo_pin:
+            return self.levels.get(pin, self.LOW)
+        now = self._now_ns()
+        with self._lock:
+            rise, fall = self._rise_ns, self._fall_ns
+        return self.HIGH if rise is not None and rise <= now < fall else self.LOW
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        if pin in self._callbacks:
+            raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+        self._callbacks[pin] = (edge, [callback] if callback else [])
+
+    def add_event_callback(self, pin, callback):
+        self._callbacks[pin][1].append(callback)
+
+    def remove_event_detect(self, pin):
+        self._callbacks.pop(pin, None)
+
+    def cleanup(self, *_args):
+        self._callbacks.clear()
+
+    # ── Clock ───────────────────────────────────────────────────────────────
+
+    def _now_ns(self):
+        return self.now_ns if self.virtual_clock else time.perf_counter_ns()
+
+    def _sleep(self, seconds):
+        if self.virtual_clock:
+            self.now_ns += int(max(0.0, seconds) * 1e9)
+        else:
+            time.sleep(seconds)
+
+    def clock(self):
+        """Return a ``time``-like namespace driven by this fake's clock."""
+        return SimpleNamespace(
+            sleep=self._sleep,
+            monotonic=lambda: self._now_ns() / 1e9,
+            perf_counter_ns=self._now_ns,
+            perf_counter=lambda: self._now_ns() / 1e9,
+        )
+
+    # ── Simulation ──────────────────────────────────────────────────────────
+
+    @property
+    def pulse_s(self):
+        return 2.0 * self.distance_cm / _speed_of_sound_cm_s(self.temp_c)
+
+    def _trigger(self):
+        self.triggers += 1
+        if not self.respond:
+            return
+        rise = self._now_ns() + int(self.echo_delay_s * 1e9)
+        fall = rise + int(self.pulse_s * 1e9)
+        with self._lock:
+            self._rise_ns, self._fall_ns = rise, fall
+        if self.echo_pin not in self._callbacks:
+            return  # input() answers from the schedule; no edges to deliver
+        if self.virtual_clock:
+            self._fire_edges(rise, fall)
+        else:
+            # Sleep rather than spin so the fake does not compete with the
+            # reader for the CPU on single-core boards.
+            threading.Thread(target=self._fire_edges, args=(rise, fall), daemon=True).start()
+
+    def _fire_edges(self, rise, fall):
+        for deadline, edge in ((rise, self.RISING), (fall, self.FALLING)):
+            if self.virtual_clock:
+                self.now_ns = max(self.now_ns, deadline)
+            else:
+                time.sleep(max(0, deadline - time.perf_counter_ns()) / 1e9)
+            registered = self._callbacks.get(self.echo_pin)
+            if registered is None:
+                continue
+            wanted, callbacks = registered
+            if wanted in (edge, self.BOTH):
+                for callback in callbacks:
+                    callback(self.echo_pin)
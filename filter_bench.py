@@ -0,0 +1,134 @@
+"""
+WaterLevelFilter throughput benchmark: incremental window vs. full recompute.
+
+Replays a synthetic sensor trace (slow drift, noise, spikes, dropouts,
+out-of-range echoes and a sustained level step that forces a rebaseline)
+through:
+  1. ReferenceWaterLevelFilter — the original implementation that re-runs
+     statistics.median twice and sum() over the whole window per sample;
+  2. WaterLevelFilter — backed by sliding_window.SlidingMedianWindow.
+
+Both filters must produce the same statuses and (to float rounding) the
+same filtered values; the benchmark checks this before timing.
+
+Usage:
+    python filter_bench.py                       # windows 7 … 6000
+    python filter_bench.py --windows 7 600 --samples 50000
+"""
+
+import argparse
+import math
+import random
+import statistics
+import time
+from collections import deque
+
+from water_level_filter import WaterLevelFilter
+
+DEFAULT_PARAMS = {
+    "enabled": True,
+    "min_valid_samples": 3,
+    "min_cm": 0.0,
+    "max_cm": 400.0,
+    "modz_threshold": 3.5,
+    "zero_mad_tolerance_cm": 1.0,
+    "rebaseline_outlier_streak": 5,
+    "rebaseline_spread_max_cm": 8.0,
+}
+
+
+class _ReferenceWindow(deque):
+    """deque with the original O(n log n) statistics."""
+
+    def median(self):
+        return statistics.median(self)
+
+    def mad(self, median):
+        return statistics.median([abs(x - median) for x in self])
+
+    def mean(self):
+        return sum(self) / len(self)
+
+
+class ReferenceWaterLevelFilter(WaterLevelFilter):
+    """WaterLevelFilter with the original full-recompute window statistics."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._history = _ReferenceWindow(maxlen=self.window_size)
+
+
+def synthetic_trace(n, seed=0):
+    """Return *n* raw readings resembling a recorded JSN-SR04 trace."""
+    rng = random.Random(seed)
+    level = 150.0
+    trace = []
+    for i in range(n):
+        level += rng.gauss(0.0, 0.02)
+        if i == n // 2:
+            level -= 40.0  # sustained rise in water → rebaseline
+        roll = rng.random()
+        if roll < 0.01:
+            trace.append(None)  # echo timeout
+        elif roll < 0.015:
+            trace.append(rng.choice([0.0, 450.0, -1.0]))  # out of range
+        elif roll < 0.04:
+            trace.append(round(level + rng.choice([-1, 1]) * rng.uniform(20.0, 80.0), 2))  # spike
+        elif roll < 0.05:
+            trace.append(round(level, 2))  # quantised repeat (zero-MAD windows)
+        else:
+            trace.append(round(level + rng.gauss(0.0, 0.4), 2))
+    return trace
+
+
+def outputs_match(expected, actual, rel_tol=1e-9, abs_tol=1e-9):
+    """Compare two lists of (value, status) allowing float-rounding differences."""
+    if len(expected) != len(actual):
+        return False
+    for (ev, es), (av, as_) in zip(expected, actual):
+        if es != as_:
+            return False
+        if (ev is None) != (av is None):
+            return False
+        if ev is not None and not math.isclose(ev, av, rel_tol=rel_tol, abs_tol=abs_tol):
+            return False
+    return True
+
+
+def _run(filter_cls, trace, window_size, max_seconds=None):
+    f = filter_cls(window_size=window_size, **DEFAULT_PARAMS)
+    outputs = []
+    t0 = time.perf_counter()
+    for raw in trace:
+        outputs.append(f.process(raw))
+        if max_seconds is not None and len(outputs) % 256 == 0 and time.perf_counter() - t0 > max_seconds:
+            break
+    return outputs, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WaterLevelFilter window statistics")
+    parser.add_argument("--windows", type=int, nargs="+", default=[7, 60, 300, 600, 1800, 6000])
+    parser.add_argument("--samples", type=int, default=30000, help="Trace length per window size")
+    parser.add_argument(
+        "--reference-budget-s", type=float, default=5.0,
+        help="Stop the slow reference run after this many seconds (default: 5)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'window':>7}  {'reference/s':>12}  {'incremental/s':>14}  {'speed-up':>8}  outputs")
+    for window in args.windows:
+        trace = synthetic_trace(args.samples + window, seed=window)
+        ref_out, ref_s = _run(ReferenceWaterLevelFilter, trace, window, args.reference_budget_s)
+        new_out, new_s = _run(WaterLevelFilter, trace, window)
+        same = outputs_match(ref_out, new_out[: len(ref_out)])
+        ref_rate = len(ref_out) / ref_s
+        new_rate = len(new_out) / new_s
+        print(
+            f"{window:>7}  {ref_rate:>12,.0f}  {new_rate:>14,.0f}  {new_rate / ref_rate:>7.1f}×  "
+            f"{'identical' if same else 'MISMATCH'} ({len(ref_out):,} compared)"
+        )
+
+
+if __name__ == "__main__":
+    main()
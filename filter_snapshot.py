@@ -0,0 +1,86 @@
+"""Save and restore sensor filter state across restarts.
+
+A fresh WaterLevelFilter / LevelTracker needs several readings before its
+outlier rejection is active, so a restart (or crash) right before a spike
+lets the spike through.  save_snapshot() writes the filter's state to a small
+binary file and load_snapshot() puts it back at startup if the file is
+recent enough.
+
+File layout (little-endian):
+
+    header   4s magic, B version, d saved_at (Unix time)
+    payload  filter-specific, from ``filt.snapshot_state()``
+    trailer  I CRC-32 of header + payload
+
+The magic identifies the filter class (``filt.SNAPSHOT_MAGIC``), so a
+snapshot from the other filter mode is ignored rather than misread.  Files
+are written to a temporary name, fsynced and renamed over the old snapshot,
+so a power cut leaves either the old or the new file, never a torn one.
+"""
+
+import logging
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sBd")
+_TRAILER = struct.Struct("<I")
+
+
+def save_snapshot(filt, path):
+    """Atomically write *filt*'s state to *path*."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    body = _HEADER.pack(filt.SNAPSHOT_MAGIC, SNAPSHOT_VERSION, time.time()) + filt.snapshot_state()
+    data = body + _TRAILER.pack(zlib.crc32(body))
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load_snapshot(filt, path, max_age_s):
+    """Restore *filt* from *path*; return True on success.
+
+    Missing, corrupt, foreign (other filter class / version) or stale (older
+    than *max_age_s* seconds) snapshots are logged and ignored, leaving the
+    filter cold.
+    """
+    try:
+        data = Path(path).read_bytes()
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning(f"[FILTER] Cannot read snapshot {path}: {e}")
+        return False
+
+    if len(data) < _HEADER.size + _TRAILER.size:
+        logger.warning(f"[FILTER] Ignoring truncated snapshot {path}")
+        return False
+    body, (crc,) = data[: -_TRAILER.size], _TRAILER.unpack(data[-_TRAILER.size:])
+    if zlib.crc32(body) != crc:
+        logger.warning(f"[FILTER] Ignoring corrupt snapshot {path} (CRC mismatch)")
+        return False
+    magic, version, saved_at = _HEADER.unpack_from(body)
+    if magic != filt.SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        logger.info(f"[FILTER] Ignoring snapshot {path} from another filter mode/version ({magic!r} v{version})")
+        return False
+    age_s = max(0.0, time.time() - saved_at)
+    if age_s > max_age_s:
+        logger.info(f"[FILTER] Ignoring stale snapshot {path} ({age_s:.0f}s old > {max_age_s:.0f}s)")
+        return False
+
+    try:
+        filt.restore_state(body[_HEADER.size:], age_s)
+    except (struct.error, ValueError) as e:
+        logger.warning(f"[FILTER] Ignoring unreadable snapshot {path}: {e}")
+        return False
+    return True
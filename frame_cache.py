@@ -0,0 +1,103 @@
+"""In-memory cache of static frames for test-image / training playback.
+
+With USE_TEST_IMAGES (or the training sources) main.camera_loop serves the
+same few JPEGs over and over, and every consumer — quality gate, Cloudinary
+upload, WebSocket send — used to read each one from disk.  StaticFrameCache
+reads a file once and keeps its encoded bytes and quality metrics under a
+byte budget with LRU eviction.  Consumers only ever need the JPEG (upload,
+WebSocket) and the metrics (quality gate), so decoded arrays are not kept.
+
+Entries are keyed by absolute path and revalidated with one stat per
+lookup, so a file replaced on disk is reloaded rather than served stale.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class CachedFrame:
+    """One cached file: encoded bytes plus the metrics derived from them."""
+
+    jpeg: bytes
+    metrics: dict | None = None
+
+    @property
+    def nbytes(self):
+        return len(self.jpeg)
+
+
+class StaticFrameCache:
+    """Byte-budgeted LRU of CachedFrame entries.
+
+    *metrics_fn* (e.g. frame_quality.get_frame_quality_metrics) runs once
+    per load, on the encoded bytes.  Frames larger than the whole budget are returned but not
+    cached.
+    """
+
+    def __init__(self, max_bytes, metrics_fn=None):
+        self.max_bytes = max(0, int(max_bytes))
+        self.metrics_fn = metrics_fn
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()  # abspath → (identity, CachedFrame)
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the CachedFrame for *path*, loading it on a miss.
+
+        Raises OSError if the file cannot be read.
+        """
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        identity = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == identity:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        frame = self._load(key)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1].nbytes
+            if frame.nbytes <= self.max_bytes:
+                self._entries[key] = (identity, frame)
+                self._bytes += frame.nbytes
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+                    self.evictions += 1
+        return frame
+
+    def _load(self, path):
+        with open(path, "rb") as fh:
+            jpeg = fh.read()
+        metrics = self.metrics_fn(jpeg) if self.metrics_fn is not None else None
+        return CachedFrame(jpeg=jpeg, metrics=metrics)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,262 @@
+"""Concurrent fan-out of camera frames to the Cloudinary and WebSocket sinks.
+
+camera_loop used to upload a frame to Cloudinary and only then push it over
+the WebSocket, so every frame paid for both round trips back to back and a
+slow Cloudinary throttled the live stream.  FrameFanout hands each frame to
+two independent lanes instead:
+
+  * the WebSocket lane (one worker — sends share one connection anyway);
+  * the upload lane (``upload_workers`` workers).
+
+Each lane holds at most ``max_in_flight`` frames (queued + running).  When a
+lane is full the oldest *queued* frame is dropped from that lane, so a
+backed-up Cloudinary sheds old uploads while the stream keeps its rate.
+
+If the upload finishes before the WebSocket send starts, the Cloudinary URL
+goes out in the frame metadata as before.  Otherwise it is delivered as a
+follow-up text message once both sinks are done, so it always trails the
+image on the wire.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class FrameJob:
+    """One frame travelling through the fan-out, plus per-sink results.
+
+    ``upload_ok`` / ``ws_ok`` are None when that sink was disabled or the
+    frame was dropped from its lane, otherwise True/False.
+    """
+
+    def __init__(self, image, filename, metadata=None):
+        self.image = image
+        self.filename = filename
+        self.metadata = dict(metadata or {})
+        self.submitted_at = time.monotonic()
+        self.captured_at = time.time()  # wall clock, for spooling / replay order
+        self.cloudinary_url = None
+        self.url_in_metadata = False
+        self.upload_ok = None
+        self.ws_ok = None
+        self.upload_dropped = False
+        self.ws_dropped = False
+        self._lock = threading.Lock()
+        self._remaining = 0
+
+    @property
+    def latency_ms(self):
+        return (time.monotonic() - self.submitted_at) * 1000.0
+
+
+class _SinkLane:
+    """Bounded drop-oldest queue drained by a fixed set of worker threads."""
+
+    def __init__(self, name, run, workers, max_in_flight, on_dropped):
+        self.name = name
+        self._run_job = run
+        self._on_dropped = on_dropped
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._queue = deque()
+        self._running = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"fanout_{name}_{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        self.dropped = 0
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job):
+        dropped = None
+        with self._cond:
+            if len(self._queue) + self._running >= self.max_in_flight:
+                if self._queue:
+                    dropped = self._queue.popleft()
+                else:
+                    dropped = job
+                self.dropped += 1
+            if dropped is not job:
+                self._queue.append(job)
+                self._cond.notify()
+        if dropped is not None:
+            self._on_dropped(self.name, dropped)
+
+    @property
+    def in_flight(self):
+        with self._cond:
+            return len(self._queue) + self._running
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop.is_set():
+                    self._cond.wait(0.5)
+                if not self._queue:
+                    return
+                job = self._queue.popleft()
+                self._running += 1
+            try:
+                self._run_job(job)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+    def stop(self, timeout):
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            while (self._queue or self._running) and time.monotonic() < deadline:
+                self._cond.wait(max(0.01, deadline - time.monotonic()))
+            self._stop.set()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=max(0.1, deadline - time.monotonic()))
+
+
+class FrameFanout:
+    """Run the upload and WebSocket sinks for each frame concurrently.
+
+    Callables:
+      ``upload(job) -> url | None``;
+      ``send(job, cloudinary_url) -> bool``;
+      ``follow_up(job) -> bool`` sends ``job.cloudinary_url`` after the image;
+      ``on_complete(job)`` runs once both sinks are finished or dropped.
+    Pass None for a disabled sink.
+    """
+
+    def __init__(
+        self,
+        upload=None,
+        send=None,
+        follow_up=None,
+        on_complete=None,
+        max_in_flight=4,
+        upload_workers=2,
+    ):
+        self._upload = upload
+        self._send = send
+        self._follow_up = follow_up
+        self._on_complete = on_complete
+        self._upload_lane = (
+            _SinkLane("upload", self._run_upload, upload_workers, max_in_flight, self._dropped)
+            if upload is not None
+            else None
+        )
+        self._ws_lane = (
+            _SinkLane("websocket", self._run_send, 1, max_in_flight, self._dropped)
+            if send is not None
+            else None
+        )
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.follow_ups = 0
+
+    def start(self):
+        for lane in (self._upload_lane, self._ws_lane):
+            if lane is not None:
+                lane.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Let queued work finish for up to *timeout* seconds, then stop workers."""
+        for lane in (self._ws_lane, self._upload_lane):
+            if lane is not None:
+                lane.stop(timeout)
+
+    def submit(self, image, filename, metadata=None):
+        """Queue a frame on every enabled sink; never blocks on the network."""
+        job = FrameJob(image, filename, metadata)
+        lanes = [lane for lane in (self._upload_lane, self._ws_lane) if lane is not None]
+        job._remaining = len(lanes)
+        with self._stats_lock:
+            self.submitted += 1
+        if not lanes:
+            self._complete(job)
+            return job
+        for lane in lanes:
+            lane.submit(job)
+        return job
+
+    # ── Sink runners ────────────────────────────────────────────────────────
+
+    def _run_upload(self, job):
+        try:
+            url = self._upload(job)
+        except Exception as e:
+            logger.error(f"[CAMERA] Upload failed for {job.filename}: {e}")
+            url = None
+        with job._lock:
+            job.cloudinary_url = url
+            job.upload_ok = url is not None
+        self._finish_one(job)
+
+    def _run_send(self, job):
+        with job._lock:
+            url = job.cloudinary_url
+            job.url_in_metadata = url is not None
+        try:
+            ok = bool(self._send(job, url))
+        except Exception as e:
+            logger.error(f"[CAMERA] WebSocket send failed for {job.filename}: {e}")
+            ok = False
+        with job._lock:
+            job.ws_ok = ok
+        self._finish_one(job)
+
+    def _dropped(self, lane_name, job):
+        with job._lock:
+            if lane_name == "upload":
+                job.upload_dropped = True
+            else:
+                job.ws_dropped = True
+        logger.warning(f"[CAMERA] {lane_name} backlog full — dropped frame {job.filename}")
+        self._finish_one(job)
+
+    def _finish_one(self, job):
+        with job._lock:
+            job._remaining -= 1
+            done = job._remaining == 0
+        if done:
+            self._complete(job)
+
+    def _complete(self, job):
+        if (
+            self._follow_up is not None
+            and job.ws_ok
+            and job.cloudinary_url
+            and not job.url_in_metadata
+        ):
+            try:
+                if self._follow_up(job):
+                    with self._stats_lock:
+                        self.follow_ups += 1
+            except Exception as e:
+                logger.error(f"[CAMERA] URL follow-up failed for {job.filename}: {e}")
+        with self._stats_lock:
+            self.completed += 1
+        if self._on_complete is not None:
+            try:
+                self._on_complete(job)
+            except Exception as e:
+                logger.error(f"[CAMERA] Frame completion handler failed: {e}")
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "follow_ups": self.follow_ups,
+            "upload_in_flight": self._upload_lane.in_flight if self._upload_lane else 0,
+            "upload_dropped": self._upload_lane.dropped if self._upload_lane else 0,
+            "ws_in_flight": self._ws_lane.in_flight if self._ws_lane else 0,
+            "ws_dropped": self._ws_lane.dropped if self._ws_lane else 0,
+        }
@@ -0,0 +1,122 @@
+"""Single-decode, single-encode frame post-processing.
+
+A FramePipeline runs an ordered list of stages (crop, CLAHE, metrics, ...)
+over one decoded NumPy frame and encodes the result to JPEG exactly once,
+returning the quality metrics alongside the bytes.  This replaces the old
+read → modify → re-encode round trip that each post-processing step did on
+the captured file.
+
+Stages are plain callables ``stage(frame, ctx) -> frame``.  Transform
+stages return a new (or sliced) frame; observer stages such as
+MetricsStage record results in *ctx* and return the frame unchanged.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from frame_quality import get_frame_quality_metrics
+
+try:
+    import cv2  # type: ignore
+except ImportError:
+    cv2 = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@dataclass(frozen=True)
+class ProcessedFrame:
+    """Result of one pipeline run: encoded JPEG plus anything stages recorded."""
+
+    jpeg: bytes
+    metrics: dict | None = None
+    width: int = 0
+    height: int = 0
+    timings_ms: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class RejectedFrame:
+    """A frame dropped by the quality gate before it was encoded."""
+
+    metrics: dict | None = None
+
+
+class TransformStage:
+    """Wrap a ``fn(frame) -> frame`` function as a named pipeline stage."""
+
+    def __init__(self, name, fn):
+        self.name = name
+        self._fn = fn
+
+    def __call__(self, frame, ctx):
+        return self._fn(frame)
+
+
+class MetricsStage:
+    """Compute brightness/contrast/sharpness on the in-memory frame (no decode)."""
+
+    name = "metrics"
+
+    def __call__(self, frame, ctx):
+        ctx["metrics"] = get_frame_quality_metrics(frame)
+        return frame
+
+
+class FramePipeline:
+    """Run stages over a decoded frame, then encode it to JPEG once."""
+
+    def __init__(self, stages=(), jpeg_quality=95):
+        self.stages = list(stages)
+        self.jpeg_quality = int(jpeg_quality)
+
+    def _encode(self, frame) -> bytes:
+        if cv2 is None:
+            raise ImportError("cv2 is required to encode frames")
+        ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            raise RuntimeError("cv2.imencode failed to encode frame")
+        return buf.tobytes()
+
+    def process(self, frame, encoded=None) -> ProcessedFrame:
+        """Run every stage over *frame* and return the encoded result.
+
+        When *encoded* (the JPEG the frame was decoded from) is given and no
+        stage replaced the frame, those bytes are returned as-is instead of
+        being re-encoded, avoiding generation loss.
+        """
+        ctx = {}
+        timings_ms = {}
+        out = frame
+        for stage in self.stages:
+            t0 = time.perf_counter()
+            out = stage(out, ctx)
+            timings_ms[getattr(stage, "name", type(stage).__name__)] = (time.perf_counter() - t0) * 1000.0
+
+        t0 = time.perf_counter()
+        if encoded is not None and out is frame:
+            jpeg = bytes(encoded)
+        else:
+            jpeg = self._encode(out)
+        timings_ms["encode"] = (time.perf_counter() - t0) * 1000.0
+
+        height, width = out.shape[:2]
+        return ProcessedFrame(
+            jpeg=jpeg,
+            metrics=ctx.get("metrics"),
+            width=int(width),
+            height=int(height),
+            timings_ms=timings_ms,
+        )
+
+    def process_bytes(self, data) -> ProcessedFrame:
+        """Decode an encoded frame once, then run the pipeline over it."""
+        if cv2 is None or np is None:
+            raise ImportError("cv2 and numpy are required to decode frames")
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Unable to decode frame buffer")
+        return self.process(frame, encoded=data)
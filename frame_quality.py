@@ -1,8 +1,13 @@
 import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
 
 from config import (
     FRAME_QUALITY_CHECK_ENABLED,
     FRAME_QUALITY_MAX_BRIGHTNESS,
+    FRAME_QUALITY_METRICS_CACHE_SIZE,
     FRAME_QUALITY_MIN_BRIGHTNESS,
     FRAME_QUALITY_MIN_CONTRAST_STDDEV,
     FRAME_QUALITY_MIN_LAPLACIAN_VAR,
@@ -17,6 +22,112 @@ try:
 except ImportError:
     cv2 = None
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _is_buffer(image):
+    return isinstance(image, (bytes, bytearray, memoryview))
+
+
+def _is_array(image):
+    return hasattr(image, "shape") and hasattr(image, "ndim")
+
+
+def _image_available(image):
+    """Return True if *image* is a non-empty buffer/array or an existing path."""
+    if image is None:
+        return False
+    if _is_buffer(image):
+        return len(image) > 0
+    if _is_array(image):
+        return image.size > 0
+    return bool(image) and os.path.exists(image)
+
+
+def _load_gray(image):
+    """Return a grayscale array for a path, encoded buffer, or decoded frame."""
+    if _is_buffer(image):
+        if np is None:
+            return None
+        return cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if _is_array(image):
+        if image.ndim == 3:
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+    return cv2.imread(os.fspath(image), cv2.IMREAD_GRAYSCALE)
+
+
+class MetricsCache:
+    """Bounded LRU cache of frame metrics keyed by file identity.
+
+    Keys combine the absolute path with the file's mtime and size, so an
+    overwritten file is re-evaluated while an unchanged one is served from
+    memory.  Hit/miss counters are kept for soak-test verification.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max(0, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(path, resize_width):
+        """Return the identity key for *path*, or None if it cannot be stat'ed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size, resize_width)
+
+    def get(self, key):
+        with self._lock:
+            metrics = self._entries.get(key)
+            if metrics is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(metrics)
+
+    def put(self, key, metrics):
+        if self.max_entries == 0 or metrics is None:
+            return
+        with self._lock:
+            self._entries[key] = dict(metrics)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+metrics_cache = MetricsCache(FRAME_QUALITY_METRICS_CACHE_SIZE)
+
+
+def get_metrics_cache_stats():
+    """Return hit/miss counters for the per-file metrics cache."""
+    return metrics_cache.stats()
+
 
 def _resize_for_speed(gray):
     """Downscale before metrics to keep CPU usage low on Pi Zero-class hardware."""
@@ -32,15 +143,28 @@ def _resize_for_speed(gray):
     return cv2.resize(gray, (FRAME_QUALITY_RESIZE_WIDTH, height), interpolation=cv2.INTER_AREA)
 
 
-def get_frame_quality_metrics(image_path):
-    """Return brightness/contrast/sharpness metrics for an image path, or None if unreadable."""
-    if not image_path or not os.path.exists(image_path):
+def get_frame_quality_metrics(image):
+    """Return brightness/contrast/sharpness metrics, or None if unreadable.
+
+    *image* may be a file path, an encoded JPEG buffer (bytes), or an
+    already-decoded NumPy frame (BGR or grayscale); buffers and arrays are
+    evaluated in memory without touching the filesystem.
+    """
+    if not _image_available(image):
         return None
 
     if cv2 is None:
         return None
 
-    gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    cache_key = None
+    if metrics_cache.max_entries and not (_is_buffer(image) or _is_array(image)):
+        cache_key = MetricsCache.key_for(image, FRAME_QUALITY_RESIZE_WIDTH)
+        if cache_key is not None:
+            cached = metrics_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+    gray = _load_gray(image)
     if gray is None or gray.size == 0:
         return None
 
@@ -51,47 +175,63 @@ def get_frame_quality_metrics(image_path):
     contrast_stddev = float(stddev[0][0])
     laplacian_var = float(cv2.Laplacian(gray, cv2.CV_64F).var())
 
-    return {
+    metrics = {
         "brightness": brightness,
         "contrast_stddev": contrast_stddev,
         "laplacian_var": laplacian_var,
     }
+    if cache_key is not None:
+        metrics_cache.put(cache_key, metrics)
+    return metrics
 
 
-def are_metrics_usable(metrics):
-    """Evaluate whether computed metrics satisfy current configured thresholds."""
+def failed_thresholds(metrics):
+    """Return the names of the configured thresholds that *metrics* fail."""
     if metrics is None:
-        return False
+        return ("unreadable",)
 
     brightness = float(metrics["brightness"])
     contrast_stddev = float(metrics["contrast_stddev"])
     laplacian_var = float(metrics["laplacian_var"])
 
+    failed = []
     if brightness < FRAME_QUALITY_MIN_BRIGHTNESS:
-        return False
+        failed.append("min_brightness")
     if brightness > FRAME_QUALITY_MAX_BRIGHTNESS:
-        return False
+        failed.append("max_brightness")
     if contrast_stddev < FRAME_QUALITY_MIN_CONTRAST_STDDEV:
-        return False
+        failed.append("min_contrast_stddev")
     if laplacian_var < FRAME_QUALITY_MIN_LAPLACIAN_VAR:
-        return False
+        failed.append("min_laplacian_var")
+    return tuple(failed)
+
 
-    return True
+def are_metrics_usable(metrics):
+    """Evaluate whether computed metrics satisfy current configured thresholds."""
+    return not failed_thresholds(metrics)
 
 
-def is_frame_usable(image_path):
-    """Return True when frame passes basic brightness, contrast, and sharpness checks."""
+def is_frame_usable(image, metrics=None):
+    """Return True when frame passes basic brightness, contrast, and sharpness checks.
+
+    Accepts the same path / buffer / array inputs as get_frame_quality_metrics().
+    Pass already-computed *metrics* (e.g. from a FramePipeline) to skip
+    decoding the frame again.
+    """
     if not FRAME_QUALITY_CHECK_ENABLED:
         return True
 
-    if not image_path or not os.path.exists(image_path):
+    if metrics is not None:
+        return are_metrics_usable(metrics)
+
+    if not _image_available(image):
         return False
 
     if cv2 is None:
         # Keep pipeline operational when OpenCV is unavailable.
         return True
 
-    metrics = get_frame_quality_metrics(image_path)
+    metrics = get_frame_quality_metrics(image)
     return are_metrics_usable(metrics)
 
 
@@ -121,3 +261,50 @@ def is_frame_obscured(metrics):
         float(metrics["contrast_stddev"]) < ENV_SENSE_OBSCURED_CONTRAST_MAX
         and float(metrics["laplacian_var"]) < ENV_SENSE_OBSCURED_LAPLACIAN_MAX
     )
+
+
+@dataclass(frozen=True)
+class FrameVerdict:
+    """Immutable outcome of evaluate_frame(): metrics, flags and failed thresholds."""
+
+    metrics: MappingProxyType | None
+    usable: bool
+    dark: bool
+    obscured: bool
+    failed_thresholds: tuple = ()
+
+
+def evaluate_frame(image=None, metrics=None):
+    """Evaluate a frame once and return a FrameVerdict.
+
+    *image* may be a path, an encoded buffer, or a decoded array; it is
+    decoded at most once (and not at all when *metrics* are supplied, e.g.
+    from a FramePipeline or the lores stream).  ``usable`` follows the same
+    rules as is_frame_usable(): always True when the quality check is
+    disabled or OpenCV is unavailable.  ``failed_thresholds`` names every
+    threshold the frame misses, regardless of whether the gate is enforced.
+    """
+    if metrics is None and _image_available(image):
+        metrics = get_frame_quality_metrics(image)
+
+    if metrics is None:
+        readable = cv2 is None and _image_available(image)
+        failed = () if readable else ("unreadable",)
+    else:
+        failed = failed_thresholds(metrics)
+
+    if not FRAME_QUALITY_CHECK_ENABLED:
+        usable = True
+    elif metrics is None:
+        # Keep pipeline operational when OpenCV is unavailable.
+        usable = cv2 is None and _image_available(image)
+    else:
+        usable = not failed
+
+    return FrameVerdict(
+        metrics=MappingProxyType(dict(metrics)) if metrics is not None else None,
+        usable=usable,
+        dark=is_frame_dark(metrics),
+        obscured=is_frame_obscured(metrics),
+        failed_thresholds=failed,
+    )
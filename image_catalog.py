@@ -0,0 +1,176 @@
+"""Change-aware index of the static / mock image folders.
+
+An ImageCatalog holds, per labelled source directory, the sorted list of
+images below it and a round-robin cursor.  Each directory is listed once
+with os.scandir; later refreshes stat every known directory and re-list
+only those whose mtime changed (adding or removing an entry updates the
+mtime of the directory that holds it).  A refresh therefore costs one stat
+per directory however many files the training folders accumulate, and new
+captures from training_capture.py / burst_capture.py show up on the next
+refresh without a restart.
+
+Images are ordered by their lower-cased path relative to the source
+directory, as the old rglob-and-sort loaders did.  When the list changes,
+the cursor resumes after the last image served.
+"""
+
+import bisect
+import os
+import threading
+import time
+from pathlib import Path
+
+IMAGE_SUFFIXES = frozenset({".jpg", ".jpeg", ".png"})
+
+# A directory modified this recently may change again within the same mtime
+# tick (2 s on FAT), so it is re-listed on every refresh until it settles.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+class _DirListing:
+    __slots__ = ("mtime_ns", "racy", "files", "subdirs")
+
+    def __init__(self, mtime_ns, racy, files, subdirs):
+        self.mtime_ns = mtime_ns
+        self.racy = racy
+        self.files = files
+        self.subdirs = subdirs
+
+
+class _SourceIndex:
+    """Images below one directory plus the round-robin cursor over them."""
+
+    def __init__(self, directory):
+        self.root = Path(directory)
+        self._dirs = {}  # relative dir ("" for the root) → _DirListing
+        self.keys = []
+        self.paths = []
+        self._cursor = 0
+        self._last_key = None
+        self.scans = 0
+
+    def refresh(self):
+        """Re-list changed directories; return True if the image list changed."""
+        seen = set()
+        changed = self._sync("", seen)
+        for rel in [rel for rel in self._dirs if rel not in seen]:
+            del self._dirs[rel]
+            changed = True
+        if changed:
+            self._rebuild()
+        return changed
+
+    def _sync(self, rel, seen):
+        full = os.path.join(self.root, rel) if rel else str(self.root)
+        try:
+            mtime_ns = os.stat(full).st_mtime_ns
+        except OSError:
+            return False  # gone (or never there); dropped by refresh()
+        seen.add(rel)
+        listing = self._dirs.get(rel)
+        changed = False
+        if listing is None or listing.racy or listing.mtime_ns != mtime_ns:
+            files, subdirs = self._scan(full)
+            changed = listing is None or files != listing.files
+            listing = _DirListing(mtime_ns, time.time_ns() - mtime_ns < _RACY_WINDOW_NS, files, subdirs)
+            self._dirs[rel] = listing
+        for name in listing.subdirs:
+            changed |= self._sync(os.path.join(rel, name) if rel else name, seen)
+        return changed
+
+    def _scan(self, full):
+        self.scans += 1
+        files, subdirs = [], []
+        try:
+            with os.scandir(full) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif os.path.splitext(entry.name)[1].lower() in IMAGE_SUFFIXES and entry.is_file():
+                        files.append(entry.name)
+        except OSError:
+            pass
+        files.sort()
+        subdirs.sort()
+        return files, subdirs
+
+    def _rebuild(self):
+        indexed = sorted(
+            (Path(rel, name).as_posix().lower(), self.root / rel / name)
+            for rel, listing in self._dirs.items()
+            for name in listing.files
+        )
+        self.keys = [key for key, _ in indexed]
+        self.paths = [path for _, path in indexed]
+        if self._last_key is not None:
+            self._cursor = bisect.bisect_right(self.keys, self._last_key)
+
+    def next(self):
+        if not self.paths:
+            return None
+        i = self._cursor % len(self.paths)
+        self._cursor = i + 1
+        self._last_key = self.keys[i]
+        return self.paths[i]
+
+
+class ImageCatalog:
+    """Round-robin image supply over ordered (label, directory) sources.
+
+    next_image() takes the next image from the next non-empty source in
+    turn; next_from() draws from one source.  Directories are re-checked at
+    most every *refresh_interval_s* seconds (0 = on every call).
+    Thread-safe.
+    """
+
+    def __init__(self, sources, refresh_interval_s=1.0):
+        self.sources = list(sources)
+        self.refresh_interval_s = max(0.0, float(refresh_interval_s))
+        self._index = {label: _SourceIndex(directory) for label, directory in self.sources}
+        self._lock = threading.Lock()
+        self._next_source = 0
+        self._refreshed_at = None
+
+    def refresh(self, force=False):
+        """Pick up added/removed images; return True if any list changed."""
+        with self._lock:
+            return self._refresh(force)
+
+    def _refresh(self, force):
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval_s:
+            return False
+        self._refreshed_at = now
+        changed = False
+        for index in self._index.values():
+            changed |= index.refresh()
+        return changed
+
+    def count(self, label):
+        with self._lock:
+            self._refresh(False)
+            return len(self._index[label].paths)
+
+    def images(self, label):
+        """Current sorted image paths of *label* (a copy)."""
+        with self._lock:
+            self._refresh(False)
+            return list(self._index[label].paths)
+
+    def next_from(self, label):
+        """Next image path of *label* in round-robin order, or None."""
+        with self._lock:
+            self._refresh(False)
+            return self._index[label].next()
+
+    def next_image(self):
+        """Return the next (label, path) across sources, or (None, None)."""
+        with self._lock:
+            self._refresh(False)
+            for _ in range(len(self.sources)):
+                label, _ = self.sources[self._next_source % len(self.sources)]
+                self._next_source += 1
+                path = self._index[label].next()
+                if path is not None:
+                    return label, path
+            return None, None
@@ -0,0 +1,248 @@
+from collections import deque
+import math
+import statistics
+import struct
+import time
+from typing import NamedTuple
+
+# Velocity uncertainty of a freshly (re)initialised track, cm/s (≈ 30 cm/min).
+_INITIAL_RATE_STD_CM_S = 0.5
+# MAD → standard deviation for normally distributed ping noise.
+_MAD_TO_STD = 1.4826
+# Snapshot payload: has-track flag, distance, rate, p00, p01, p11, seconds
+# since the last update, outlier streak, buffer length (buffer values follow).
+_SNAPSHOT_STATE = struct.Struct("<B6dII")
+
+
+class LevelEstimate(NamedTuple):
+    """Tracker output at one instant.
+
+    ``covariance`` is the 2×2 state covariance ((var_d, cov), (cov, var_v)) of
+    distance (cm) and distance rate (cm/s).  The rise rate is the negated
+    distance rate in cm/min, so a rising river reads positive.
+    """
+
+    distance_cm: float
+    rise_rate_cm_min: float
+    covariance: tuple
+    timestamp: float
+
+    @property
+    def distance_std_cm(self):
+        return math.sqrt(max(0.0, self.covariance[0][0]))
+
+    @property
+    def rise_rate_std_cm_min(self):
+        return math.sqrt(max(0.0, self.covariance[1][1])) * 60.0
+
+    def time_to_distance_s(self, threshold_cm):
+        """Seconds until the level reaches *threshold_cm* at the current rate.
+
+        0 if already at or past it; ``math.inf`` if the water is not rising.
+        """
+        if self.distance_cm <= threshold_cm:
+            return 0.0
+        if self.rise_rate_cm_min <= 0:
+            return math.inf
+        return (self.distance_cm - threshold_cm) / self.rise_rate_cm_min * 60.0
+
+
+class LevelTracker:
+    """Constant-velocity Kalman filter for ultrasonic level telemetry.
+
+    Alternative to WaterLevelFilter (SENSOR_FILTER_MODE=kalman) with the same
+    ``process() -> (value, status)`` contract (outliers are reported as
+    "outlier-gate", everything else as in WaterLevelFilter), but instead of a
+    moving average — which lags a rising river by half its window — it
+    tracks distance and its rate of change, so the estimate follows a trend
+    without lag and ``estimate`` exposes the rise rate and covariance.
+
+    Processing stages:
+      1) Physical plausibility range check.
+      2) Innovation gate: a reading more than ``gate_sigma`` standard
+         deviations from the prediction is an outlier and not fused.
+      3) Kalman update.  A streak of ``rebaseline_outlier_streak`` outliers
+         that agree within ``rebaseline_spread_max_cm`` restarts the track at
+         their median (a real step change the model could not follow).
+
+    Measurement noise is ``measurement_std_cm``, or the burst's own spread
+    (``dispersion_cm``, a MAD) when that is larger.  Process noise is white
+    acceleration with standard deviation ``accel_std_cm_min2`` (cm/min²).
+    """
+
+    def __init__(
+        self,
+        enabled,
+        min_cm,
+        max_cm,
+        measurement_std_cm,
+        accel_std_cm_min2,
+        gate_sigma,
+        rebaseline_outlier_streak,
+        rebaseline_spread_max_cm,
+    ):
+        self.enabled = enabled
+        self.min_cm = float(min_cm)
+        self.max_cm = float(max_cm)
+        self.measurement_std_cm = max(1e-3, float(measurement_std_cm))
+        self.accel_std_cm_s2 = max(0.0, float(accel_std_cm_min2)) / 3600.0
+        self.gate_sigma = max(0.0, float(gate_sigma))
+        self.rebaseline_outlier_streak = max(2, int(rebaseline_outlier_streak))
+        self.rebaseline_spread_max_cm = max(0.0, float(rebaseline_spread_max_cm))
+        self._x = None  # [distance_cm, rate_cm_s]
+        self._p = None  # [[p00, p01], [p10, p11]]
+        self._t = None
+        self._outlier_streak = 0
+        self._outlier_buffer = deque(maxlen=self.rebaseline_outlier_streak)
+
+    @property
+    def estimate(self):
+        """Latest LevelEstimate, or None before the first accepted reading."""
+        if self._x is None:
+            return None
+        return self._as_estimate(self._x, self._p, self._t)
+
+    def predict(self, timestamp):
+        """Estimate extrapolated to *timestamp* without changing the track."""
+        if self._x is None:
+            return None
+        x, p = self._predicted(timestamp - self._t)
+        return self._as_estimate(x, p, timestamp)
+
+    @staticmethod
+    def _as_estimate(x, p, timestamp):
+        return LevelEstimate(
+            distance_cm=x[0],
+            rise_rate_cm_min=-x[1] * 60.0,
+            covariance=((p[0][0], p[0][1]), (p[1][0], p[1][1])),
+            timestamp=timestamp,
+        )
+
+    def _predicted(self, dt):
+        dt = max(0.0, dt)
+        d, v = self._x
+        (p00, p01), (p10, p11) = self._p
+        q = self.accel_std_cm_s2 ** 2
+        # x' = F x, P' = F P Fᵀ + Q with F = [[1, dt], [0, 1]].
+        x = [d + v * dt, v]
+        p = [
+            [
+                p00 + dt * (p10 + p01) + dt * dt * p11 + q * dt ** 4 / 4,
+                p01 + dt * p11 + q * dt ** 3 / 2,
+            ],
+            [
+                p10 + dt * p11 + q * dt ** 3 / 2,
+                p11 + q * dt * dt,
+            ],
+        ]
+        return x, p
+
+    def _start_track(self, value, timestamp, r):
+        self._x = [value, 0.0]
+        self._p = [[r, 0.0], [0.0, _INITIAL_RATE_STD_CM_S ** 2]]
+        self._t = timestamp
+        self._outlier_streak = 0
+        self._outlier_buffer.clear()
+
+    def _can_rebaseline(self):
+        if len(self._outlier_buffer) < self.rebaseline_outlier_streak:
+            return False
+        spread = max(self._outlier_buffer) - min(self._outlier_buffer)
+        return spread <= self.rebaseline_spread_max_cm
+
+    def _handle_outlier(self, value, timestamp, r):
+        self._outlier_streak += 1
+        self._outlier_buffer.append(value)
+        if self._outlier_streak >= self.rebaseline_outlier_streak and self._can_rebaseline():
+            self._start_track(statistics.median(self._outlier_buffer), timestamp, r)
+            return self._x[0], "rebaseline"
+        return None, "outlier-gate"
+
+    def process(self, raw_value, timestamp=None, dispersion_cm=None):
+        """Fuse one reading taken at *timestamp* (monotonic seconds; now if None)."""
+        if raw_value is None:
+            return None, "no-reading"
+
+        try:
+            value = float(raw_value)
+        except (TypeError, ValueError):
+            return None, "non-numeric"
+
+        if not math.isfinite(value):
+            return None, "non-finite"
+
+        if not (self.min_cm <= value <= self.max_cm):
+            self._outlier_streak = 0
+            self._outlier_buffer.clear()
+            return None, "out-of-range"
+
+        if not self.enabled:
+            return value, "bypass"
+
+        if timestamp is None:
+            timestamp = time.monotonic()
+        std = self.measurement_std_cm
+        if dispersion_cm:
+            std = max(std, _MAD_TO_STD * float(dispersion_cm))
+        r = std * std
+
+        if self._x is None:
+            self._start_track(value, timestamp, r)
+            return value, "ok"
+
+        x, p = self._predicted(timestamp - self._t)
+        innovation = value - x[0]
+        s = p[0][0] + r
+        if self.gate_sigma and innovation * innovation > self.gate_sigma ** 2 * s:
+            return self._handle_outlier(value, timestamp, r)
+
+        k0 = p[0][0] / s
+        k1 = p[1][0] / s
+        self._x = [x[0] + k0 * innovation, x[1] + k1 * innovation]
+        # P' = (I - K H) P; the off-diagonal is written once so P stays
+        # exactly symmetric.
+        cross = (1 - k0) * p[0][1]
+        self._p = [
+            [(1 - k0) * p[0][0], cross],
+            [cross, p[1][1] - k1 * p[0][1]],
+        ]
+        self._t = timestamp
+        self._outlier_streak = 0
+        self._outlier_buffer.clear()
+        return self._x[0], "ok"
+
+    # ── Snapshot (see filter_snapshot.py) ───────────────────────────────────
+
+    SNAPSHOT_MAGIC = b"WLK1"
+
+    def snapshot_state(self):
+        """Track state, covariance and outlier buffer as bytes."""
+        buffer = list(self._outlier_buffer)
+        if self._x is None:
+            track = (0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        else:
+            since_update = max(0.0, time.monotonic() - self._t)
+            track = (1, *self._x, self._p[0][0], self._p[0][1], self._p[1][1], since_update)
+        return _SNAPSHOT_STATE.pack(*track, self._outlier_streak, len(buffer)) + struct.pack(
+            f"<{len(buffer)}d", *buffer
+        )
+
+    def restore_state(self, payload, age_s=0.0):
+        """Load a snapshot_state() payload saved *age_s* seconds ago.
+
+        The track resumes as if no reading arrived in the meantime: the next
+        prediction spans the whole gap, widening the covariance accordingly.
+        """
+        has_track, d, v, p00, p01, p11, since_update, streak, n_buffer = _SNAPSHOT_STATE.unpack_from(payload)
+        expected = _SNAPSHOT_STATE.size + 8 * n_buffer
+        if len(payload) != expected:
+            raise ValueError(f"payload is {len(payload)} bytes, expected {expected}")
+        if has_track:
+            self._x = [d, v]
+            self._p = [[p00, p01], [p01, p11]]
+            self._t = time.monotonic() - since_update - max(0.0, age_s)
+        else:
+            self._x = self._p = self._t = None
+        self._outlier_buffer.clear()
+        self._outlier_buffer.extend(struct.unpack_from(f"<{n_buffer}d", payload, _SNAPSHOT_STATE.size))
+        self._outlier_streak = min(streak, len(self._outlier_buffer))
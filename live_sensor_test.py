@@ -1,5 +1,5 @@
 import time
-from sensor import get_water_level, update_risk_led, water_level_to_risk_score
+from sensor import configure_sensor_worker, get_water_level, ping_jitter, update_risk_led, water_level_to_risk_score
 
 def main():
     """
@@ -19,6 +19,9 @@ def main():
 
     # Note: sensor.py automatically handles GPIO initialization and MOCK detection.
     # To force REAL hardware mode on a Pi, ensure MOCK_MODE is NOT set to 'true' in .env.
+    # SENSOR_RT_* / SENSOR_CPU_AFFINITY / SENSOR_MLOCKALL apply here too, so the
+    # jitter histogram printed on exit shows their effect.
+    configure_sensor_worker()
 
     try:
         while True:
@@ -43,6 +46,9 @@ def main():
             
     except KeyboardInterrupt:
         print("\n\n[INFO] Test terminated by user.")
+        if ping_jitter.total:
+            print(f"[INFO] Ping wake-up jitter {ping_jitter.summary()}")
+            print(ping_jitter.format())
     except Exception as e:
         print(f"\n\n[ERROR] Unexpected error: {e}")
 
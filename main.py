@@ -12,7 +12,11 @@ from pathlib import Path
 from config import (
     SENSOR_DEVICE_ID,
     SENSOR_INTERVAL,
+    SENSOR_CONTINUOUS_ENABLED,
+    SENSOR_JITTER_LOG_INTERVAL_S,
     CAMERA_INTERVAL,
+    CAMERA_MAX_INFLIGHT_FRAMES,
+    CAMERA_UPLOAD_WORKERS,
     IOT_API_KEY,
     ENABLE_CLOUDINARY_UPLOAD,
     ENABLE_WEBSOCKET_SEND,
@@ -24,7 +28,22 @@ from config import (
     TRAINING_CAPTURES_DIR,
     USE_TRAINING_RAINING,
     TRAINING_RAINING_DIR,
+    IMAGE_CATALOG_REFRESH_S,
+    STATIC_FRAME_CACHE_MB,
     SENSOR_POST_ENABLED,
+    SENSOR_SEND_QUEUE_SIZE,
+    SENSOR_POST_TIMEOUT_S,
+    SENSOR_BATCH_ENABLED,
+    SENSOR_BATCH_MAX_SIZE,
+    SENSOR_BATCH_MAX_AGE_S,
+    SPOOL_ENABLED,
+    SPOOL_DIR,
+    SPOOL_MAX_READINGS,
+    SPOOL_MAX_FRAMES,
+    SPOOL_FLUSH_BATCH,
+    SPOOL_FLUSH_INTERVAL_S,
+    SPOOL_REPLAY_READINGS_PER_S,
+    SPOOL_REPLAY_FRAMES_PER_MIN,
     SENSOR_FILTER_ENABLED,
     SENSOR_FILTER_WINDOW_SIZE,
     SENSOR_FILTER_MIN_VALID_SAMPLES,
@@ -34,14 +53,48 @@ from config import (
     SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM,
     SENSOR_FILTER_REBASELINE_OUTLIER_STREAK,
     SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM,
+    SENSOR_FILTER_MODE,
+    SENSOR_KALMAN_MEASUREMENT_STD_CM,
+    SENSOR_KALMAN_ACCEL_STD_CM_MIN2,
+    SENSOR_KALMAN_GATE_SIGMA,
+    SENSOR_RISK_LOOKAHEAD_S,
+    SENSOR_FILTER_SNAPSHOT_ENABLED,
+    SENSOR_FILTER_SNAPSHOT_PATH,
+    SENSOR_FILTER_SNAPSHOT_INTERVAL_S,
+    SENSOR_FILTER_SNAPSHOT_MAX_AGE_S,
+    RISK_FALLBACK_WARNING_ABOVE_CM,
     RISK_SCORE_API_URL,
     RISK_SCORE_POLL_INTERVAL,
+    WS_CONNECT_TIMEOUT,
+    WS_PING_INTERVAL,
+    WS_PING_TIMEOUT,
+    WS_RECONNECT_BACKOFF_MIN_S,
+    WS_RECONNECT_BACKOFF_MAX_S,
 )
 from camera import PersistentCamera, build_ir_status_image, get_ir_status_snapshot, force_night_vision
-from frame_quality import get_frame_quality_metrics, is_frame_usable, is_frame_dark, is_frame_obscured
-from sensor import get_water_level, update_risk_led, water_level_to_risk_score
-from uploader import upload_image
+from filter_snapshot import load_snapshot, save_snapshot
+from frame_cache import StaticFrameCache
+from frame_fanout import FrameFanout
+from frame_pipeline import RejectedFrame
+from frame_quality import evaluate_frame, get_frame_quality_metrics, get_metrics_cache_stats
+from image_catalog import ImageCatalog
+from level_tracker import LevelTracker
+from sensor import (
+    configure_sensor_worker,
+    dispersion_to_signal_strength,
+    get_water_level_reading,
+    ping_jitter,
+    predicted_risk_score,
+    start_continuous_sampler,
+    stop_continuous_sampler,
+    update_risk_led,
+    water_level_to_risk_score,
+)
+from spool import Spool
+from telemetry import TelemetrySender
+from uploader import get_upload_dedup_stats, upload_image
 from water_level_filter import WaterLevelFilter
+from ws_connection import WebSocketBackoff, WebSocketConnectionManager
 
 try:
     import websocket as _websocket
@@ -76,57 +129,43 @@ if USE_TRAINING_RAINING:
 
 _USE_STATIC_IMAGES = bool(_IMAGE_SOURCES)
 
-
-def _load_images_from_dir(directory: str) -> list[Path]:
-    """Return sorted list of image paths inside *directory*."""
-    image_dir = Path(directory)
-    if not image_dir.exists() or not image_dir.is_dir():
-        return []
-    allowed = {".jpg", ".jpeg", ".png"}
-    images = [
-        p
-        for p in image_dir.rglob("*")
-        if p.is_file() and p.suffix.lower() in allowed
-    ]
-    return sorted(images, key=lambda p: p.relative_to(image_dir).as_posix().lower())
-
-
-# Per-source image lists and cycling indices.
-_SOURCE_IMAGES: dict[str, list[Path]] = {
-    label: _load_images_from_dir(directory)
-    for label, directory in _IMAGE_SOURCES
-}
-_SOURCE_INDICES: dict[str, int] = {label: 0 for label, _ in _IMAGE_SOURCES}
+# Static-image mode logs metrics-cache hit/miss counters every N frames.
+_METRICS_CACHE_LOG_EVERY = 100
 
 
-_GLOBAL_SOURCE_INDEX = 0
+# Per-source image lists and round-robin cursors; new captures are picked
+# up as they land (see image_catalog.py).
+_IMAGE_CATALOG = ImageCatalog(_IMAGE_SOURCES, refresh_interval_s=IMAGE_CATALOG_REFRESH_S)
 
 
 def _next_static_image() -> tuple[str, Path] | tuple[None, None]:
     """Return the next (source_label, image_path) pair cycling across all
     enabled sources in round-robin order.  Returns (None, None) when no
     images are available."""
-    global _GLOBAL_SOURCE_INDEX
-    num_sources = len(_IMAGE_SOURCES)
-    if num_sources == 0:
-        return None, None
+    return _IMAGE_CATALOG.next_image()
 
-    # Try each source starting from the next one in global sequence.
-    for _ in range(num_sources):
-        current_source_idx = _GLOBAL_SOURCE_INDEX % num_sources
-        _GLOBAL_SOURCE_INDEX += 1  # Advance for the next call
 
-        label, _ = _IMAGE_SOURCES[current_source_idx]
-        images = _SOURCE_IMAGES.get(label, [])
-        if not images:
-            continue
+_STATIC_FRAME_CACHE = (
+    StaticFrameCache(
+        STATIC_FRAME_CACHE_MB * 1024 * 1024,
+        metrics_fn=get_frame_quality_metrics,
+    )
+    if _USE_STATIC_IMAGES and STATIC_FRAME_CACHE_MB > 0
+    else None
+)
 
-        idx = _SOURCE_INDICES[label]
-        path = images[idx % len(images)]
-        _SOURCE_INDICES[label] = idx + 1
-        return label, path
 
-    return None, None
+def _evaluate_static_frame(path):
+    """Return (image, verdict) for a static frame.
+
+    With the frame cache the image is the cached JPEG bytes and the verdict
+    reuses the cached metrics, so upload and WebSocket send never touch the
+    disk; otherwise the path is returned and each consumer reads the file.
+    """
+    if _STATIC_FRAME_CACHE is None:
+        return path, evaluate_frame(str(path))
+    frame = _STATIC_FRAME_CACHE.get(path)
+    return frame.jpeg, evaluate_frame(frame.jpeg, metrics=frame.metrics)
 
 
 def _safe_ws_url(url):
@@ -196,7 +235,58 @@ def _send_precapture_status_image() -> None:
                 logger.warning(f"Failed to clean up {status_path}: {cleanup_err}")
 
 
-def send_image_websocket(image_path, cloudinary_url=None, extra_metadata=None):
+def _frame_filename() -> str:
+    """Return a timestamped filename for frames that never existed on disk."""
+    return f"frame_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+
+
+def _read_image_bytes(image) -> bytes:
+    """Return the encoded bytes for a path or an in-memory JPEG buffer."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    with open(image, "rb") as f:
+        return f.read()
+
+
+_ws_manager = None
+_ws_manager_lock = threading.Lock()
+
+
+def _get_ws_manager():
+    """Return the process-wide WebSocket connection, (re)built if the URL changed."""
+    global _ws_manager
+    with _ws_manager_lock:
+        manager = _ws_manager
+        if manager is None or manager.url != WEBSOCKET_SERVER_URL:
+            if manager is not None:
+                manager.close()
+            manager = WebSocketConnectionManager(
+                WEBSOCKET_SERVER_URL,
+                _websocket,
+                connect_timeout=WS_CONNECT_TIMEOUT,
+                ping_interval=WS_PING_INTERVAL,
+                ping_timeout=WS_PING_TIMEOUT,
+                backoff_min_s=WS_RECONNECT_BACKOFF_MIN_S,
+                backoff_max_s=WS_RECONNECT_BACKOFF_MAX_S,
+            )
+            _ws_manager = manager
+        return manager
+
+
+def reset_ws_manager():
+    """Close the shared WebSocket connection.
+
+    The next send builds a new one from the current settings and
+    websocket module (e.g. after a test swaps ``main._websocket``).
+    """
+    global _ws_manager
+    with _ws_manager_lock:
+        if _ws_manager is not None:
+            _ws_manager.close()
+            _ws_manager = None
+
+
+def send_image_websocket(image, cloudinary_url=None, extra_metadata=None, filename=None):
     """Send captured image to WebSocket server.
 
     Protocol:
@@ -204,7 +294,12 @@ def send_image_websocket(image_path, cloudinary_url=None, extra_metadata=None):
       2. Binary frame — raw JPEG bytes.
 
     The server can use the metadata to associate the binary blob with the
-    correct device/reading before the binary frame arrives.
+    correct device/reading before the binary frame arrives.  Frames share
+    one long-lived connection (see ws_connection.WebSocketConnectionManager)
+    instead of handshaking per frame.
+
+    *image* may be a file path or an encoded JPEG buffer; for buffers,
+    *filename* names the frame in the metadata.
     """
     if not WEBSOCKET_AVAILABLE:
         logger.warning("[WS] websocket-client not installed — skipping WebSocket send")
@@ -214,28 +309,29 @@ def send_image_websocket(image_path, cloudinary_url=None, extra_metadata=None):
         return False
 
     try:
-        with open(image_path, "rb") as f:
-            image_data = f.read()
+        image_data = _read_image_bytes(image)
+        if filename is None:
+            filename = (
+                _frame_filename()
+                if isinstance(image, (bytes, bytearray, memoryview))
+                else os.path.basename(image)
+            )
 
-        ws = _websocket.create_connection(WEBSOCKET_SERVER_URL, timeout=10)
-        try:
-            metadata = {
-                "type": "image",
-                "sensor_device_id": SENSOR_DEVICE_ID,
-                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "filename": os.path.basename(image_path),
-                "size": len(image_data),
-                "cloudinary_url": cloudinary_url,
-            }
-            if extra_metadata:
-                metadata.update(extra_metadata)
-            if WS_SEND_METADATA_FIRST:
-                # Optional frame 1: metadata as JSON text.
-                ws.send(json.dumps(metadata))
-            # Raw image bytes frame.
-            ws.send_binary(image_data)
-        finally:
-            ws.close()
+        metadata = {
+            "type": "image",
+            "sensor_device_id": SENSOR_DEVICE_ID,
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "filename": filename,
+            "size": len(image_data),
+            "cloudinary_url": cloudinary_url,
+        }
+        if extra_metadata:
+            metadata.update(extra_metadata)
+        # Optional frame 1: metadata as JSON text, then the raw image bytes.
+        _get_ws_manager().send(
+            image_data,
+            text=json.dumps(metadata) if WS_SEND_METADATA_FIRST else None,
+        )
 
         logger.info(
             f"[WS] Sent image ({len(image_data):,} bytes) to {_safe_ws_url(WEBSOCKET_SERVER_URL)} "
@@ -243,6 +339,8 @@ def send_image_websocket(image_path, cloudinary_url=None, extra_metadata=None):
         )
         return True
 
+    except WebSocketBackoff as e:
+        logger.warning(f"[WS] Skipping send to {_safe_ws_url(WEBSOCKET_SERVER_URL)}: {e}")
     except _websocket.WebSocketTimeoutException:
         logger.error(f"[WS] Connection timed out: {_safe_ws_url(WEBSOCKET_SERVER_URL)}")
     except _websocket.WebSocketConnectionClosedException as e:
@@ -256,26 +354,262 @@ def send_image_websocket(image_path, cloudinary_url=None, extra_metadata=None):
 stop_event = threading.Event()
 
 
-water_level_filter = WaterLevelFilter(
-    enabled=SENSOR_FILTER_ENABLED,
-    window_size=SENSOR_FILTER_WINDOW_SIZE,
-    min_valid_samples=SENSOR_FILTER_MIN_VALID_SAMPLES,
-    min_cm=SENSOR_FILTER_MIN_CM,
-    max_cm=SENSOR_FILTER_MAX_CM,
-    modz_threshold=SENSOR_FILTER_MODZ_THRESHOLD,
-    zero_mad_tolerance_cm=SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM,
-    rebaseline_outlier_streak=SENSOR_FILTER_REBASELINE_OUTLIER_STREAK,
-    rebaseline_spread_max_cm=SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM,
+def _build_water_level_filter():
+    if SENSOR_FILTER_MODE == "kalman":
+        return LevelTracker(
+            enabled=SENSOR_FILTER_ENABLED,
+            min_cm=SENSOR_FILTER_MIN_CM,
+            max_cm=SENSOR_FILTER_MAX_CM,
+            measurement_std_cm=SENSOR_KALMAN_MEASUREMENT_STD_CM,
+            accel_std_cm_min2=SENSOR_KALMAN_ACCEL_STD_CM_MIN2,
+            gate_sigma=SENSOR_KALMAN_GATE_SIGMA,
+            rebaseline_outlier_streak=SENSOR_FILTER_REBASELINE_OUTLIER_STREAK,
+            rebaseline_spread_max_cm=SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM,
+        )
+    if SENSOR_FILTER_MODE != "average":
+        logger.warning(f"[SENSOR] Unknown SENSOR_FILTER_MODE={SENSOR_FILTER_MODE!r}; using 'average'")
+    return WaterLevelFilter(
+        enabled=SENSOR_FILTER_ENABLED,
+        window_size=SENSOR_FILTER_WINDOW_SIZE,
+        min_valid_samples=SENSOR_FILTER_MIN_VALID_SAMPLES,
+        min_cm=SENSOR_FILTER_MIN_CM,
+        max_cm=SENSOR_FILTER_MAX_CM,
+        modz_threshold=SENSOR_FILTER_MODZ_THRESHOLD,
+        zero_mad_tolerance_cm=SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM,
+        rebaseline_outlier_streak=SENSOR_FILTER_REBASELINE_OUTLIER_STREAK,
+        rebaseline_spread_max_cm=SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM,
+    )
+
+
+water_level_filter = _build_water_level_filter()
+# Serialises filter updates (sensor thread) with snapshots (signal handler).
+_filter_lock = threading.Lock()
+_last_filter_snapshot = 0.0
+
+
+def save_filter_snapshot():
+    """Persist the filter state if snapshots are enabled; never raises."""
+    global _last_filter_snapshot
+    if not SENSOR_FILTER_SNAPSHOT_ENABLED:
+        return False
+    if not _filter_lock.acquire(timeout=1.0):
+        logger.warning("[FILTER] Snapshot skipped — filter busy")
+        return False
+    try:
+        size = save_snapshot(water_level_filter, SENSOR_FILTER_SNAPSHOT_PATH)
+        _last_filter_snapshot = time.monotonic()
+        logger.debug(f"[FILTER] Snapshot saved ({size} bytes) to {SENSOR_FILTER_SNAPSHOT_PATH}")
+        return True
+    except OSError as e:
+        logger.error(f"[FILTER] Failed to save snapshot to {SENSOR_FILTER_SNAPSHOT_PATH}: {e}")
+        return False
+    finally:
+        _filter_lock.release()
+
+
+def _maybe_save_filter_snapshot():
+    if (
+        SENSOR_FILTER_SNAPSHOT_ENABLED
+        and time.monotonic() - _last_filter_snapshot >= SENSOR_FILTER_SNAPSHOT_INTERVAL_S
+    ):
+        save_filter_snapshot()
+
+
+_last_jitter_log = time.monotonic()
+
+
+def _maybe_log_ping_jitter():
+    """Log the ping wake-up jitter summary every SENSOR_JITTER_LOG_INTERVAL_S."""
+    global _last_jitter_log
+    if not SENSOR_JITTER_LOG_INTERVAL_S or time.monotonic() - _last_jitter_log < SENSOR_JITTER_LOG_INTERVAL_S:
+        return
+    _last_jitter_log = time.monotonic()
+    if ping_jitter.total:
+        logger.info(f"[SENSOR] Ping wake-up jitter {ping_jitter.summary()}")
+
+
+def restore_filter_snapshot():
+    """Warm-start the filter from a recent snapshot, if enabled and present."""
+    if not SENSOR_FILTER_SNAPSHOT_ENABLED:
+        return False
+    with _filter_lock:
+        restored = load_snapshot(water_level_filter, SENSOR_FILTER_SNAPSHOT_PATH, SENSOR_FILTER_SNAPSHOT_MAX_AGE_S)
+    if restored:
+        logger.info(f"[FILTER] Restored filter state from {SENSOR_FILTER_SNAPSHOT_PATH}")
+    return restored
+
+
+def _filter_reading(reading):
+    """Run a WaterLevelReading through the configured filter.
+
+    Returns ``(filtered_cm, status, risk_score, trend)``.  In kalman mode the
+    reading's timestamp and spread feed the tracker, the risk score is
+    escalated by the predicted time-to-threshold, and *trend* is a short log
+    fragment with the rise rate; otherwise *trend* is "".
+    """
+    if not isinstance(water_level_filter, LevelTracker):
+        filtered, status = water_level_filter.process(reading.distance_cm)
+        return filtered, status, water_level_to_risk_score(filtered), ""
+
+    filtered, status = water_level_filter.process(
+        reading.distance_cm,
+        timestamp=time.monotonic() - reading.age_s,
+        dispersion_cm=reading.dispersion_cm,
+    )
+    estimate = water_level_filter.estimate
+    if filtered is None or estimate is None or status == "bypass":
+        return filtered, status, water_level_to_risk_score(filtered), ""
+    risk_score = predicted_risk_score(estimate, SENSOR_RISK_LOOKAHEAD_S)
+    to_warning = estimate.time_to_distance_s(RISK_FALLBACK_WARNING_ABOVE_CM)
+    eta = f"{to_warning / 60:.1f}min" if to_warning != float("inf") else "never"
+    trend = (
+        f" rise={estimate.rise_rate_cm_min:+.2f}±{estimate.rise_rate_std_cm_min:.2f}cm/min"
+        f" ±{estimate.distance_std_cm:.2f}cm critical_in={eta}"
+    )
+    return filtered, status, risk_score, trend
+
+
+telemetry_sender = TelemetrySender(
+    SERVER_URL,
+    api_key=IOT_API_KEY,
+    max_queue=SENSOR_SEND_QUEUE_SIZE,
+    timeout=SENSOR_POST_TIMEOUT_S,
+    batch_size=SENSOR_BATCH_MAX_SIZE if SENSOR_BATCH_ENABLED else 1,
+    batch_max_age_s=SENSOR_BATCH_MAX_AGE_S,
+    replay_per_s=SPOOL_REPLAY_READINGS_PER_S,
 )
+_TELEMETRY_LOG_EVERY = 60
+
+
+def _format_telemetry_stats(stats):
+    def _ms(value):
+        return f"{value:.0f}ms" if value is not None else "n/a"
+
+    return (
+        f"queue={stats['queue_depth']} sent={stats['sent']} posts={stats['batches']} failed={stats['failed']} "
+        f"dropped={stats['dropped']} rate_limited={stats['rate_limited']} "
+        f"spooled={stats['spooled']} replayed={stats['replayed']} "
+        f"latency last={_ms(stats['last_latency_ms'])} avg={_ms(stats['avg_latency_ms'])} "
+        f"max={_ms(stats['max_latency_ms'])}"
+    )
+
+
+# Opened in __main__ when SPOOL_ENABLED; None means failures are only logged.
+spool = None
+# Cleared when a live camera frame fails to send; spooled frames are only
+# replayed while live sends are succeeding.
+_camera_online = True
+
+
+def _open_spool():
+    return Spool(
+        SPOOL_DIR,
+        max_rows={"reading": SPOOL_MAX_READINGS, "frame": SPOOL_MAX_FRAMES},
+        flush_batch=SPOOL_FLUSH_BATCH,
+        flush_interval_s=SPOOL_FLUSH_INTERVAL_S,
+    )
+
+
+def _websocket_send_enabled():
+    return ENABLE_WEBSOCKET_SEND and WEBSOCKET_AVAILABLE and bool(WEBSOCKET_SERVER_URL)
+
+
+def _record_frame_delivery(image, filename, metadata, cloudinary_url, upload_failed, ws_failed, captured_at=None):
+    """Track camera connectivity and spool a frame whose delivery failed.
+
+    Spooled frames replay in *captured_at* (epoch seconds) order.
+    """
+    global _camera_online
+    _camera_online = not (upload_failed or ws_failed)
+    if _camera_online or spool is None:
+        return
+    if captured_at is None:
+        captured_at = time.time()
+    try:
+        file = None
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            path = file = spool.store_file(bytes(image), filename)
+        else:
+            path = str(image)
+        spool.put(
+            "frame",
+            {
+                "path": path,
+                "filename": filename,
+                "captured_at": datetime.fromtimestamp(captured_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "metadata": metadata,
+                "cloudinary_url": cloudinary_url,
+                "pending_upload": upload_failed,
+                "pending_websocket": ws_failed,
+            },
+            ts=captured_at,
+            file=file,
+        )
+        logger.info(f"[SPOOL] Spooled frame {filename} for later delivery")
+    except Exception as e:
+        logger.error(f"[SPOOL] Failed to spool frame {filename}: {e}")
+
+
+def replay_spooled_frame():
+    """Deliver the oldest spooled frame; returns True if one was fully delivered."""
+    if spool is None or not _camera_online:
+        return False
+    items = spool.peek("frame", 1)
+    if not items:
+        return False
+    item_id, item = items[0]
+    path = Path(item["path"])
+    if not path.is_file():
+        logger.warning(f"[SPOOL] Spooled frame {path} no longer exists — discarding")
+        spool.ack([item_id])
+        return False
+
+    if item["pending_upload"]:
+        if ENABLE_CLOUDINARY_UPLOAD:
+            url = upload_image(str(path))
+            if url is None:
+                return False
+            item["cloudinary_url"] = url
+        item["pending_upload"] = False
+        spool.update(item_id, item)
+
+    if item["pending_websocket"] and _websocket_send_enabled():
+        metadata = dict(item.get("metadata") or {})
+        metadata.update({"timestamp": item["captured_at"], "replayed": True})
+        if not send_image_websocket(
+            str(path),
+            cloudinary_url=item["cloudinary_url"],
+            extra_metadata=metadata,
+            filename=item["filename"],
+        ):
+            return False
+
+    spool.ack([item_id])
+    logger.info(f"[SPOOL] Replayed frame {item['filename']} captured {item['captured_at']}")
+    return True
+
+
+def spool_replay_loop():
+    """Replay spooled frames at SPOOL_REPLAY_FRAMES_PER_MIN while live sends succeed."""
+    if spool is None or SPOOL_REPLAY_FRAMES_PER_MIN <= 0:
+        return
+    interval = 60.0 / SPOOL_REPLAY_FRAMES_PER_MIN
+    while not stop_event.wait(interval):
+        try:
+            spool.maybe_flush()
+            replay_spooled_frame()
+        except Exception as e:
+            logger.error(f"[SPOOL] Replay error: {e}")
 
 
 def signal_handler(sig, frame):
     logger.info("Shutdown requested")
     stop_event.set()
+    save_filter_snapshot()
 
 
 def sensor_loop():
-    """Read the JSN-SR04 and POST to the server at SENSOR_INTERVAL."""
+    """Read the JSN-SR04 at SENSOR_INTERVAL and queue readings for the telemetry sender."""
     _rate = f"{1 / SENSOR_INTERVAL:.1f}" if SENSOR_INTERVAL else "∞"
     logger.info(
         f"[SENSOR] Loop started — interval={SENSOR_INTERVAL}s "
@@ -285,6 +619,13 @@ def sensor_loop():
     # we quickly sample again to feed the filter and rebaseline if necessary,
     # rather than waiting a full SENSOR_INTERVAL.
     retry_delay = min(2.0, SENSOR_INTERVAL if SENSOR_INTERVAL > 0 else 2.0)
+    readings_since_stats = 0
+    last_risk_tier = None
+    if SENSOR_POST_ENABLED and not IOT_API_KEY:
+        logger.warning("[SENSOR] IOT_API_KEY is not set; requests may be rejected with 401")
+    if not SENSOR_CONTINUOUS_ENABLED:
+        # Bursts ping from this thread; the continuous sampler configures its own.
+        configure_sensor_worker()
 
     while not stop_event.is_set():
         t0 = time.monotonic()
@@ -292,11 +633,14 @@ def sensor_loop():
 
         while not valid_reading and not stop_event.is_set():
             try:
-                level = get_water_level()
-                if level is None:
+                reading = get_water_level_reading()
+                if reading is None:
                     logger.warning("Failed to read water level, retrying...")
                 else:
-                    filtered_level, filter_status = water_level_filter.process(level)
+                    level = reading.distance_cm
+                    with _filter_lock:
+                        filtered_level, filter_status, risk_score, trend = _filter_reading(reading)
+                    _maybe_save_filter_snapshot()
                     if filtered_level is None:
                         logger.warning(
                             f"[SENSOR] Dropped raw level={level}cm (reason={filter_status}), retrying..."
@@ -310,65 +654,142 @@ def sensor_loop():
                         api_is_failing = (now - api_last_success_time) > api_timeout
 
                         if not RISK_SCORE_API_URL or api_is_failing:
-                            risk_score = water_level_to_risk_score(filtered_level)
                             if risk_score is not None:
                                 update_risk_led(risk_score)
+                        tier_changed = last_risk_tier is not None and risk_score != last_risk_tier
+                        last_risk_tier = risk_score
                         logger.info(
                             f"[SENSOR] Local reading raw={level}cm filtered={filtered_level:.2f}cm "
-                            f"device={SENSOR_DEVICE_ID} filter={filter_status}"
+                            f"samples={reading.samples} dispersion={reading.dispersion_cm:.2f}cm "
+                            f"age={reading.age_s * 1000:.0f}ms "
+                            f"device={SENSOR_DEVICE_ID} filter={filter_status}{trend}"
                         )
 
                         if not SENSOR_POST_ENABLED:
                             break
 
-                        try:
-                            headers = {}
-                            if IOT_API_KEY:
-                                headers["x-api-key"] = IOT_API_KEY
-                            else:
-                                logger.warning("[SENSOR] IOT_API_KEY is not set; request may be rejected with 401")
-
-                            payload = {
-                                "sensor_device_id": SENSOR_DEVICE_ID,
-                                "raw_distance_cm": round(level, 2),
-                                "signal_strength": 100,
-                                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                            }
-                            response = requests.post(SERVER_URL, json=payload, headers=headers, timeout=5)
-                            if response.status_code == 429:
-                                logger.warning(
-                                    "[SENSOR] API rate-limited (429). "
-                                    "Keeping local logs and retrying next cycle."
-                                )
-                            else:
-                                response.raise_for_status()
-                                logger.info(
-                                    f"Sensor posted: raw={level}cm filtered={filtered_level:.2f}cm "
-                                    f"device={SENSOR_DEVICE_ID} filter={filter_status}"
-                                )
-                        except requests.exceptions.Timeout:
-                            logger.error(f"Timeout posting sensor data to {SERVER_URL}")
-                        except requests.exceptions.RequestException as e:
-                            if hasattr(e, "response") and e.response is not None:
-                                logger.error(
-                                    f"Sensor post failed: status={e.response.status_code} "
-                                    f"body={e.response.text}"
-                                )
-                            else:
-                                logger.error(f"Sensor post failed: {e}")
+                        payload = {
+                            "sensor_device_id": SENSOR_DEVICE_ID,
+                            "raw_distance_cm": round(level, 2),
+                            "signal_strength": dispersion_to_signal_strength(reading.dispersion_cm),
+                            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        }
+                        if not telemetry_sender.submit(payload, flush=tier_changed):
+                            logger.warning(
+                                f"[SENSOR] Send queue full ({SENSOR_SEND_QUEUE_SIZE}) — dropped oldest reading"
+                            )
+                        readings_since_stats += 1
+                        if readings_since_stats >= _TELEMETRY_LOG_EVERY:
+                            readings_since_stats = 0
+                            logger.info(f"[SENSOR] Telemetry {_format_telemetry_stats(telemetry_sender.stats())}")
             except Exception as e:
                 logger.error(f"Sensor loop error: {e}")
 
             if not valid_reading:
                 stop_event.wait(retry_delay)
 
+        _maybe_log_ping_jitter()
         # Sleep for the remainder of the interval; wake immediately on shutdown.
         elapsed = time.monotonic() - t0
         stop_event.wait(max(0.0, SENSOR_INTERVAL - elapsed))
 
 
+def send_image_url_followup(filename, cloudinary_url):
+    """Send the Cloudinary URL of an already-streamed frame as a text-only message."""
+    if not WEBSOCKET_AVAILABLE or not WEBSOCKET_SERVER_URL:
+        return False
+    message = {
+        "type": "image_url",
+        "sensor_device_id": SENSOR_DEVICE_ID,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "filename": filename,
+        "cloudinary_url": cloudinary_url,
+    }
+    try:
+        _get_ws_manager().send(None, text=json.dumps(message))
+        return True
+    except WebSocketBackoff as e:
+        logger.warning(f"[WS] Skipping URL follow-up for {filename}: {e}")
+    except Exception as e:
+        logger.error(f"[WS] Failed to send URL follow-up for {filename}: {e}")
+    return False
+
+
+def _fanout_image(job):
+    return job.image if isinstance(job.image, (bytes, bytearray, memoryview)) else str(job.image)
+
+
+def _upload_frame(job):
+    return upload_image(_fanout_image(job))
+
+
+def _send_frame(job, cloudinary_url):
+    return send_image_websocket(
+        _fanout_image(job),
+        cloudinary_url=cloudinary_url,
+        extra_metadata=job.metadata,
+        filename=job.filename,
+    )
+
+
+def _on_frame_complete(job):
+    if job.upload_ok is False:
+        logger.warning(f"Failed to upload image {job.filename}")
+    if job.ws_ok is False:
+        logger.warning(f"[CAMERA] WebSocket send failed for {job.filename}")
+    if job.cloudinary_url:
+        source = job.metadata.get("image_source")
+        label = f"[{source}] " if source else ""
+        logger.info(f"Camera: uploaded {label}{job.cloudinary_url} ({job.latency_ms:.0f}ms)")
+    _record_frame_delivery(
+        job.image,
+        job.filename,
+        job.metadata,
+        job.cloudinary_url,
+        upload_failed=job.upload_ok is False,
+        ws_failed=job.ws_ok is False and _websocket_send_enabled(),
+        captured_at=job.captured_at,
+    )
+
+
+def _build_frame_fanout():
+    return FrameFanout(
+        upload=_upload_frame if ENABLE_CLOUDINARY_UPLOAD else None,
+        send=_send_frame if ENABLE_WEBSOCKET_SEND else None,
+        follow_up=lambda job: send_image_url_followup(job.filename, job.cloudinary_url),
+        on_complete=_on_frame_complete,
+        max_in_flight=CAMERA_MAX_INFLIGHT_FRAMES,
+        upload_workers=CAMERA_UPLOAD_WORKERS,
+    )
+
+
+# The camera loop logs fan-out counters every N submitted frames.
+_FANOUT_LOG_EVERY = 100
+
+
+def _submit_frame(fanout, image, filename, metadata):
+    fanout.submit(image, filename, metadata)
+    stats = fanout.stats()
+    if stats["submitted"] % _FANOUT_LOG_EVERY == 0:
+        logger.info(f"[CAMERA] Fan-out {stats}")
+
+
 def camera_loop():
-    """Capture frames, upload to Cloudinary, and stream via WebSocket at CAMERA_INTERVAL.
+    """Capture frames at CAMERA_INTERVAL and fan them out to Cloudinary and the WebSocket.
+
+    Upload and WebSocket send run concurrently on a FrameFanout worker pool so
+    a slow sink never stalls capture.
+    """
+    fanout = _build_frame_fanout().start()
+    try:
+        _camera_loop(fanout)
+    finally:
+        fanout.stop()
+        logger.info(f"[CAMERA] Fan-out {fanout.stats()}")
+
+
+def _camera_loop(fanout):
+    """Capture frames and hand them to *fanout* at CAMERA_INTERVAL.
 
     The camera is opened once via PersistentCamera and stays open for the
     lifetime of the loop, avoiding the 2-second AEC/AWB warm-up on every
@@ -384,9 +805,10 @@ def camera_loop():
         logger.info(f"[CAMERA] Static image mode — sources (in order): {source_labels}")
         # Log per-source image counts so the user knows what will be served.
         for label, directory in _IMAGE_SOURCES:
-            count = len(_SOURCE_IMAGES.get(label, []))
+            count = _IMAGE_CATALOG.count(label)
             logger.info(f"[CAMERA]   {label}: {count} image(s) from '{directory}/'")
 
+        frames_served = 0
         while not stop_event.is_set():
             t0 = time.monotonic()
             path = None
@@ -396,9 +818,31 @@ def camera_loop():
                 if path is None:
                     logger.warning("[CAMERA] No images available in any enabled source folder")
                 else:
-                    # ── Environment sensing (reuses existing quality metrics) ──
-                    metrics = get_frame_quality_metrics(str(path))
-                    if metrics and (is_frame_dark(metrics) or is_frame_obscured(metrics)):
+                    frames_served += 1
+                    if frames_served % _METRICS_CACHE_LOG_EVERY == 0:
+                        stats = get_metrics_cache_stats()
+                        logger.info(
+                            f"[CAMERA] Metrics cache hits={stats['hits']} misses={stats['misses']} "
+                            f"size={stats['size']}/{stats['max_entries']} hit_rate={stats['hit_rate']:.1%}"
+                        )
+                        if _STATIC_FRAME_CACHE is not None:
+                            stats = _STATIC_FRAME_CACHE.stats()
+                            logger.info(
+                                f"[CAMERA] Frame cache hits={stats['hits']} misses={stats['misses']} "
+                                f"evictions={stats['evictions']} entries={stats['entries']} "
+                                f"bytes={stats['bytes']}/{stats['max_bytes']} hit_rate={stats['hit_rate']:.1%}"
+                            )
+                        stats = get_upload_dedup_stats()
+                        if stats is not None:
+                            logger.info(
+                                f"[CAMERA] Upload dedup hits={stats['hits']} misses={stats['misses']} "
+                                f"entries={stats['entries']} saved={stats['bytes_saved']:,}B "
+                                f"hit_rate={stats['hit_rate']:.1%}"
+                            )
+                    # ── Quality gate + environment sensing (one evaluation) ──
+                    image, verdict = _evaluate_static_frame(path)
+                    metrics = verdict.metrics
+                    if verdict.dark or verdict.obscured:
                         force_night_vision()
                         logger.info(
                             f"[CAMERA] Environment dark/obscured — activated night vision "
@@ -406,34 +850,24 @@ def camera_loop():
                             f"laplacian={metrics['laplacian_var']:.1f})"
                         )
 
-                    if not is_frame_usable(str(path)):
+                    if not verdict.usable:
                         logger.warning(
                             f"[CAMERA] Dropped frame {path} [{source_label}] (quality gate): "
-                            f"{_format_frame_metrics(metrics)}"
+                            f"{_format_frame_metrics(metrics)} failed={','.join(verdict.failed_thresholds)}"
                         )
                         stop_event.wait(max(0.0, CAMERA_INTERVAL - (time.monotonic() - t0)))
                         continue
 
-                    url = None
-                    if ENABLE_CLOUDINARY_UPLOAD:
-                        url = upload_image(str(path))
-                        if url is None:
-                            logger.warning("Failed to upload image")
-
-                    if ENABLE_WEBSOCKET_SEND:
-                        ws_ok = send_image_websocket(
-                            str(path),
-                            cloudinary_url=url,
-                            extra_metadata={
-                                "frame_role": "camera_frame",
-                                "image_source": source_label,
-                                "ir_status": get_ir_status_snapshot(),
-                            },
-                        )
-                        if not ws_ok:
-                            logger.warning(f"[CAMERA] WebSocket send failed for {path}")
-                    if url:
-                        logger.info(f"Camera: uploaded [{source_label}] {url}")
+                    _submit_frame(
+                        fanout,
+                        image,
+                        path.name,
+                        {
+                            "frame_role": "camera_frame",
+                            "image_source": source_label,
+                            "ir_status": get_ir_status_snapshot(),
+                        },
+                    )
             except Exception as e:
                 logger.error(f"Camera loop error: {e}")
 
@@ -442,14 +876,18 @@ def camera_loop():
         with PersistentCamera() as cam:
             while not stop_event.is_set():
                 t0 = time.monotonic()
-                path = None
                 try:
                     _send_precapture_status_image()
-                    path = cam.capture()
-
-                    # ── Environment sensing (reuses existing quality metrics) ──
-                    metrics = get_frame_quality_metrics(path)
-                    if metrics and (is_frame_dark(metrics) or is_frame_obscured(metrics)):
+                    # Frames stay in memory end-to-end: crop, CLAHE and the
+                    # quality metrics share one decoded array and one encode.
+                    processed = cam.capture_frame(reject_unusable=True)
+                    frame = None if isinstance(processed, RejectedFrame) else processed.jpeg
+                    filename = _frame_filename()
+
+                    # ── Quality gate + environment sensing (reuses pipeline metrics) ──
+                    verdict = evaluate_frame(frame, metrics=processed.metrics)
+                    metrics = verdict.metrics
+                    if verdict.dark or verdict.obscured:
                         force_night_vision()
                         logger.info(
                             f"[CAMERA] Environment dark/obscured — activated night vision "
@@ -457,40 +895,25 @@ def camera_loop():
                             f"laplacian={metrics['laplacian_var']:.1f})"
                         )
 
-                    if not is_frame_usable(path):
+                    if not verdict.usable:
                         logger.warning(
-                            f"[CAMERA] Dropped frame {path} (quality gate): {_format_frame_metrics(metrics)}"
+                            f"[CAMERA] Dropped frame {filename} (quality gate): "
+                            f"{_format_frame_metrics(metrics)} failed={','.join(verdict.failed_thresholds)}"
                         )
                         stop_event.wait(max(0.0, CAMERA_INTERVAL - (time.monotonic() - t0)))
                         continue
 
-                    url = None
-                    if ENABLE_CLOUDINARY_UPLOAD:
-                        url = upload_image(path)
-                        if url is None:
-                            logger.warning("Failed to upload image")
-
-                    if ENABLE_WEBSOCKET_SEND:
-                        ws_ok = send_image_websocket(
-                            path,
-                            cloudinary_url=url,
-                            extra_metadata={
-                                "frame_role": "camera_frame",
-                                "ir_status": get_ir_status_snapshot(),
-                            },
-                        )
-                        if not ws_ok:
-                            logger.warning(f"[CAMERA] WebSocket send failed for {path}")
-                    if url:
-                        logger.info(f"Camera: uploaded {url}")
+                    _submit_frame(
+                        fanout,
+                        frame,
+                        filename,
+                        {
+                            "frame_role": "camera_frame",
+                            "ir_status": get_ir_status_snapshot(),
+                        },
+                    )
                 except Exception as e:
                     logger.error(f"Camera loop error: {e}")
-                finally:
-                    if path and os.path.exists(path):
-                        try:
-                            os.remove(path)
-                        except Exception as cleanup_err:
-                            logger.warning(f"Failed to clean up {path}: {cleanup_err}")
 
                 stop_event.wait(max(0.0, CAMERA_INTERVAL - (time.monotonic() - t0)))
 
@@ -563,12 +986,34 @@ if __name__ == "__main__":
         f"({f'{1 / CAMERA_INTERVAL:.1f}' if CAMERA_INTERVAL else '∞'} fps), "
         f"RISK_LED={'API' if RISK_SCORE_API_URL else 'water-level fallback'}"
     )
+    restore_filter_snapshot()
+    if SPOOL_ENABLED:
+        spool = _open_spool()
+        telemetry_sender.spool = spool
+        logger.info(f"[SPOOL] Store-and-forward enabled — {spool.stats()} in '{SPOOL_DIR}/'")
+    spool_thread = threading.Thread(target=spool_replay_loop, name="spool_replay", daemon=True)
+    if SENSOR_CONTINUOUS_ENABLED:
+        start_continuous_sampler()
+    if SENSOR_POST_ENABLED:
+        telemetry_sender.start()
     sensor_thread.start()
     camera_thread.start()
     risk_led_thread.start()
+    spool_thread.start()
 
     # Block the main thread until all workers exit after stop_event is set.
     sensor_thread.join()
     camera_thread.join()
     risk_led_thread.join()
+    spool_thread.join()
+    stop_continuous_sampler()
+    if ping_jitter.total:
+        logger.info(f"[SENSOR] Ping wake-up jitter {ping_jitter.summary()}\n{ping_jitter.format()}")
+    reset_ws_manager()
+    if SENSOR_POST_ENABLED:
+        telemetry_sender.stop()
+        logger.info(f"[SENSOR] Telemetry {_format_telemetry_stats(telemetry_sender.stats())}")
+    if spool is not None:
+        logger.info(f"[SPOOL] {spool.stats()}")
+        spool.close()
     logger.info("AGOS stopped.")
@@ -0,0 +1,146 @@
+"""Linux real-time controls and wake-up jitter measurement for the sensor worker.
+
+apply_realtime() gives the calling thread a real-time scheduling policy,
+pins it to CPUs and/or locks the process's memory, so JPEG encoding and
+network I/O on the other threads cannot delay echo timing.  Every control
+is optional and best effort: without privileges (CAP_SYS_NICE for
+SCHED_FIFO/SCHED_RR, CAP_IPC_LOCK or a large RLIMIT_MEMLOCK for mlockall)
+or off Linux it logs a warning and the worker runs unchanged.
+
+JitterHistogram records how late the worker wakes from a sleep, the delay a
+busy CPU or a held GIL adds to every echo it times.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SCHED_POLICIES = {"other": None, "fifo": "SCHED_FIFO", "rr": "SCHED_RR"}
+
+_MCL_CURRENT = 1
+_MCL_FUTURE = 2
+
+
+def _mlockall():
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if libc.mlockall(_MCL_CURRENT | _MCL_FUTURE) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def apply_realtime(policy="other", priority=10, cpus=None, lock_memory=False):
+    """Apply scheduling controls to the calling thread; return what took effect.
+
+    *policy* is "other" (leave as is), "fifo" or "rr" with *priority* 1–99;
+    *cpus* pins the thread to those CPU numbers.  Both are per thread on
+    Linux.  *lock_memory* calls mlockall(), which covers the whole process.
+    Never raises: failures are logged and skipped.
+    """
+    applied = []
+    policy = (policy or "other").lower()
+    if policy not in SCHED_POLICIES:
+        logger.warning(f"[RT] Unknown scheduling policy '{policy}' — expected one of {', '.join(SCHED_POLICIES)}")
+    elif SCHED_POLICIES[policy] is not None:
+        try:
+            os.sched_setscheduler(0, getattr(os, SCHED_POLICIES[policy]), os.sched_param(int(priority)))
+            applied.append(f"{SCHED_POLICIES[policy]} priority {int(priority)}")
+        except (AttributeError, OSError) as e:
+            logger.warning(f"[RT] Cannot set {SCHED_POLICIES[policy]} priority {priority}: {e}")
+
+    if cpus:
+        try:
+            os.sched_setaffinity(0, set(cpus))
+            applied.append(f"CPUs {','.join(str(c) for c in sorted(set(cpus)))}")
+        except (AttributeError, OSError) as e:
+            logger.warning(f"[RT] Cannot pin to CPUs {sorted(set(cpus))}: {e}")
+
+    if lock_memory:
+        try:
+            _mlockall()
+            applied.append("memory locked")
+        except (AttributeError, OSError) as e:
+            logger.warning(f"[RT] Cannot lock memory (mlockall): {e}")
+    return applied
+
+
+class JitterHistogram:
+    """Log2-bucketed histogram of wake-up latencies.
+
+    Bucket 0 counts latencies under 1 µs, bucket i those in
+    [2**(i-1), 2**i) µs, and the last bucket everything longer.  *counts*
+    may be any writable sequence of BUCKETS integers, e.g. a
+    multiprocessing.RawArray so a forked process records into the same
+    histogram.  Not locked: use one writer at a time.
+    """
+
+    BUCKETS = 24  # the last bucket starts at 2**22 µs ≈ 4.2 s
+
+    def __init__(self, counts=None):
+        if counts is None:
+            counts = [0] * self.BUCKETS
+        if len(counts) != self.BUCKETS:
+            raise ValueError(f"counts must have {self.BUCKETS} entries, got {len(counts)}")
+        self.counts = counts
+
+    def record(self, latency_s):
+        us = int(latency_s * 1e6)
+        self.counts[min(self.BUCKETS - 1, us.bit_length()) if us > 0 else 0] += 1
+
+    def reset(self):
+        for i in range(self.BUCKETS):
+            self.counts[i] = 0
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    @staticmethod
+    def bucket_upper_us(index):
+        return 1 << index if index else 1
+
+    def percentile_us(self, q):
+        """Upper bound (µs) of the bucket holding the *q*-quantile; None if empty."""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return None
+        target = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if count and seen >= target:
+                return self.bucket_upper_us(i)
+        return self.bucket_upper_us(self.BUCKETS - 1)
+
+    def summary(self):
+        total = self.total
+        if not total:
+            return "no samples"
+        p50, p99, worst = self.percentile_us(0.5), self.percentile_us(0.99), self.percentile_us(1.0)
+        return f"n={total} p50<{_format_us(p50)} p99<{_format_us(p99)} max<{_format_us(worst)}"
+
+    def format(self, width=40):
+        """Multi-line text histogram of the non-empty bucket range."""
+        counts = list(self.counts)
+        used = [i for i, count in enumerate(counts) if count]
+        if not used:
+            return "no samples"
+        peak = max(counts)
+        lines = []
+        for i in range(used[0], used[-1] + 1):
+            low = f"{_format_us(self.bucket_upper_us(i - 1)) if i else '0'}"
+            label = f"≥{low}" if i == self.BUCKETS - 1 else f"{low}–{_format_us(self.bucket_upper_us(i))}"
+            bar = "#" * (round(width * counts[i] / peak) if counts[i] else 0)
+            lines.append(f"{label:>15} {counts[i]:>8}  {bar}")
+        return "\n".join(lines)
+
+
+def _format_us(us):
+    if us >= 1_000_000:
+        return f"{us / 1e6:g}s"
+    if us >= 1000:
+        return f"{us / 1000:g}ms"
+    return f"{us}µs"
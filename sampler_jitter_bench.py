@@ -0,0 +1,134 @@
+"""
+Echo-timing jitter of the continuous sampler: thread vs. process, camera on vs. off.
+
+Pings a fixed target back to back with sensor.ContinuousSampler (a thread in
+this interpreter) and sensor.ProcessSampler (its own process), each with and
+without a camera load — threads running the standard capture pipeline
+(camera.build_frame_pipeline: decode, crop, CLAHE, quality metrics, JPEG
+encode) over the test images as fast as they can.  With a fixed target every
+ping should time the same echo, so a ping's deviation from the run's median,
+expressed as echo time, is the scheduling/GIL jitter that reached it.
+
+Without --hardware the sensor is fake_gpio.FakeJSNSR04GPIO on the real clock,
+whose edge callbacks fire from a thread like RPi.GPIO's event thread.  With
+--hardware it is the real JSN-SR04; point it at something that does not move.
+
+Usage:
+    python sampler_jitter_bench.py                       # fake sensor, 20 s per run
+    python sampler_jitter_bench.py --backend poll --seconds 30
+    python sampler_jitter_bench.py --hardware --camera-threads 2
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# One centimetre of distance is two centimetres of echo path.
+_US_PER_CM = 2.0 / 34300.0 * 1e6
+
+
+def _install_fake_gpio(distance_cm):
+    from config import SENSOR_ECHO_PIN, SENSOR_TRIG_PIN
+    from fake_gpio import FakeJSNSR04GPIO
+
+    fake = FakeJSNSR04GPIO(trig_pin=SENSOR_TRIG_PIN, echo_pin=SENSOR_ECHO_PIN, distance_cm=distance_cm)
+    sys.modules["RPi"] = SimpleNamespace(GPIO=fake)
+    sys.modules["RPi.GPIO"] = fake
+    os.environ["MOCK_MODE"] = "false"
+
+
+def _camera_load(stop, frames):
+    from camera import build_frame_pipeline
+
+    pipeline = build_frame_pipeline()
+    processed = 0
+    while not stop.is_set():
+        pipeline.process_bytes(frames[processed % len(frames)])
+        processed += 1
+
+
+def _load_frames(directory):
+    frames = [p.read_bytes() for p in sorted(Path(directory).rglob("*.jpg"))]
+    if not frames:
+        raise SystemExit(f"No .jpg frames under '{directory}/' for the camera load")
+    return frames
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _run(sensor, sampler_cls, seconds, camera_threads, frames):
+    sampler = sampler_cls(
+        sensor._read_single_distance_cm, buffer_size=100_000, window_s=1e9, interval_s=0.0, min_valid=1
+    )
+    # Fork the sampler before any load thread exists.
+    sampler.start()
+    stop = threading.Event()
+    load = [
+        threading.Thread(target=_camera_load, args=(stop, frames), daemon=True)
+        for _ in range(camera_threads)
+    ]
+    for t in load:
+        t.start()
+    try:
+        time.sleep(seconds)
+        samples = sampler.window_samples(time.monotonic())
+        pings, errors = sampler.pings, sampler.errors
+    finally:
+        stop.set()
+        for t in load:
+            t.join()
+        sampler.stop()
+    return [cm for _, cm in samples], pings, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure sampler echo-timing jitter")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duration of each run (default: 20)")
+    parser.add_argument("--backend", choices=("edge", "poll"), help="Echo backend (default: SENSOR_ECHO_BACKEND)")
+    parser.add_argument("--camera-threads", type=int, default=1, help="Pipeline threads for the camera load")
+    parser.add_argument("--images", default="test_images", help="Frames for the camera load")
+    parser.add_argument("--distance-cm", type=float, default=150.0, help="Fake sensor target distance")
+    parser.add_argument("--hardware", action="store_true", help="Use the real sensor via RPi.GPIO")
+    args = parser.parse_args()
+
+    if not args.hardware:
+        _install_fake_gpio(args.distance_cm)
+    import sensor
+
+    if not sensor.GPIO_AVAILABLE or sensor.MOCK:
+        raise SystemExit("RPi.GPIO is not available (drop --hardware to use the fake sensor)")
+    if args.backend:
+        sensor.ECHO_BACKEND = args.backend
+    frames = _load_frames(args.images)
+
+    print(f"echo backend={sensor.ECHO_BACKEND}  {args.seconds:g}s per run  jitter = |ping - median| as echo time")
+    print(
+        f"{'sampler':>8}  {'camera':>6}  {'pings':>6}  {'errors':>6}  "
+        f"{'p50 µs':>8}  {'p95 µs':>8}  {'p99 µs':>8}  {'max µs':>8}  {'stdev cm':>8}"
+    )
+    # Process runs first: the fork must happen before this interpreter has
+    # started RPi.GPIO's edge thread (see sensor.ProcessSampler).
+    for label, sampler_cls in (("process", sensor.ProcessSampler), ("thread", sensor.ContinuousSampler)):
+        for camera_threads in (0, args.camera_threads):
+            distances, pings, errors = _run(sensor, sampler_cls, args.seconds, camera_threads, frames)
+            if len(distances) < 2:
+                print(f"{label:>8}  {'on' if camera_threads else 'off':>6}  {pings:>6}  {errors:>6}  no valid pings")
+                continue
+            median = statistics.median(distances)
+            jitter = sorted(abs(d - median) * _US_PER_CM for d in distances)
+            print(
+                f"{label:>8}  {'on' if camera_threads else 'off':>6}  {pings:>6}  {errors:>6}  "
+                f"{_percentile(jitter, 0.50):>8.1f}  {_percentile(jitter, 0.95):>8.1f}  "
+                f"{_percentile(jitter, 0.99):>8.1f}  {jitter[-1]:>8.1f}  {statistics.stdev(distances):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
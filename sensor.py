@@ -3,21 +3,41 @@ import time
 import random
 import statistics
 import logging
+import multiprocessing
+import signal
+import threading
+from collections import deque
+from typing import NamedTuple
 
 from config import (
     SENSOR_ECHO_PIN,
     SENSOR_TRIG_PIN,
     SENSOR_TIMEOUT_S,
+    SENSOR_ECHO_BACKEND,
     SENSOR_BURST_SAMPLES,
     SENSOR_BURST_MIN_VALID,
     SENSOR_BURST_SAMPLE_DELAY_S,
+    SENSOR_BURST_ADAPTIVE,
+    SENSOR_BURST_TOLERANCE_CM,
+    SENSOR_BURST_MAX_SAMPLES,
+    SENSOR_SIGNAL_DISPERSION_FULL_SCALE_CM,
     SENSOR_TEMPERATURE_C,
+    SENSOR_CONTINUOUS_WINDOW_S,
+    SENSOR_CONTINUOUS_BUFFER_SIZE,
+    SENSOR_CONTINUOUS_MAX_AGE_S,
+    SENSOR_CONTINUOUS_PROCESS,
+    SENSOR_RT_POLICY,
+    SENSOR_RT_PRIORITY,
+    SENSOR_CPU_AFFINITY,
+    SENSOR_MLOCKALL,
     RISK_LED_CRITICAL_PIN,
     RISK_LED_WARNING_PIN,
     RISK_LED_SAFE_PIN,
     RISK_FALLBACK_SAFE_ABOVE_CM,
     RISK_FALLBACK_WARNING_ABOVE_CM,
 )
+from realtime import JitterHistogram, apply_realtime
+from shm_ring import PING_OK, PING_OUT_OF_RANGE, PING_TIMEOUT, PING_ERROR, SharedPingRing
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +65,7 @@ TRIG = SENSOR_TRIG_PIN
 ECHO = SENSOR_ECHO_PIN
 TIMEOUT = float(SENSOR_TIMEOUT_S)
 MAX_RETRIES = 3  # Retry count before giving up
+ECHO_BACKEND = SENSOR_ECHO_BACKEND
 
 # Initialize GPIO once at module level (only if not in mock mode)
 gpio_initialized = False
@@ -115,6 +136,117 @@ def _init_gpio():
         print("[GPIO] Initialized successfully")
 
 
+class _EdgeEchoTimer:
+    """Time ECHO pulses from RPi.GPIO edge callbacks instead of busy-waiting.
+
+    Both edges are timestamped with time.perf_counter_ns() in RPi.GPIO's
+    event thread; the reading thread sleeps on an Event meanwhile, so a
+    ranging cycle costs almost no CPU and does not hold the GIL.
+    """
+
+    def __init__(self, gpio, pin):
+        self._gpio = gpio
+        self._pin = pin
+        self._lock = threading.Lock()
+        self._armed = False
+        self._rise_ns = None
+        self._fall_ns = None
+        self._rose = threading.Event()
+        self._fell = threading.Event()
+        gpio.add_event_detect(pin, gpio.BOTH, callback=self._on_edge)
+
+    def arm(self):
+        """Prepare for the next pulse; call before sending the trigger."""
+        with self._lock:
+            self._rise_ns = self._fall_ns = None
+            self._rose.clear()
+            self._fell.clear()
+            self._armed = True
+
+    def _on_edge(self, _channel):
+        now = time.perf_counter_ns()
+        with self._lock:
+            if not self._armed:
+                return
+            # Edges alternate, so order is more reliable than re-reading the
+            # pin level, which a short pulse may already have changed.
+            if self._rise_ns is None:
+                self._rise_ns = now
+                self._rose.set()
+            else:
+                self._fall_ns = now
+                self._armed = False
+                self._fell.set()
+
+    def wait_pulse_s(self, timeout_s):
+        """Return the armed pulse's width in seconds; raise TimeoutError."""
+        try:
+            if not self._rose.wait(timeout_s):
+                raise TimeoutError("Timeout waiting for echo HIGH")
+            if not self._fell.wait(timeout_s):
+                raise TimeoutError("Timeout waiting for echo LOW")
+            return (self._fall_ns - self._rise_ns) / 1e9
+        finally:
+            with self._lock:
+                self._armed = False
+
+    def close(self):
+        self._gpio.remove_event_detect(self._pin)
+
+
+_edge_timer = None
+_edge_backend_failed = False
+
+# How late the pinging thread wakes from the pre-trigger settle sleep.  The
+# counts live in shared memory so a forked ProcessSampler records into the
+# same histogram the main process reports.
+ping_jitter = JitterHistogram(multiprocessing.RawArray("Q", JitterHistogram.BUCKETS))
+
+
+def configure_sensor_worker():
+    """Apply the SENSOR_RT_* / SENSOR_CPU_AFFINITY / SENSOR_MLOCKALL settings.
+
+    Call from the thread (or process) that pings the sensor; returns the
+    list of controls that took effect.
+    """
+    applied = apply_realtime(SENSOR_RT_POLICY, SENSOR_RT_PRIORITY, SENSOR_CPU_AFFINITY, SENSOR_MLOCKALL)
+    if applied:
+        print(f"[SENSOR] Real-time controls for {threading.current_thread().name}: {', '.join(applied)}")
+    return applied
+
+
+def _get_edge_timer(GPIO):
+    """Return the shared edge timer, or None when polling should be used."""
+    global _edge_timer, _edge_backend_failed
+    if ECHO_BACKEND != "edge" or _edge_backend_failed:
+        return None
+    if _edge_timer is None:
+        try:
+            _edge_timer = _EdgeEchoTimer(GPIO, ECHO)
+        except Exception as e:
+            _edge_backend_failed = True
+            print(f"[SENSOR] Edge detection unavailable on GPIO {ECHO} ({e}); falling back to polling")
+            return None
+    return _edge_timer
+
+
+def _poll_echo_pulse_s(GPIO):
+    """Busy-wait on the ECHO pin and return the pulse width in seconds."""
+    # Wait for ECHO to go HIGH (pulse start)
+    timeout_start = time.monotonic()
+    while GPIO.input(ECHO) == 0:
+        if time.monotonic() - timeout_start > TIMEOUT:
+            raise TimeoutError("Timeout waiting for echo HIGH")
+    pulse_start = time.monotonic()
+
+    # Wait for ECHO to go LOW (pulse end)
+    timeout_start = time.monotonic()
+    while GPIO.input(ECHO) == 1:
+        if time.monotonic() - timeout_start > TIMEOUT:
+            raise TimeoutError("Timeout waiting for echo LOW")
+    return time.monotonic() - pulse_start
+
+
 def _read_single_distance_cm():
     """Read a single ultrasonic distance sample in cm.
 
@@ -138,26 +270,22 @@ def _read_single_distance_cm():
     # before sending the 10µs trigger pulse. A microsecond-scale sleep is not
     # reliable in Python; 60ms is a conservative delay for JSN-SR04 sensors.
     GPIO.output(TRIG, False)
+    settle_start = time.monotonic()
     time.sleep(0.06)
+    ping_jitter.record(max(0.0, time.monotonic() - settle_start - 0.06))
+    edge_timer = _get_edge_timer(GPIO)
+    if edge_timer is not None:
+        edge_timer.arm()
     GPIO.output(TRIG, True)
     time.sleep(0.00001)  # 10 microseconds
     GPIO.output(TRIG, False)
 
-    # Wait for ECHO to go HIGH (pulse start)
-    timeout_start = time.monotonic()
-    while GPIO.input(ECHO) == 0:
-        if time.monotonic() - timeout_start > TIMEOUT:
-            raise TimeoutError("Timeout waiting for echo HIGH")
-    pulse_start = time.monotonic()
-
-    # Wait for ECHO to go LOW (pulse end)
-    timeout_start = time.monotonic()
-    while GPIO.input(ECHO) == 1:
-        if time.monotonic() - timeout_start > TIMEOUT:
-            raise TimeoutError("Timeout waiting for echo LOW")
-    pulse_end = time.monotonic()
+    if edge_timer is not None:
+        pulse_s = edge_timer.wait_pulse_s(TIMEOUT)
+    else:
+        pulse_s = _poll_echo_pulse_s(GPIO)
 
-    distance_cm = _pulse_duration_to_cm(pulse_end - pulse_start, SENSOR_TEMPERATURE_C)
+    distance_cm = _pulse_duration_to_cm(pulse_s, SENSOR_TEMPERATURE_C)
 
     # Sanity check: JSN-SR04 valid range is 20 cm – 600 cm
     if not (20.0 <= distance_cm <= 600.0):
@@ -183,6 +311,25 @@ def water_level_to_risk_score(distance_cm):
     return 80
 
 
+def predicted_risk_score(estimate, lookahead_s):
+    """Risk score for a LevelEstimate, escalated by where the water is heading.
+
+    Returns the higher of the current tier and the tier the level will reach
+    within *lookahead_s* seconds, i.e. a tier is raised as soon as the
+    predicted time-to-threshold drops below the lookahead.  The projection
+    uses the rise rate minus two standard deviations, so a rate the tracker
+    cannot yet tell apart from noise never escalates.
+    """
+    if estimate is None:
+        return None
+    score = water_level_to_risk_score(estimate.distance_cm)
+    rate_cm_min = estimate.rise_rate_cm_min - 2.0 * estimate.rise_rate_std_cm_min
+    if lookahead_s <= 0 or rate_cm_min <= 0:
+        return score
+    projected = estimate.distance_cm - rate_cm_min * lookahead_s / 60.0
+    return max(score, water_level_to_risk_score(projected))
+
+
 def update_risk_led(combined_risk_score):
     """Set risk-state LEDs based on combined risk score.
 
@@ -250,21 +397,286 @@ def update_risk_led(combined_risk_score):
 _init_gpio()
 
 
-def get_water_level():
-    """Read water level from JSN-SR04 ultrasonic sensor."""
+class WaterLevelReading(NamedTuple):
+    """A water-level estimate and how it was obtained."""
+
+    distance_cm: float
+    samples: int  # valid pings behind the median
+    age_s: float  # seconds since the newest of those pings
+    dispersion_cm: float = 0.0  # median absolute deviation of those pings
+
+
+def _median_abs_deviation(values, center):
+    return statistics.median(abs(v - center) for v in values)
+
+
+def dispersion_to_signal_strength(dispersion_cm):
+    """Map reading dispersion to a 0–100 signal strength (0 cm → 100)."""
+    if dispersion_cm is None:
+        return 0
+    scale = SENSOR_SIGNAL_DISPERSION_FULL_SCALE_CM
+    return int(round(100.0 * max(0.0, 1.0 - dispersion_cm / scale)))
+
+
+class ContinuousSampler:
+    """Free-running ranging thread feeding a ring buffer of timestamped pings.
+
+    read_fn() performs one ping and returns cm (None for out-of-range); it
+    may raise TimeoutError.  latest() is non-blocking: it returns the median
+    of the valid pings from the last *window_s* seconds.  *worker_setup*, if
+    given, runs first on the sampler thread (e.g. configure_sensor_worker).
+    """
+
+    def __init__(self, read_fn, buffer_size=64, window_s=1.0, interval_s=0.06, min_valid=3, worker_setup=None):
+        self._read_fn = read_fn
+        self._worker_setup = worker_setup
+        self._buffer = deque(maxlen=max(1, int(buffer_size)))
+        self._lock = threading.Lock()
+        self.window_s = float(window_s)
+        self.interval_s = max(0.0, float(interval_s))
+        self.min_valid = max(1, int(min_valid))
+        self._stop = threading.Event()
+        self._thread = None
+        self.pings = 0
+        self.errors = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor_sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self):
+        if self._worker_setup is not None:
+            self._worker_setup()
+        while not self._stop.is_set():
+            try:
+                distance_cm = self._read_fn()
+            except TimeoutError:
+                distance_cm = None
+                self.errors += 1
+            except Exception as e:
+                distance_cm = None
+                self.errors += 1
+                logger.debug(f"[SENSOR] Sampler ping error: {e}")
+            self.add(distance_cm)
+            self._stop.wait(self.interval_s)
+
+    def add(self, distance_cm, timestamp=None):
+        with self._lock:
+            self._buffer.append((time.monotonic() if timestamp is None else timestamp, distance_cm))
+            self.pings += 1
+
+    def window_samples(self, now):
+        """Valid (timestamp, cm) pings from the last window_s seconds, oldest first."""
+        with self._lock:
+            return [
+                (ts, cm) for ts, cm in self._buffer
+                if cm is not None and now - ts <= self.window_s
+            ]
+
+    def latest(self, max_age_s=None):
+        """Return a WaterLevelReading for the current window, or None."""
+        now = time.monotonic()
+        return _window_reading(self.window_samples(now), now, self.min_valid, max_age_s)
+
+
+def _window_reading(window, now, min_valid, max_age_s):
+    """Median/MAD WaterLevelReading over oldest-first (timestamp, cm) pings."""
+    if len(window) < min_valid:
+        return None
+    age_s = now - window[-1][0]
+    if max_age_s is not None and age_s > max_age_s:
+        return None
+    values = [cm for _, cm in window]
+    median_value = statistics.median(values)
+    return WaterLevelReading(
+        round(median_value, 2),
+        len(values),
+        age_s,
+        round(_median_abs_deviation(values, median_value), 3),
+    )
+
+
+def _sampler_process_main(read_fn, ring, interval_s, stop, worker_setup=None):
+    """Body of the ProcessSampler child: ping until *stop* is set."""
+    # Ctrl+C and SIGTERM are handled by the parent, which stops us via *stop*;
+    # never run its inherited handlers (snapshot saving etc.) in here.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if worker_setup is not None:
+        worker_setup()
+    while not stop.is_set():
+        status = PING_OK
+        try:
+            distance_cm = read_fn()
+            if distance_cm is None:
+                status = PING_OUT_OF_RANGE
+        except TimeoutError:
+            distance_cm, status = None, PING_TIMEOUT
+        except Exception:
+            distance_cm, status = None, PING_ERROR
+        ring.publish(time.monotonic(), distance_cm, status)
+        stop.wait(interval_s)
+
+
+class ProcessSampler:
+    """ContinuousSampler running in its own process.
+
+    Pinging from a separate interpreter keeps the echo timing clear of the
+    GIL and of OpenCV work in the camera thread.  The child publishes every
+    ping to a shm_ring.SharedPingRing and latest() computes the windowed
+    median straight from the shared block, so readings never cross a pipe.
+
+    The child is forked, so it inherits the initialised GPIO and *read_fn*
+    needs no pickling.  Start it before the first ping and before other
+    threads: RPi.GPIO's edge-detection thread does not survive a fork.
+    """
+
+    def __init__(self, read_fn, buffer_size=64, window_s=1.0, interval_s=0.06, min_valid=3, worker_setup=None):
+        self._read_fn = read_fn
+        self._worker_setup = worker_setup
+        self.buffer_size = max(1, int(buffer_size))
+        self.window_s = float(window_s)
+        self.interval_s = max(0.0, float(interval_s))
+        self.min_valid = max(1, int(min_valid))
+        self._ctx = multiprocessing.get_context("fork")
+        self._stop = self._ctx.Event()
+        self._process = None
+        self._ring = None
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def pings(self):
+        return self._ring.published if self._ring is not None else 0
+
+    @property
+    def errors(self):
+        return self._ring.errors if self._ring is not None else 0
+
+    def start(self):
+        if self.running:
+            return self
+        if self._ring is None:
+            self._ring = SharedPingRing.create(self.buffer_size)
+        self._stop.clear()
+        self._process = self._ctx.Process(
+            target=_sampler_process_main,
+            args=(self._read_fn, self._ring, self.interval_s, self._stop, self._worker_setup),
+            name="sensor_sampler",
+            daemon=True,
+        )
+        self._process.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._process is not None:
+            self._process.join(timeout=timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=timeout)
+            self._process = None
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    def window_samples(self, now):
+        """Valid (timestamp, cm) pings from the last window_s seconds, oldest first."""
+        if self._ring is None:
+            return []
+        window = []
+        for ts, cm, status in self._ring.iter_newest():
+            if now - ts > self.window_s:
+                break
+            if status == PING_OK:
+                window.append((ts, cm))
+        window.reverse()
+        return window
+
+    def latest(self, max_age_s=None):
+        """Return a WaterLevelReading for the current window, or None."""
+        now = time.monotonic()
+        return _window_reading(self.window_samples(now), now, self.min_valid, max_age_s)
+
+
+_sampler = None
+
+
+def start_continuous_sampler():
+    """Start the background sampler (real hardware only); returns it or None."""
+    global _sampler
     if MOCK or not GPIO_AVAILABLE:
-        # Generate realistic mock water level data (9.5-20.5 cm range)
-        base_level = 12.5
-        variation = random.uniform(-3.0, 8.0)
-        mock_level = round(base_level + variation, 2)
-        print(f"[MOCK] Generated water level: {mock_level} cm")
-        return mock_level
+        return None
+    if _sampler is None:
+        sampler_cls = ProcessSampler if SENSOR_CONTINUOUS_PROCESS else ContinuousSampler
+        _sampler = sampler_cls(
+            _read_single_distance_cm,
+            buffer_size=SENSOR_CONTINUOUS_BUFFER_SIZE,
+            window_s=SENSOR_CONTINUOUS_WINDOW_S,
+            interval_s=SENSOR_BURST_SAMPLE_DELAY_S,
+            min_valid=SENSOR_BURST_MIN_VALID,
+            worker_setup=configure_sensor_worker,
+        )
+    _sampler.start()
+    print(
+        f"[SENSOR] Continuous ranging started — window={SENSOR_CONTINUOUS_WINDOW_S}s "
+        f"buffer={SENSOR_CONTINUOUS_BUFFER_SIZE} "
+        f"({'own process' if SENSOR_CONTINUOUS_PROCESS else 'thread'})"
+    )
+    return _sampler
+
 
+def stop_continuous_sampler():
+    if _sampler is not None:
+        _sampler.stop()
+
+
+def _mock_reading():
+    # Generate realistic mock water level data (9.5-20.5 cm range)
+    base_level = 12.5
+    variation = random.uniform(-3.0, 8.0)
+    mock_level = round(base_level + variation, 2)
+    print(f"[MOCK] Generated water level: {mock_level} cm")
+    return WaterLevelReading(mock_level, 1, 0.0)
+
+
+def _burst_sample_limits():
+    """Return (min_valid, nominal, cap) sample counts for one burst."""
     min_valid = min(SENSOR_BURST_MIN_VALID, SENSOR_BURST_SAMPLES)
+    if not SENSOR_BURST_ADAPTIVE:
+        return min_valid, SENSOR_BURST_SAMPLES, SENSOR_BURST_SAMPLES
+    return min_valid, SENSOR_BURST_SAMPLES, max(SENSOR_BURST_SAMPLES, SENSOR_BURST_MAX_SAMPLES)
+
+
+def _burst_reading():
+    """Block for a burst of pings and return their median (None on failure).
+
+    Adaptive bursts stop once at least min_valid pings agree to within
+    SENSOR_BURST_TOLERANCE_CM and extend past SENSOR_BURST_SAMPLES (up to
+    SENSOR_BURST_MAX_SAMPLES) while they still disagree.
+    """
+    min_valid, nominal, cap = _burst_sample_limits()
 
     for attempt in range(1, MAX_RETRIES + 1):
         samples = []
-        for sample_idx in range(SENSOR_BURST_SAMPLES):
+        dispersion = None
+        for sample_idx in range(cap):
             try:
                 distance_cm = _read_single_distance_cm()
                 if distance_cm is not None:
@@ -276,19 +688,58 @@ def get_water_level():
             except Exception as e:
                 print(f"[SENSOR] Error (burst {attempt} sample {sample_idx + 1}): {e}")
 
-            if sample_idx < SENSOR_BURST_SAMPLES - 1:
+            pings = sample_idx + 1
+            if len(samples) >= min_valid:
+                dispersion = _median_abs_deviation(samples, statistics.median(samples))
+                if SENSOR_BURST_ADAPTIVE and dispersion <= SENSOR_BURST_TOLERANCE_CM:
+                    break  # Readings agree — stop early.
+            # Past the nominal size only keep going while a usable-but-noisy
+            # burst could still settle; hopeless bursts are retried instead.
+            if pings >= nominal and len(samples) + (cap - pings) < min_valid:
+                break
+
+            if pings < cap:
                 time.sleep(SENSOR_BURST_SAMPLE_DELAY_S)
 
         if len(samples) >= min_valid:
             median_value = statistics.median(samples)
-            return round(median_value, 2)
+            return WaterLevelReading(
+                round(median_value, 2), len(samples), 0.0, round(dispersion, 3)
+            )
 
         print(
             f"[SENSOR] Burst {attempt} insufficient valid readings "
-            f"(valid={len(samples)}/{SENSOR_BURST_SAMPLES}), retrying..."
+            f"(valid={len(samples)}/{nominal}), retrying..."
         )
         if attempt < MAX_RETRIES:
             time.sleep(0.1)
 
     print(f"[SENSOR] All {MAX_RETRIES} attempts failed. Returning None.")
     return None
+
+
+def get_water_level_reading():
+    """Return a WaterLevelReading, or None if no valid estimate is available.
+
+    With the continuous sampler running this returns immediately with the
+    current windowed median; otherwise it blocks for a burst.
+    """
+    if MOCK or not GPIO_AVAILABLE:
+        return _mock_reading()
+
+    if _sampler is not None and _sampler.running:
+        reading = _sampler.latest(max_age_s=SENSOR_CONTINUOUS_MAX_AGE_S or None)
+        if reading is None:
+            print(
+                f"[SENSOR] No fresh readings in the last {SENSOR_CONTINUOUS_WINDOW_S}s "
+                f"(pings={_sampler.pings} errors={_sampler.errors})"
+            )
+        return reading
+
+    return _burst_reading()
+
+
+def get_water_level():
+    """Read water level (cm) from the JSN-SR04 ultrasonic sensor."""
+    reading = get_water_level_reading()
+    return reading.distance_cm if reading is not None else None
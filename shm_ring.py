@@ -0,0 +1,135 @@
+"""Single-writer ring buffer of ultrasonic pings in shared memory.
+
+Lets the sampler process (sensor.ProcessSampler) publish pings that the main
+process reads in place — no pipe, no pickling, no lock.  One process writes,
+any number read.
+
+Layout of the shared block (native byte order, 8-byte aligned):
+
+    header     Q capacity, Q published (pings written so far), Q errors, Q spare
+    stamps     Q[capacity]  per-slot sequence stamp
+    timestamp  d[capacity]  time.monotonic() of the ping (system-wide clock)
+    distance   d[capacity]  cm, NaN when the ping produced no distance
+    status     B[capacity]  PING_* code
+
+Each slot is guarded by its stamp, seqlock style: the writer sets it to
+``2 * seq + 1`` before touching the fields and ``2 * seq + 2`` after, then
+bumps ``published``.  A reader accepts slot ``seq`` only if the stamp reads
+``2 * seq + 2`` both before and after it copies the three fields, so a
+record being overwritten is dropped instead of returned half-written.
+CPython gives no cross-process memory-ordering guarantee, so on weakly
+ordered CPUs this narrows rather than closes the window for a torn record;
+at worst that is one bad ping, which the windowed median absorbs.
+"""
+
+import math
+from multiprocessing import shared_memory
+
+PING_OK = 0
+PING_OUT_OF_RANGE = 1
+PING_TIMEOUT = 2
+PING_ERROR = 3
+
+_HEADER_WORDS = 4
+_CAPACITY, _PUBLISHED, _ERRORS = 0, 1, 2
+
+
+def _block_size(capacity):
+    return 8 * _HEADER_WORDS + capacity * (8 + 8 + 8 + 1)
+
+
+class SharedPingRing:
+    """(timestamp, distance_cm, status) records in a SharedMemory block.
+
+    Create it in the parent with ``SharedPingRing.create(capacity)``; a forked
+    child can use the inherited object directly, any other process attaches
+    with ``SharedPingRing.attach(name)``.  Only one process may call publish().
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._owner = owner
+        buf = shm.buf
+        self._header = buf[: 8 * _HEADER_WORDS].cast("Q")
+        self.capacity = int(self._header[_CAPACITY])
+        offset = 8 * _HEADER_WORDS
+        cap = self.capacity
+        self._stamps = buf[offset: offset + 8 * cap].cast("Q")
+        offset += 8 * cap
+        self._timestamps = buf[offset: offset + 8 * cap].cast("d")
+        offset += 8 * cap
+        self._distances = buf[offset: offset + 8 * cap].cast("d")
+        offset += 8 * cap
+        self._statuses = buf[offset: offset + cap]
+
+    @classmethod
+    def create(cls, capacity):
+        capacity = max(1, int(capacity))
+        shm = shared_memory.SharedMemory(create=True, size=_block_size(capacity))
+        header = shm.buf[: 8 * _HEADER_WORDS].cast("Q")
+        header[_CAPACITY] = capacity
+        header.release()
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def published(self):
+        """Pings written so far (including ones already overwritten)."""
+        return int(self._header[_PUBLISHED])
+
+    @property
+    def errors(self):
+        """Pings that timed out or raised."""
+        return int(self._header[_ERRORS])
+
+    def publish(self, timestamp, distance_cm, status=PING_OK):
+        """Append one record (writer process only)."""
+        seq = self._header[_PUBLISHED]
+        i = seq % self.capacity
+        self._stamps[i] = 2 * seq + 1
+        self._timestamps[i] = timestamp
+        self._distances[i] = math.nan if distance_cm is None else distance_cm
+        self._statuses[i] = status
+        self._stamps[i] = 2 * seq + 2
+        if status in (PING_TIMEOUT, PING_ERROR):
+            self._header[_ERRORS] += 1
+        self._header[_PUBLISHED] = seq + 1
+
+    def iter_newest(self):
+        """Yield (timestamp, distance_cm, status), newest first.
+
+        Reads the shared block in place; stops at the first slot that is
+        being (or has been) overwritten, since every older slot is too.
+        ``distance_cm`` is None for pings without a distance.
+        """
+        end = self._header[_PUBLISHED]
+        stamps = self._stamps
+        for seq in range(end - 1, max(0, end - self.capacity) - 1, -1):
+            i = seq % self.capacity
+            expected = 2 * seq + 2
+            if stamps[i] != expected:
+                return
+            timestamp = self._timestamps[i]
+            distance_cm = self._distances[i]
+            status = self._statuses[i]
+            if stamps[i] != expected:
+                return
+            yield timestamp, (None if math.isnan(distance_cm) else distance_cm), status
+
+    def close(self):
+        """Release this process's mapping; the owner also removes the block."""
+        if self._shm is None:
+            return
+        for view in (self._header, self._stamps, self._timestamps, self._distances, self._statuses):
+            view.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
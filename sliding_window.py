@@ -0,0 +1,297 @@
+"""Incremental order statistics over a fixed-size sliding window.
+
+WaterLevelFilter needs the median, the median absolute deviation (MAD) and
+the mean of its accepted-sample window on every reading.  Recomputing them
+from scratch is O(n log n) per sample, which is fine for 7 samples but not
+for multi-minute windows at several readings per second.
+
+SlidingMedianWindow keeps the window twice: a deque in arrival order (for
+eviction) and a sorted copy for k-th lookups — an IndexableSkiplist for
+large windows, a bisect-maintained list below SKIPLIST_MIN_SIZE where its
+C-level memmove is cheaper than walking skiplist nodes.  Per sample (with
+the skiplist):
+
+  * append / evict        O(log n)  (list: O(log n) search + memmove)
+  * median                O(log n)  (O(1) on the list)
+  * MAD                   O(log² n) — the k-th smallest of two sorted
+                          deviation sequences, found by binary search
+  * mean                  O(1) from a running sum, re-summed from scratch
+                          every ``maxlen`` appends so float drift cannot
+                          accumulate
+
+Median and MAD are bit-for-bit identical to ``statistics.median`` over the
+same values; the mean matches ``sum(values) / len(values)`` to within float
+rounding.
+"""
+
+import bisect
+import math
+import random
+from collections import deque
+
+# Below this window size a plain sorted list (O(n) but C-level memmove on
+# insert and remove) beats the skiplist's Python-level pointer walking; see
+# filter_bench.py — the crossover is far beyond any realistic window.
+SKIPLIST_MIN_SIZE = 50_000
+# Up to this many values the MAD is cheapest as a plain sort of deviations.
+_DIRECT_MAD_MAX = 8
+
+
+class _Top:
+    """Sentinel that compares greater than every value."""
+
+    __slots__ = ()
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return other is self
+
+    def __gt__(self, other):
+        return other is not self
+
+    def __ge__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+class _Node:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, next_nodes, widths):
+        self.value = value
+        self.next = next_nodes
+        self.width = widths
+
+
+class IndexableSkiplist:
+    """Sorted multiset with O(log n) insert, remove, rank and k-th lookup.
+
+    Each link stores its width (how many bottom-level steps it skips) so
+    positions can be found by walking down the levels, after R. Hettinger's
+    indexable skiplist recipe.
+    """
+
+    def __init__(self, expected_size=100, seed=0x5EED):
+        self.size = 0
+        self.maxlevels = int(1 + math.log2(max(2, expected_size)))
+        self._rng = random.Random(seed)
+        self._nil = _Node(_TOP, [], [])
+        self.head = _Node(None, [self._nil] * self.maxlevels, [1] * self.maxlevels)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.size:
+            raise IndexError("skiplist index out of range")
+        node = self.head
+        i += 1
+        for level in reversed(range(self.maxlevels)):
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not self._nil:
+            yield node.value
+            node = node.next[0]
+
+    def rank(self, value):
+        """Number of stored values strictly less than *value*."""
+        node = self.head
+        count = 0
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value < value:
+                count += node.width[level]
+                node = node.next[level]
+        return count
+
+    def insert(self, value):
+        chain = [None] * self.maxlevels
+        steps_at_level = [0] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        depth = min(self.maxlevels, 1 - int(math.log2(1.0 - self._rng.random())))
+        new_node = _Node(value, [None] * depth, [None] * depth)
+        steps = 0
+        for level in range(depth):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(depth, self.maxlevels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        chain = [None] * self.maxlevels
+        node = self.head
+        for level in reversed(range(self.maxlevels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is self._nil or target.value != value:
+            raise KeyError(value)
+        depth = len(target.next)
+        for level in range(depth):
+            prev = chain[level]
+            prev.width[level] += prev.next[level].width[level] - 1
+            prev.next[level] = prev.next[level].next[level]
+        for level in range(depth, self.maxlevels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class _SortedList:
+    """Sorted multiset on a plain list; same interface as IndexableSkiplist."""
+
+    __slots__ = ("_items",)
+
+    def __init__(self):
+        self._items = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        return self._items[i]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def rank(self, value):
+        return bisect.bisect_left(self._items, value)
+
+    def insert(self, value):
+        bisect.insort(self._items, value)
+
+    def remove(self, value):
+        items = self._items
+        i = bisect.bisect_left(items, value)
+        if i == len(items) or items[i] != value:
+            raise KeyError(value)
+        del items[i]
+
+
+def _kth_deviation(s, median, below, n, k):
+    """k-th smallest (0-based) of ``|s[i] - median|`` over sorted *s*.
+
+    The deviations form two ascending sequences — ``median - s[below-1-i]``
+    leftwards of *below* (the rank of *median*) and ``s[below+j] - median``
+    rightwards — so the k-th is found by binary search over how many come
+    from the left one.
+    """
+    lo, hi = max(0, k + 1 - (n - below)), min(k + 1, below)
+    while lo < hi:
+        i = (lo + hi) // 2
+        if median - s[below - 1 - i] < s[below + k - i] - median:
+            lo = i + 1
+        else:
+            hi = i
+    i, j = lo, k + 1 - lo
+    if i == 0:
+        return s[below + j - 1] - median
+    if j == 0:
+        return median - s[below - i]
+    return max(median - s[below - i], s[below + j - 1] - median)
+
+
+class SlidingMedianWindow:
+    """Bounded FIFO window with incremental median, MAD and mean.
+
+    Behaves like ``deque(maxlen=maxlen)`` for append/extend/clear/iteration.
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = max(1, int(maxlen))
+        self._order = deque()
+        self._reset_sorted()
+        self._sum = 0.0
+        self._appends_since_resync = 0
+
+    def _reset_sorted(self):
+        if self.maxlen < SKIPLIST_MIN_SIZE:
+            self._sorted = _SortedList()
+            self._lookup = self._sorted._items  # index the list directly
+        else:
+            self._sorted = IndexableSkiplist(expected_size=self.maxlen)
+            self._lookup = self._sorted
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __repr__(self):
+        return f"SlidingMedianWindow({list(self._order)!r}, maxlen={self.maxlen})"
+
+    def append(self, value):
+        if len(self._order) == self.maxlen:
+            evicted = self._order.popleft()
+            self._sorted.remove(evicted)
+            self._sum -= evicted
+        self._order.append(value)
+        self._sorted.insert(value)
+        self._sum += value
+        self._appends_since_resync += 1
+        if self._appends_since_resync >= self.maxlen:
+            self._sum = sum(self._order)
+            self._appends_since_resync = 0
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def clear(self):
+        self._order.clear()
+        self._reset_sorted()
+        self._sum = 0.0
+        self._appends_since_resync = 0
+
+    def mean(self):
+        return self._sum / len(self._order)
+
+    def median(self):
+        n = len(self._sorted)
+        if n == 0:
+            raise ValueError("median of empty window")
+        s = self._lookup
+        mid = n // 2
+        if n % 2:
+            return s[mid]
+        return (s[mid - 1] + s[mid]) / 2
+
+    def mad(self, median=None):
+        """Median absolute deviation from *median* (computed if omitted)."""
+        n = len(self._sorted)
+        if n == 0:
+            raise ValueError("MAD of empty window")
+        if median is None:
+            median = self.median()
+        if n <= _DIRECT_MAD_MAX:
+            devs = sorted([abs(x - median) for x in self._order])
+            mid = n // 2
+            return devs[mid] if n % 2 else (devs[mid - 1] + devs[mid]) / 2
+        below = self._sorted.rank(median)
+        s = self._lookup
+        mid = n // 2
+        upper = _kth_deviation(s, median, below, n, mid)
+        if n % 2:
+            return upper
+        lower = _kth_deviation(s, median, below, n, mid - 1)
+        return (lower + upper) / 2
@@ -0,0 +1,269 @@
+"""Durable store-and-forward spool for readings and frames during outages.
+
+Items that could not be delivered (sensor readings, frame references) are
+written to a SQLite database in WAL mode and replayed, oldest timestamp
+first, once connectivity returns.
+
+SD cards wear out under many small writes, so puts are buffered in memory
+and committed in one transaction per ``flush_batch`` items or every
+``flush_interval_s`` seconds, whichever comes first.  Items still in the
+buffer are lost if the process is killed hard; close() flushes them on a
+normal shutdown.
+
+Each kind has an optional row cap; when exceeded the oldest rows are
+evicted.  Frames are stored as a reference (path + metadata); live frames
+that only exist in memory are first written under ``<dir>/files`` via
+store_file() and that copy is deleted together with its row.  Copies
+whose row never reached the disk are removed when the spool is opened.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind    TEXT NOT NULL,
+    ts      REAL NOT NULL,
+    payload TEXT NOT NULL,
+    file    TEXT
+);
+CREATE INDEX IF NOT EXISTS spool_kind_ts ON spool (kind, ts, id);
+"""
+
+
+class Spool:
+    """SQLite-backed FIFO (by timestamp) with batched writes and per-kind caps."""
+
+    def __init__(self, directory, max_rows=None, flush_batch=20, flush_interval_s=30.0):
+        self.directory = Path(directory)
+        self.files_dir = self.directory / "files"
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.max_rows = dict(max_rows or {})
+        self.flush_batch = max(1, int(flush_batch))
+        self.flush_interval_s = max(0.0, float(flush_interval_s))
+
+        self._lock = threading.Lock()
+        self._pending = []  # (temp_id, kind, ts, payload_json, file)
+        self._pending_since = None
+        self._next_temp_id = -1
+        self._peeked = set()  # temp ids handed out by peek() and not yet acked
+        self._flushed_ids = {}  # peeked temp id → row id once flushed
+        self._db = sqlite3.connect(str(self.directory / "spool.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+        self.flushes = 0
+        self.evicted = 0
+        self._remove_orphan_files()
+
+    def _remove_orphan_files(self):
+        """Delete files under files_dir that no row references.
+
+        store_file() writes at once but its row is buffered, so a hard kill
+        in between leaves a file nothing would ever remove.
+        """
+        referenced = {
+            os.path.basename(file)
+            for (file,) in self._db.execute("SELECT file FROM spool WHERE file IS NOT NULL")
+        }
+        removed = 0
+        for entry in self.files_dir.iterdir():
+            if entry.is_file() and entry.name not in referenced:
+                try:
+                    entry.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        if removed:
+            logger.warning(f"[SPOOL] Removed {removed} orphaned file(s) from '{self.files_dir}'")
+
+    # ── Writing ─────────────────────────────────────────────────────────────
+
+    def store_file(self, data, name):
+        """Persist *data* under the spool's files directory; return its path.
+
+        Every copy gets a unique prefix, so repeated failures of the same
+        frame name (static test images) never share, and on ack delete, one
+        file.
+        """
+        path = self.files_dir / f"{uuid.uuid4().hex[:12]}_{Path(name).name}"
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return str(path)
+
+    def put(self, kind, payload, ts=None, file=None):
+        """Buffer one item; commits to disk when the batch is full or old."""
+        with self._lock:
+            now = time.time()
+            self._pending.append(
+                (self._next_temp_id, kind, now if ts is None else float(ts), json.dumps(payload), file)
+            )
+            self._next_temp_id -= 1
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            if self._flush_due_locked():
+                self._flush_locked()
+
+    def _flush_due_locked(self):
+        if len(self._pending) >= self.flush_batch:
+            return True
+        return (
+            self._pending_since is not None
+            and time.monotonic() - self._pending_since >= self.flush_interval_s
+        )
+
+    def maybe_flush(self):
+        with self._lock:
+            if self._pending and self._flush_due_locked():
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_since = self._pending, [], None
+        with self._db:
+            for temp_id, *row in pending:
+                cursor = self._db.execute("INSERT INTO spool (kind, ts, payload, file) VALUES (?, ?, ?, ?)", row)
+                if temp_id in self._peeked:
+                    self._peeked.discard(temp_id)
+                    self._flushed_ids[temp_id] = cursor.lastrowid
+            for kind in {row[1] for row in pending}:
+                self._enforce_cap_locked(kind)
+        self.flushes += 1
+
+    def _enforce_cap_locked(self, kind):
+        cap = self.max_rows.get(kind)
+        if not cap:
+            return
+        (count,) = self._db.execute("SELECT COUNT(*) FROM spool WHERE kind = ?", (kind,)).fetchone()
+        excess = count - cap
+        if excess <= 0:
+            return
+        rows = self._db.execute(
+            "SELECT id, file FROM spool WHERE kind = ? ORDER BY ts, id LIMIT ?", (kind, excess)
+        ).fetchall()
+        self._delete_locked(rows)
+        self.evicted += len(rows)
+        logger.warning(f"[SPOOL] Cap of {cap} {kind} item(s) reached — evicted {len(rows)} oldest")
+
+    # ── Reading / acknowledging ─────────────────────────────────────────────
+
+    def peek(self, kind, limit=1):
+        """Return up to *limit* of the oldest ``(id, payload)`` items of *kind*.
+
+        Buffered items are included without committing them (so a replay
+        backlog does not defeat write batching); they carry a temporary
+        negative id that update() and ack() accept before and after the
+        next flush.
+        """
+        limit = int(limit)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ts, id, payload FROM spool WHERE kind = ? ORDER BY ts, id LIMIT ?",
+                (kind, limit),
+            ).fetchall()
+            # Stable sort: stored rows win ties, buffered ones keep put() order.
+            buffered = [(ts, temp_id, payload) for temp_id, k, ts, payload, _ in self._pending if k == kind]
+            merged = sorted(rows + buffered, key=lambda row: row[0])[:limit]
+            self._peeked.update(item_id for _, item_id, _ in merged if item_id < 0)
+        return [(item_id, json.loads(payload)) for _, item_id, payload in merged]
+
+    def _split_ids_locked(self, ids):
+        """Map peeked ids to (row ids in the db, temp ids still buffered)."""
+        stored, buffered = [], set()
+        for item_id in ids:
+            if item_id >= 0:
+                stored.append(item_id)
+            elif item_id in self._flushed_ids:
+                stored.append(self._flushed_ids[item_id])
+            else:
+                buffered.add(item_id)
+        return stored, buffered
+
+    def update(self, item_id, payload):
+        """Replace the payload of a spooled item (e.g. after partial delivery)."""
+        data = json.dumps(payload)
+        with self._lock:
+            stored, buffered = self._split_ids_locked([item_id])
+            if buffered:
+                self._pending = [
+                    (temp_id, kind, ts, data if temp_id == item_id else old, file)
+                    for temp_id, kind, ts, old, file in self._pending
+                ]
+                return
+            with self._db:
+                self._db.execute("UPDATE spool SET payload = ? WHERE id = ?", (data, stored[0]))
+
+    def ack(self, ids):
+        """Delete delivered items (and any spooled file copies)."""
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            stored, buffered = self._split_ids_locked(ids)
+            for item_id in ids:
+                self._flushed_ids.pop(item_id, None)
+            self._peeked.difference_update(buffered)
+            if buffered:
+                self._delete_files([file for temp_id, _, _, _, file in self._pending if temp_id in buffered])
+                self._pending = [row for row in self._pending if row[0] not in buffered]
+            if not stored:
+                return
+            ids = stored
+            placeholders = ",".join("?" * len(ids))
+            rows = self._db.execute(
+                f"SELECT id, file FROM spool WHERE id IN ({placeholders})", ids
+            ).fetchall()
+            with self._db:
+                self._delete_locked(rows)
+
+    def _delete_locked(self, rows):
+        self._db.executemany("DELETE FROM spool WHERE id = ?", [(row_id,) for row_id, _ in rows])
+        self._delete_files(file for _, file in rows)
+
+    @staticmethod
+    def _delete_files(files):
+        for file in files:
+            if file:
+                try:
+                    os.remove(file)
+                except OSError:
+                    pass
+
+    def count(self, kind=None):
+        with self._lock:
+            pending = sum(1 for row in self._pending if kind is None or row[1] == kind)
+            if kind is None:
+                (stored,) = self._db.execute("SELECT COUNT(*) FROM spool").fetchone()
+            else:
+                (stored,) = self._db.execute("SELECT COUNT(*) FROM spool WHERE kind = ?", (kind,)).fetchone()
+        return stored + pending
+
+    def stats(self):
+        return {
+            "readings": self.count("reading"),
+            "frames": self.count("frame"),
+            "flushes": self.flushes,
+            "evicted": self.evicted,
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._db.close()
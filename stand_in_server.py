@@ -0,0 +1,141 @@
+"""
+Local HTTP stand-in for the AGOS backend.
+
+Records every request it receives and answers with a canned JSON response,
+so the sensor telemetry sender (single or batched readings) can be exercised
+end-to-end without the real backend.  Tests start it in-process on an
+ephemeral port; it can also be run standalone and pointed at via SERVER_URL.
+
+Usage:
+    python stand_in_server.py                  # listen on 127.0.0.1:8000
+    python stand_in_server.py --port 9000 --status 429
+    SERVER_URL=http://127.0.0.1:8000/api/v1/sensor-readings/record python main.py
+"""
+
+import argparse
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RecordedRequest:
+    method: str
+    path: str
+    headers: dict
+    body: bytes
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+def _default_responder(request):
+    return 200, {"ok": True}
+
+
+class StandInServer:
+    """In-process HTTP server that records requests.
+
+    *responder* is called with each RecordedRequest and returns
+    ``(status_code, json_body)``; the default answers 200 ``{"ok": true}``.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, responder=None):
+        self.responder = responder or _default_responder
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = RecordedRequest(
+                    method=self.command,
+                    path=self.path,
+                    headers={k.lower(): v for k, v in self.headers.items()},
+                    body=self.rfile.read(length) if length else b"",
+                )
+                with server._lock:
+                    server.requests.append(request)
+                status, body = server.responder(request)
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _handle
+            do_POST = _handle
+            do_PUT = _handle
+
+            def log_message(self, fmt, *args):
+                logger.debug("[STAND-IN] " + fmt, *args)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stand_in_http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the AGOS backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--status", type=int, default=200, help="HTTP status to answer with (default: 200)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    def responder(request):
+        try:
+            body = request.json() if request.body else None
+        except ValueError:
+            body = None
+        if isinstance(body, list):
+            logger.info(f"{request.method} {request.path} batch of {len(body)} readings")
+        else:
+            logger.info(f"{request.method} {request.path} {len(request.body):,} bytes")
+        return args.status, {"ok": args.status < 400}
+
+    server = StandInServer(args.host, args.port, responder=responder)
+    logger.info(f"Stand-in backend listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
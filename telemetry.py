@@ -0,0 +1,345 @@
+"""Non-blocking delivery of sensor telemetry to the backend.
+
+sensor_loop used to POST each reading inline, so a slow or unreachable
+backend stalled sampling for up to the request timeout — exactly when a
+flood makes fresh readings matter most.  TelemetrySender decouples the two:
+the loop calls submit(), which only appends to a bounded in-memory queue,
+and a background thread drains it through a pooled requests.Session.
+
+When the queue is full the *oldest* reading is dropped so the backend
+always receives the most recent data once it recovers.
+
+Batching (opt-in, ``batch_size > 1``) sends queued readings as one JSON
+array instead of one POST each.  A batch is flushed when it reaches
+``batch_size`` readings, when its oldest reading is ``batch_max_age_s``
+old, or immediately when a reading is submitted with ``flush=True``
+(sensor_loop does this when the water-level risk tier changes).
+
+With a spool.Spool attached, readings that could not be delivered (timeouts,
+connection errors, 429/5xx, or pushed out of a full queue) are persisted and
+replayed oldest-first once a live POST succeeds again.  Replay only runs
+while the live queue is empty and is capped at ``replay_per_s`` readings per
+second, so it never delays fresh readings.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+def _reading_ts(reading):
+    """Epoch seconds of a reading's ISO-8601 ``timestamp``, or None if absent/invalid."""
+    try:
+        return datetime.fromisoformat(reading["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TelemetrySender:
+    """Bounded queue + background sender thread for sensor readings."""
+
+    def __init__(
+        self,
+        url,
+        api_key="",
+        max_queue=120,
+        timeout=5.0,
+        session=None,
+        batch_size=1,
+        batch_max_age_s=10.0,
+        spool=None,
+        replay_per_s=5.0,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.batch_size = max(1, int(batch_size))
+        self.batch_max_age_s = max(0.0, float(batch_max_age_s))
+        self._headers = {"x-api-key": api_key} if api_key else {}
+        self._session = session if session is not None else requests.Session()
+        self._queue = deque(maxlen=max(1, int(max_queue)))
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._flush_requested = False
+        self._overflow = []  # readings pushed out of the full queue, to spool
+        self._thread = None
+        self.spool = spool
+        self.replay_per_s = max(0.0, float(replay_per_s))
+        self._online = True
+        self._next_replay_at = 0.0
+        self._stats_lock = threading.Lock()
+
+        self.submitted = 0
+        self.sent = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.last_latency_ms = None
+        self._latency_total_ms = 0.0
+        self._latency_count = 0
+        self.max_latency_ms = 0.0
+
+    # ── Producer side ───────────────────────────────────────────────────────
+
+    @property
+    def batching(self):
+        return self.batch_size > 1
+
+    def submit(self, payload, flush=False):
+        """Queue *payload* for delivery; never blocks.
+
+        *flush* asks the sender to deliver the pending batch right away
+        (no-op when batching is off, since every reading is sent at once).
+
+        Returns False when the queue was full and the oldest reading had to
+        be dropped to make room.  With a spool attached the dropped reading
+        is handed to the sender thread, which spools it, so no disk I/O
+        happens on the caller's thread.
+        """
+        with self._cond:
+            full = len(self._queue) == self._queue.maxlen
+            if full and self.spool is not None:
+                self._overflow.append(self._queue[0][1])
+            self._queue.append((time.monotonic(), payload))
+            self.submitted += 1
+            if full:
+                self.dropped += 1
+            if flush:
+                self._flush_requested = True
+            self._cond.notify()
+        return not full
+
+    @property
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    # ── Consumer side ───────────────────────────────────────────────────────
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self, drain_timeout=2.0):
+        """Stop the sender, giving queued readings up to *drain_timeout* seconds."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+        deadline = time.monotonic() + max(0.0, drain_timeout)
+        while self.queue_depth and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=max(1.0, self.timeout))
+            self._thread = None
+        self._spool(self._take_overflow())
+        self._session.close()
+
+    def _batch_ready_locked(self):
+        if not self.batching or self._flush_requested:
+            return True
+        if len(self._queue) >= self.batch_size:
+            return True
+        oldest_at = self._queue[0][0]
+        return time.monotonic() - oldest_at >= self.batch_max_age_s
+
+    def _replay_due_locked(self):
+        return (
+            self.spool is not None
+            and self.replay_per_s > 0
+            and self._online
+            and time.monotonic() >= self._next_replay_at
+        )
+
+    def _next_replay(self):
+        # Called without _cond held: reading the spool may touch the disk.
+        items = self.spool.peek("reading", self.batch_size)
+        if not items:
+            self._next_replay_at = time.monotonic() + 1.0
+            return None
+        self._next_replay_at = time.monotonic() + len(items) / self.replay_per_s
+        return [payload for _, payload in items], [item_id for item_id, _ in items]
+
+    def _next_batch(self):
+        """Block until a batch is due; return ``(payloads, spool_ids)``.
+
+        ``spool_ids`` is None for live readings; ``payloads`` is empty when
+        the wake-up is only for overflowed readings to spool.  Returns None
+        on stop.
+        """
+        while True:
+            with self._cond:
+                replay_due = False
+                while not self._stop.is_set():
+                    if self._overflow:
+                        return [], None
+                    if self._queue and self._batch_ready_locked():
+                        break
+                    if not self._queue and self._replay_due_locked():
+                        replay_due = True
+                        break
+                    if self._queue:
+                        oldest_at = self._queue[0][0]
+                        self._cond.wait(max(0.01, oldest_at + self.batch_max_age_s - time.monotonic()))
+                    else:
+                        self._cond.wait(0.5)
+                if not replay_due:
+                    if not self._queue:
+                        return None
+                    count = min(len(self._queue), self.batch_size)
+                    batch = [self._queue.popleft()[1] for _ in range(count)]
+                    if not self._queue:
+                        self._flush_requested = False
+                    return batch, None
+            replay = self._next_replay()
+            if replay is not None:
+                return replay
+
+    def _take_overflow(self):
+        with self._cond:
+            overflow, self._overflow = self._overflow, []
+        return overflow
+
+    def _run(self):
+        while not self._stop.is_set():
+            item = self._next_batch()
+            overflow = self._take_overflow()
+            if overflow:
+                self._spool(overflow)
+            if not item or not item[0]:
+                continue
+            batch, spool_ids = item
+            payload = batch if self.batching else batch[0]
+            if spool_ids is None:
+                self.deliver(payload)
+            else:
+                self._replay(payload, spool_ids)
+
+    def _spool(self, readings):
+        if self.spool is None:
+            return
+        try:
+            for reading in readings:
+                # Replay order follows when the reading was taken, not when it
+                # failed: overflow and failed batches are spooled out of order.
+                self.spool.put("reading", reading, ts=_reading_ts(reading))
+            self.spooled += len(readings)
+        except Exception as e:
+            logger.error(f"[SENSOR] Failed to spool {len(readings)} reading(s): {e}")
+
+    def _replay(self, payload, spool_ids):
+        outcome = self._post(payload)
+        if outcome == "retry":
+            return
+        # Delivered, or permanently rejected by the backend — either way it
+        # must not be retried forever.
+        self.spool.ack(spool_ids)
+        if outcome == "sent":
+            self.replayed += len(spool_ids)
+            logger.info(f"[SENSOR] Replayed {len(spool_ids)} spooled reading(s)")
+
+    def _record_latency(self, elapsed_ms):
+        with self._stats_lock:
+            self.last_latency_ms = elapsed_ms
+            self._latency_total_ms += elapsed_ms
+            self._latency_count += 1
+            self.max_latency_ms = max(self.max_latency_ms, elapsed_ms)
+
+    def deliver(self, payload):
+        """POST one reading (dict) or one batch (list) synchronously; returns True on success.
+
+        Retryable failures are handed to the spool, if one is attached.
+        """
+        outcome = self._post(payload)
+        if outcome == "retry":
+            self._spool(payload if isinstance(payload, list) else [payload])
+        return outcome == "sent"
+
+    def _post(self, payload):
+        """POST *payload*; return "sent", "retry" (transient) or "rejected"."""
+        readings = payload if isinstance(payload, list) else [payload]
+        t0 = time.monotonic()
+        try:
+            response = self._session.post(
+                self.url, json=payload, headers=self._headers, timeout=self.timeout
+            )
+            self._record_latency((time.monotonic() - t0) * 1000.0)
+            if response.status_code == 429:
+                self.rate_limited += len(readings)
+                self._online = False
+                logger.warning(
+                    "[SENSOR] API rate-limited (429). "
+                    "Keeping local logs and retrying next cycle."
+                )
+                return "retry"
+            response.raise_for_status()
+            self._online = True
+            self.sent += len(readings)
+            self.batches += 1
+            if isinstance(payload, list):
+                logger.info(
+                    f"Sensor posted batch: {len(readings)} readings "
+                    f"latency={self.last_latency_ms:.0f}ms"
+                )
+            else:
+                logger.info(
+                    f"Sensor posted: raw={payload.get('raw_distance_cm')}cm "
+                    f"device={payload.get('sensor_device_id')} latency={self.last_latency_ms:.0f}ms"
+                )
+            return "sent"
+        except requests.exceptions.Timeout:
+            self._record_latency((time.monotonic() - t0) * 1000.0)
+            self.failed += len(readings)
+            self._online = False
+            logger.error(f"Timeout posting sensor data to {self.url}")
+            return "retry"
+        except requests.exceptions.RequestException as e:
+            self.failed += len(readings)
+            response = getattr(e, "response", None)
+            if response is not None:
+                logger.error(
+                    f"Sensor post failed: status={response.status_code} "
+                    f"body={response.text}"
+                )
+                if response.status_code < 500:
+                    # 4xx (other than 429) will fail the same way on retry.
+                    return "rejected"
+            else:
+                logger.error(f"Sensor post failed: {e}")
+            self._online = False
+            return "retry"
+        except Exception as e:
+            self.failed += len(readings)
+            logger.error(f"Sensor post failed: {e}")
+            return "rejected"
+
+    def stats(self):
+        with self._stats_lock:
+            avg = (self._latency_total_ms / self._latency_count) if self._latency_count else None
+            return {
+                "queue_depth": self.queue_depth,
+                "submitted": self.submitted,
+                "sent": self.sent,
+                "batches": self.batches,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "rate_limited": self.rate_limited,
+                "spooled": self.spooled,
+                "replayed": self.replayed,
+                "last_latency_ms": self.last_latency_ms,
+                "avg_latency_ms": avg,
+                "max_latency_ms": self.max_latency_ms,
+            }
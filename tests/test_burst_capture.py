@@ -0,0 +1,57 @@
+from concurrent.futures import Future
+
+import burst_capture
+
+
+class _ManualService:
+    """Records submits and lets the test complete each upload."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, filepath, **options):
+        future = Future()
+        self.submitted.append((filepath, options, future))
+        return future
+
+
+def test_uploads_are_bounded_by_max_inflight():
+    service = _ManualService()
+    uploads = burst_capture.BurstUploader(service, "s1", max_inflight=2)
+
+    for i in range(5):
+        uploads.add(f"f{i}.jpg")
+
+    assert [path for path, _, _ in service.submitted] == ["f0.jpg", "f1.jpg"]
+    assert uploads.pending == 5
+    assert uploads.progress() == "uploads: 0 done, 2 in flight, 3 queued, 0 failed"
+
+    service.submitted[0][2].set_result({"secure_url": "u0"})
+    assert [path for path, _, _ in service.submitted] == ["f0.jpg", "f1.jpg", "f2.jpg"]
+
+
+def test_wait_returns_after_every_upload_finished():
+    service = _ManualService()
+    uploads = burst_capture.BurstUploader(service, "s1", max_inflight=1)
+    uploads.add("a.jpg")
+    uploads.add("b.jpg")
+
+    assert uploads.wait(timeout=0.05) is False
+
+    service.submitted[0][2].set_exception(RuntimeError("offline"))
+    service.submitted[1][2].set_result({"secure_url": "u"})
+
+    assert uploads.wait(timeout=1) is True
+    assert uploads.uploaded == 1
+    assert [(path, str(err)) for path, err in uploads.failed] == [("a.jpg", "offline")]
+
+
+def test_upload_options_carry_session_metadata():
+    service = _ManualService()
+    uploads = burst_capture.BurstUploader(service, "20260101_120000")
+    uploads.add("a.jpg")
+
+    _, options, _ = service.submitted[0]
+    assert options["folder"] == burst_capture.CLOUD_FOLDER
+    assert options["tags"] == ["training", "session_20260101_120000", "raining"]
+    assert options["context"] == "session=20260101_120000"
@@ -1,7 +1,12 @@
 import datetime as dt
+import sys
 from pathlib import Path
 
+import pytest
+
 import camera
+from frame_pipeline import RejectedFrame
+from image_catalog import ImageCatalog
 
 
 def test_capture_image_uses_training_fallback_images(monkeypatch, tmp_path):
@@ -16,8 +21,13 @@ def test_capture_image_uses_training_fallback_images(monkeypatch, tmp_path):
     monkeypatch.setattr(camera, "MOCK", True)
     monkeypatch.setattr(camera, "PICAMERA_AVAILABLE", False)
     monkeypatch.setattr(camera, "USE_FSWEBCAM", False)
-    monkeypatch.setattr(camera, "TRAINING_CAPTURES_DIR", str(training_captures))
-    monkeypatch.setattr(camera, "TRAINING_RAINING_DIR", str(tmp_path / "training_raining"))
+    monkeypatch.setattr(
+        camera,
+        "_MOCK_FALLBACK_CATALOG",
+        ImageCatalog(
+            [("training_captures", str(training_captures)), ("training_raining", str(tmp_path / "training_raining"))]
+        ),
+    )
 
     result = camera.capture_image(str(dst))
 
@@ -38,8 +48,13 @@ def test_capture_image_falls_through_when_training_copy_fails(monkeypatch, tmp_p
     monkeypatch.setattr(camera, "MOCK", True)
     monkeypatch.setattr(camera, "PICAMERA_AVAILABLE", False)
     monkeypatch.setattr(camera, "USE_FSWEBCAM", False)
-    monkeypatch.setattr(camera, "TRAINING_CAPTURES_DIR", str(training_captures))
-    monkeypatch.setattr(camera, "TRAINING_RAINING_DIR", str(tmp_path / "training_raining"))
+    monkeypatch.setattr(
+        camera,
+        "_MOCK_FALLBACK_CATALOG",
+        ImageCatalog(
+            [("training_captures", str(training_captures)), ("training_raining", str(tmp_path / "training_raining"))]
+        ),
+    )
     monkeypatch.setattr(camera.shutil, "copy2", lambda *_args, **_kwargs: (_ for _ in ()).throw(OSError("copy failed")))
 
     result = camera.capture_image(str(dst))
@@ -149,3 +164,290 @@ def test_ir_cut_controller_uses_consistent_datetime_awareness(monkeypatch):
 
     later = dt.datetime(2025, 1, 1, 0, 0, 31, tzinfo=dt.timezone.utc)
     assert ctrl.should_apply(False, now=later) is True
+
+
+def test_persistent_camera_capture_bytes_reads_fallback_in_memory(monkeypatch, tmp_path):
+    training_captures = tmp_path / "training_captures"
+    training_captures.mkdir()
+    (training_captures / "capture_01.jpg").write_bytes(b"source-bytes")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(camera, "MOCK", True)
+    monkeypatch.setattr(camera, "PICAMERA_AVAILABLE", False)
+    monkeypatch.setattr(
+        camera,
+        "_MOCK_FALLBACK_CATALOG",
+        ImageCatalog([("training_captures", str(training_captures))]),
+    )
+    monkeypatch.setattr(camera.tempfile, "gettempdir", lambda: (_ for _ in ()).throw(AssertionError("touched disk")))
+
+    data = camera.PersistentCamera().capture_bytes()
+
+    assert data == b"source-bytes"
+
+
+class _FakeRequest:
+    def __init__(self, frame, lores=None):
+        self._arrays = {"main": frame, "lores": lores}
+        self.streams = []
+        self.released = False
+
+    def make_array(self, stream):
+        assert self._arrays.get(stream) is not None
+        self.streams.append(stream)
+        return self._arrays[stream]
+
+    def save(self, stream, file_output, format=None):
+        assert format == "jpeg"
+        self.streams.append(stream)
+        file_output.write(b"\xff\xd8picamera2-" + stream.encode())
+
+    def release(self):
+        self.released = True
+
+
+class _FakePicamera2:
+    """Stand-in for Picamera2 that serves synthetic main/lores arrays."""
+
+    def __init__(self, frame, lores=None):
+        self.requests = []
+        self.options = {}
+        self.configured = None
+        self._frame = frame
+        self._lores = lores
+
+    def create_still_configuration(self, **kwargs):
+        return kwargs
+
+    def configure(self, config):
+        self.configured = config
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def capture_request(self, flush=False):
+        request = _FakeRequest(self._frame, self._lores)
+        self.requests.append(request)
+        return request
+
+
+def test_persistent_camera_capture_array_crops_in_memory(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+
+    rgb = np.zeros((40, 60, 3), dtype=np.uint8)
+    rgb[..., 0] = 255  # pure red in Picamera2's [R, G, B] layout
+
+    monkeypatch.setattr(camera, "MOCK", False)
+    monkeypatch.setattr(camera, "PICAMERA_AVAILABLE", True)
+    monkeypatch.setattr(camera, "set_ir_cut_mode", lambda day: None)
+    monkeypatch.setattr(camera, "IMAGE_CROP_ENABLED", True)
+    monkeypatch.setattr(camera, "IMAGE_CROP_X", 10)
+    monkeypatch.setattr(camera, "IMAGE_CROP_Y", 5)
+    monkeypatch.setattr(camera, "IMAGE_CROP_WIDTH", 20)
+    monkeypatch.setattr(camera, "IMAGE_CROP_HEIGHT", 15)
+    monkeypatch.setattr(camera, "IMAGE_CLAHE_NIGHT_ENABLED", False)
+
+    cam = camera.PersistentCamera()
+    cam._cam = _FakePicamera2(rgb)
+
+    frame = cam.capture_array()
+
+    assert frame.shape == (15, 20, 3)
+    assert tuple(frame[0, 0]) == (0, 0, 255)  # BGR order for OpenCV
+    assert cam._cam.requests[0].released is True
+
+    data = cam.capture_bytes()
+    assert data[:2] == b"\xff\xd8"
+
+
+@pytest.fixture
+def no_cv2(monkeypatch):
+    """Make ``import cv2`` fail, as on a Pi without OpenCV installed."""
+    import frame_pipeline
+    import frame_quality
+
+    monkeypatch.setitem(sys.modules, "cv2", None)
+    monkeypatch.setattr(frame_pipeline, "cv2", None)
+    monkeypatch.setattr(frame_quality, "cv2", None)
+
+
+def _use_fake_camera(monkeypatch, fake):
+    monkeypatch.setattr(camera, "MOCK", False)
+    monkeypatch.setattr(camera, "PICAMERA_AVAILABLE", True)
+    monkeypatch.setattr(camera, "set_ir_cut_mode", lambda day: None)
+    cam = camera.PersistentCamera()
+    cam._cam = fake
+    return cam
+
+
+def test_capture_bytes_falls_back_to_picamera2_encoder_without_cv2(monkeypatch, no_cv2):
+    fake = _FakePicamera2(frame=None)
+    cam = _use_fake_camera(monkeypatch, fake)
+
+    assert cam.capture_bytes() == b"\xff\xd8picamera2-main"
+    assert fake.requests[0].streams == ["main"]
+    assert fake.requests[0].released is True
+
+    with pytest.raises(ImportError, match="capture_bytes"):
+        cam.capture_array()
+
+
+def test_capture_frame_falls_back_to_picamera2_encoder_without_cv2(monkeypatch, no_cv2):
+    fake = _FakePicamera2(frame=None)
+    cam = _use_fake_camera(monkeypatch, fake)
+
+    processed = cam.capture_frame(reject_unusable=True)
+
+    assert processed.jpeg == b"\xff\xd8picamera2-main"
+    assert processed.metrics is None
+    assert fake.requests[0].released is True
+
+
+def test_persistent_camera_capture_frame_returns_metrics_with_single_encode(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+
+    rgb = np.random.default_rng(1).integers(0, 255, size=(48, 64, 3), dtype=np.uint8)
+
+    monkeypatch.setattr(camera, "MOCK", False)
+    monkeypatch.setattr(camera, "PICAMERA_AVAILABLE", True)
+    monkeypatch.setattr(camera, "set_ir_cut_mode", lambda day: None)
+    monkeypatch.setattr(camera, "IMAGE_CROP_ENABLED", False)
+    monkeypatch.setattr(camera, "IMAGE_CLAHE_NIGHT_ENABLED", True)
+    monkeypatch.setattr(camera._ir_cut_controller, "mode", "night")
+
+    cam = camera.PersistentCamera()
+    cam._cam = _FakePicamera2(rgb)
+
+    processed = cam.capture_frame()
+
+    assert processed.jpeg[:2] == b"\xff\xd8"
+    assert processed.metrics is not None
+    assert (processed.width, processed.height) == (64, 48)
+    assert "clahe_night" in processed.timings_ms
+
+
+def _yuv420(np, width, height, luma):
+    """Build a YUV420 lores array with a padded stride, as Picamera2 returns it."""
+    stride = width + 32
+    yuv = np.full((height * 3 // 2, stride), 128, dtype=np.uint8)
+    yuv[:height, :width] = luma
+    yuv[:height, width:] = 0  # stride padding must not leak into metrics
+    return yuv
+
+
+def _start_fake_lores_camera(monkeypatch, fake):
+    monkeypatch.setattr(camera, "MOCK", False)
+    monkeypatch.setattr(camera, "PICAMERA_AVAILABLE", True)
+    monkeypatch.setattr(camera, "set_ir_cut_mode", lambda day: None)
+    monkeypatch.setattr(camera, "_create_camera", lambda: fake)
+    monkeypatch.setattr(camera, "IMAGE_CROP_ENABLED", False)
+    monkeypatch.setattr(camera, "IMAGE_CLAHE_NIGHT_ENABLED", False)
+    monkeypatch.setattr(camera, "CAMERA_LORES_WIDTH", 32)
+    monkeypatch.setattr(camera, "CAMERA_LORES_HEIGHT", 24)
+    monkeypatch.setattr("time.sleep", lambda _s: None)
+    cam = camera.PersistentCamera(lores=True)
+    cam.start()
+    return cam
+
+
+def test_persistent_camera_configures_lores_yuv_stream(monkeypatch):
+    fake = _FakePicamera2(frame=None)
+    _start_fake_lores_camera(monkeypatch, fake)
+
+    assert fake.configured["lores"] == {"size": (32, 24), "format": "YUV420"}
+    assert fake.configured["main"] == {"size": (camera.CAMERA_WIDTH, camera.CAMERA_HEIGHT)}
+
+
+def test_capture_frame_uses_lores_luma_metrics(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+
+    luma = np.random.default_rng(2).integers(60, 200, size=(24, 32), dtype=np.uint8)
+    main_rgb = np.zeros((48, 64, 3), dtype=np.uint8)
+    fake = _FakePicamera2(main_rgb, lores=_yuv420(np, 32, 24, luma))
+    cam = _start_fake_lores_camera(monkeypatch, fake)
+
+    processed = cam.capture_frame()
+
+    assert processed.metrics["brightness"] == pytest.approx(float(luma.mean()))
+    assert processed.jpeg[:2] == b"\xff\xd8"
+    assert fake.requests[-1].streams == ["lores", "main"]
+    assert fake.requests[-1].released is True
+
+
+def test_capture_frame_rejects_on_lores_before_encoding_main(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+
+    dark = np.full((24, 32), 3, dtype=np.uint8)
+    fake = _FakePicamera2(np.zeros((48, 64, 3), dtype=np.uint8), lores=_yuv420(np, 32, 24, dark))
+    cam = _start_fake_lores_camera(monkeypatch, fake)
+    monkeypatch.setattr(camera, "FRAME_QUALITY_CHECK_ENABLED", True)
+
+    processed = cam.capture_frame(reject_unusable=True)
+
+    assert isinstance(processed, RejectedFrame)
+    assert processed.metrics["brightness"] == pytest.approx(3.0)
+    assert fake.requests[-1].streams == ["lores"]
+    assert fake.requests[-1].released is True
+
+
+def test_lores_gate_is_skipped_when_metrics_are_unavailable(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+
+    dark = np.full((24, 32), 3, dtype=np.uint8)
+    fake = _FakePicamera2(np.zeros((48, 64, 3), dtype=np.uint8), lores=_yuv420(np, 32, 24, dark))
+    cam = _start_fake_lores_camera(monkeypatch, fake)
+    monkeypatch.setattr(camera, "FRAME_QUALITY_CHECK_ENABLED", True)
+    monkeypatch.setattr(camera, "get_frame_quality_metrics", lambda _image: None)  # e.g. no OpenCV
+
+    processed = cam.capture_frame(reject_unusable=True)
+
+    assert processed.jpeg[:2] == b"\xff\xd8"
+    assert fake.requests[-1].streams == ["lores", "main"]
+
+
+def test_lores_capture_falls_back_to_picamera2_encoder_without_cv2(monkeypatch, no_cv2):
+    np = pytest.importorskip("numpy")
+
+    dark = np.full((24, 32), 3, dtype=np.uint8)
+    fake = _FakePicamera2(frame=None, lores=_yuv420(np, 32, 24, dark))
+    cam = _start_fake_lores_camera(monkeypatch, fake)
+    monkeypatch.setattr(camera, "FRAME_QUALITY_CHECK_ENABLED", True)
+
+    processed = cam.capture_frame(reject_unusable=True)
+
+    assert processed.jpeg == b"\xff\xd8picamera2-main"
+    assert processed.metrics is None
+    assert fake.requests[-1].streams == ["lores", "main"]
+    assert fake.requests[-1].released is True
+
+
+def test_lores_gate_scores_the_night_clahe_luma(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+    from frame_quality import are_metrics_usable, get_frame_quality_metrics
+
+    # Dim but textured: fails the brightness gate raw, passes once enhanced.
+    luma = np.random.default_rng(3).integers(5, 30, size=(24, 32), dtype=np.uint8)
+    assert not are_metrics_usable(get_frame_quality_metrics(luma))
+    fake = _FakePicamera2(np.zeros((48, 64, 3), dtype=np.uint8), lores=_yuv420(np, 32, 24, luma))
+    cam = _start_fake_lores_camera(monkeypatch, fake)
+    monkeypatch.setattr(camera, "FRAME_QUALITY_CHECK_ENABLED", True)
+    monkeypatch.setattr(camera, "IMAGE_CLAHE_NIGHT_ENABLED", True)
+    monkeypatch.setattr(camera._ir_cut_controller, "mode", "night")
+
+    processed = cam.capture_frame(reject_unusable=True)
+
+    assert not isinstance(processed, RejectedFrame)
+    assert processed.metrics == get_frame_quality_metrics(camera._clahe_night_frame(luma))
+    assert fake.requests[-1].streams == ["lores", "main"]
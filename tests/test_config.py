@@ -32,6 +32,15 @@ def test_filter_config_types_and_basic_constraints():
     assert config.SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM >= 0
     assert config.SENSOR_FILTER_REBASELINE_OUTLIER_STREAK >= 2
     assert config.SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM >= 0
+    assert config.SENSOR_FILTER_MODE in ("average", "kalman")
+    assert config.SENSOR_KALMAN_MEASUREMENT_STD_CM > 0
+    assert config.SENSOR_KALMAN_ACCEL_STD_CM_MIN2 >= 0
+    assert config.SENSOR_KALMAN_GATE_SIGMA >= 0
+    assert config.SENSOR_RISK_LOOKAHEAD_S >= 0
+    assert isinstance(config.SENSOR_FILTER_SNAPSHOT_ENABLED, bool)
+    assert config.SENSOR_FILTER_SNAPSHOT_PATH
+    assert config.SENSOR_FILTER_SNAPSHOT_INTERVAL_S >= 1
+    assert config.SENSOR_FILTER_SNAPSHOT_MAX_AGE_S >= 0
 
 
 def test_frame_quality_config_types_and_basic_constraints():
@@ -39,6 +48,20 @@ def test_frame_quality_config_types_and_basic_constraints():
     assert isinstance(config.CAMERA_SEND_PRECAPTURE_STATUS_IMAGE, bool)
     assert isinstance(config.SENSOR_TRIG_PIN, int)
     assert isinstance(config.SENSOR_ECHO_PIN, int)
+    assert config.SENSOR_ECHO_BACKEND in ("edge", "poll")
+    assert isinstance(config.SENSOR_CONTINUOUS_ENABLED, bool)
+    assert config.SENSOR_CONTINUOUS_WINDOW_S > 0
+    assert config.SENSOR_CONTINUOUS_BUFFER_SIZE >= 1
+    assert isinstance(config.SENSOR_CONTINUOUS_PROCESS, bool)
+    assert config.SENSOR_RT_POLICY in {"other", "fifo", "rr"}
+    assert 1 <= config.SENSOR_RT_PRIORITY <= 99
+    assert isinstance(config.SENSOR_CPU_AFFINITY, list)
+    assert isinstance(config.SENSOR_MLOCKALL, bool)
+    assert config.SENSOR_JITTER_LOG_INTERVAL_S >= 0
+    assert isinstance(config.SENSOR_BURST_ADAPTIVE, bool)
+    assert config.SENSOR_BURST_TOLERANCE_CM >= 0
+    assert config.SENSOR_BURST_MAX_SAMPLES >= config.SENSOR_BURST_SAMPLES
+    assert config.SENSOR_SIGNAL_DISPERSION_FULL_SCALE_CM > 0
     assert isinstance(config.RISK_LED_CRITICAL_PIN, int)
     assert isinstance(config.RISK_LED_WARNING_PIN, int)
     assert isinstance(config.RISK_LED_SAFE_PIN, int)
@@ -48,6 +71,18 @@ def test_frame_quality_config_types_and_basic_constraints():
     assert isinstance(config.FRAME_QUALITY_MIN_CONTRAST_STDDEV, float)
     assert isinstance(config.FRAME_QUALITY_MIN_LAPLACIAN_VAR, float)
     assert isinstance(config.FRAME_QUALITY_RESIZE_WIDTH, int)
+    assert isinstance(config.FRAME_QUALITY_METRICS_CACHE_SIZE, int)
+    assert isinstance(config.SENSOR_SEND_QUEUE_SIZE, int)
+    assert isinstance(config.SENSOR_POST_TIMEOUT_S, float)
+    assert isinstance(config.SENSOR_BATCH_ENABLED, bool)
+    assert isinstance(config.SENSOR_BATCH_MAX_SIZE, int)
+    assert isinstance(config.SENSOR_BATCH_MAX_AGE_S, float)
+    assert isinstance(config.SPOOL_ENABLED, bool)
+    assert isinstance(config.CAMERA_MAX_INFLIGHT_FRAMES, int)
+    assert isinstance(config.CAMERA_UPLOAD_WORKERS, int)
+    assert isinstance(config.SPOOL_MAX_READINGS, int)
+    assert isinstance(config.SPOOL_MAX_FRAMES, int)
+    assert isinstance(config.SPOOL_FLUSH_BATCH, int)
 
     assert 0 <= config.FRAME_QUALITY_MIN_BRIGHTNESS <= 255
     assert 0 <= config.FRAME_QUALITY_MAX_BRIGHTNESS <= 255
@@ -55,6 +90,23 @@ def test_frame_quality_config_types_and_basic_constraints():
     assert config.FRAME_QUALITY_MIN_CONTRAST_STDDEV >= 0
     assert config.FRAME_QUALITY_MIN_LAPLACIAN_VAR >= 0
     assert config.FRAME_QUALITY_RESIZE_WIDTH >= 0
+    assert config.FRAME_QUALITY_METRICS_CACHE_SIZE >= 0
+    assert config.SENSOR_SEND_QUEUE_SIZE >= 1
+    assert config.SENSOR_POST_TIMEOUT_S > 0
+    assert config.SENSOR_BATCH_MAX_SIZE >= 1
+    assert config.SENSOR_BATCH_MAX_AGE_S >= 0
+    assert config.SPOOL_FLUSH_BATCH >= 1
+    assert config.CAMERA_MAX_INFLIGHT_FRAMES >= 1
+    assert config.CAMERA_UPLOAD_WORKERS >= 1
+    assert config.IMAGE_CATALOG_REFRESH_S >= 0
+    assert config.STATIC_FRAME_CACHE_MB >= 0
+    assert isinstance(config.UPLOAD_DEDUP_ENABLED, bool)
+    assert config.UPLOAD_DEDUP_MAX_ENTRIES >= 0
+    assert config.UPLOAD_MAX_ATTEMPTS >= 1
+    assert 0 <= config.UPLOAD_BACKOFF_MIN_S <= config.UPLOAD_BACKOFF_MAX_S
+    assert config.UPLOAD_TIMEOUT_S > 0
+    assert config.SPOOL_REPLAY_READINGS_PER_S >= 0
+    assert config.SPOOL_REPLAY_FRAMES_PER_MIN >= 0
     assert config.SENSOR_TRIG_PIN >= 0
     assert config.SENSOR_ECHO_PIN >= 0
     assert config.RISK_LED_CRITICAL_PIN >= -1
@@ -0,0 +1,140 @@
+import struct
+
+import pytest
+
+import filter_snapshot
+from filter_snapshot import load_snapshot, save_snapshot
+from level_tracker import LevelTracker
+from water_level_filter import WaterLevelFilter
+
+
+def make_filter(**overrides):
+    params = {
+        "enabled": True,
+        "window_size": 7,
+        "min_valid_samples": 3,
+        "min_cm": 0.0,
+        "max_cm": 400.0,
+        "modz_threshold": 3.5,
+        "zero_mad_tolerance_cm": 1.0,
+        "rebaseline_outlier_streak": 5,
+        "rebaseline_spread_max_cm": 8.0,
+    }
+    params.update(overrides)
+    return WaterLevelFilter(**params)
+
+
+def make_tracker():
+    return LevelTracker(
+        enabled=True, min_cm=0.0, max_cm=400.0, measurement_std_cm=0.5, accel_std_cm_min2=1.0,
+        gate_sigma=4.0, rebaseline_outlier_streak=3, rebaseline_spread_max_cm=2.0,
+    )
+
+
+def _warm_filter():
+    f = make_filter()
+    for value in [100.0, 100.4, 99.8, 100.1, 100.3, 99.9, 100.2, 100.0, 60.0, 61.0]:
+        f.process(value)
+    return f
+
+
+def test_restored_filter_continues_exactly_like_the_original(tmp_path):
+    path = tmp_path / "state" / "filter.snap"
+    original = _warm_filter()
+    size = save_snapshot(original, path)
+
+    restored = make_filter()
+    assert load_snapshot(restored, path, max_age_s=60)
+    assert size == path.stat().st_size == 4 + 1 + 8 + 12 + 8 * (7 + 2) + 4
+
+    follow_up = [100.1, 55.0, 60.5, 60.2, 60.8, 99.9]
+    assert [restored.process(v) for v in follow_up] == [original.process(v) for v in follow_up]
+
+
+def test_restored_filter_rejects_a_spike_immediately(tmp_path):
+    path = tmp_path / "filter.snap"
+    save_snapshot(_warm_filter(), path)
+
+    cold, warm = make_filter(), make_filter()
+    assert load_snapshot(warm, path, max_age_s=60)
+    assert cold.process(250.0) == (250.0, "ok")
+    assert warm.process(250.0) == (None, "outlier-modz")
+
+
+def test_restore_into_smaller_window_keeps_newest_samples(tmp_path):
+    path = tmp_path / "filter.snap"
+    save_snapshot(_warm_filter(), path)
+
+    small = make_filter(window_size=3)
+    assert load_snapshot(small, path, max_age_s=60)
+    assert list(small._history) == [99.9, 100.2, 100.0]
+
+
+def test_stale_corrupt_foreign_and_missing_snapshots_are_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "filter.snap"
+    assert not load_snapshot(make_filter(), path, max_age_s=60)
+
+    save_snapshot(_warm_filter(), path)
+    monkeypatch.setattr(filter_snapshot.time, "time", lambda: 10_000_000_000.0)
+    assert not load_snapshot(make_filter(), path, max_age_s=60)
+    monkeypatch.undo()
+
+    data = bytearray(path.read_bytes())
+    data[20] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert not load_snapshot(make_filter(), path, max_age_s=60)
+
+    save_snapshot(make_tracker(), path)
+    f = make_filter()
+    assert not load_snapshot(f, path, max_age_s=60)
+    assert len(f._history) == 0
+
+
+def test_save_is_atomic_and_leaves_no_temp_file(tmp_path, monkeypatch):
+    path = tmp_path / "filter.snap"
+    save_snapshot(_warm_filter(), path)
+    before = path.read_bytes()
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(filter_snapshot.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        save_snapshot(make_filter(), path)
+    assert path.read_bytes() == before
+
+    monkeypatch.undo()
+    save_snapshot(make_filter(), path)
+    assert [p.name for p in tmp_path.iterdir()] == ["filter.snap"]
+
+
+def test_restore_rejects_inconsistent_payload():
+    f = make_filter()
+    with pytest.raises(ValueError):
+        f.restore_state(struct.pack("<III", 0, 3, 0) + struct.pack("<2d", 1.0, 2.0))
+
+
+def test_tracker_snapshot_resumes_track_across_the_gap(tmp_path, monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("level_tracker.time.monotonic", lambda: clock["now"])
+    tracker = make_tracker()
+    for t in range(120):
+        clock["now"] = 1000.0 + t
+        tracker.process(150.0 - 2.0 * t / 60.0, timestamp=clock["now"])
+    before = tracker.estimate
+    path = tmp_path / "tracker.snap"
+    save_snapshot(tracker, path)
+
+    # "Restart": new process, monotonic clock restarted, 30 s later.
+    clock["now"] = 50.0
+    monkeypatch.setattr(filter_snapshot.time, "time", lambda t=filter_snapshot.time.time(): t + 30.0)
+    restored = make_tracker()
+    assert load_snapshot(restored, path, max_age_s=60)
+
+    after = restored.estimate
+    assert after.distance_cm == before.distance_cm
+    assert after.rise_rate_cm_min == pytest.approx(before.rise_rate_cm_min)
+    assert after.timestamp == pytest.approx(50.0 - 30.0, abs=0.5)
+    assert restored.predict(50.0).distance_cm == pytest.approx(before.distance_cm - 1.0, abs=0.05)
+    value, status = restored.process(before.distance_cm - 1.0, timestamp=50.0)
+    assert status == "ok"
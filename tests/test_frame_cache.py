@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from frame_cache import StaticFrameCache
+
+
+def _write(path, size, fill=b"x"):
+    path.write_bytes(fill * size)
+    return path
+
+
+def test_cache_reads_each_file_once(tmp_path):
+    path = _write(tmp_path / "a.jpg", 100)
+    cache = StaticFrameCache(1000)
+
+    first = cache.get(path)
+    second = cache.get(str(path))
+
+    assert first.jpeg == b"x" * 100
+    assert second is first
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "entries": 1,
+        "bytes": 100,
+        "max_bytes": 1000,
+        "hit_rate": 0.5,
+    }
+
+
+def test_cache_evicts_least_recently_used_within_budget(tmp_path):
+    a, b, c = (_write(tmp_path / f"{name}.jpg", 400) for name in "abc")
+    cache = StaticFrameCache(1000)
+
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)  # b is now least recently used
+    cache.get(c)
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 800
+    cache.get(a)
+    assert cache.stats()["hits"] == 2  # a stayed cached
+    cache.get(b)
+    assert cache.stats()["misses"] == 4  # b had been evicted
+
+
+def test_cache_serves_oversized_frame_without_caching_it(tmp_path):
+    big = _write(tmp_path / "big.jpg", 2000)
+    cache = StaticFrameCache(1000)
+
+    assert len(cache.get(big).jpeg) == 2000
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_reloads_file_replaced_on_disk(tmp_path):
+    path = _write(tmp_path / "a.jpg", 10)
+    cache = StaticFrameCache(1000)
+    cache.get(path)
+
+    _write(path, 20, b"y")
+    os.utime(path, ns=(1, 1))
+
+    assert cache.get(path).jpeg == b"y" * 20
+    assert cache.stats()["bytes"] == 20
+
+
+def test_cache_computes_metrics_once_per_load(tmp_path):
+    path = _write(tmp_path / "a.jpg", 10)
+    calls = []
+
+    def metrics_fn(image):
+        calls.append(image)
+        return {"brightness": 1.0}
+
+    cache = StaticFrameCache(1000, metrics_fn=metrics_fn)
+    for _ in range(3):
+        assert cache.get(path).metrics == {"brightness": 1.0}
+
+    assert calls == [b"x" * 10]
+
+
+def test_cache_computes_real_metrics_from_the_jpeg():
+    pytest.importorskip("cv2")
+    from frame_quality import get_frame_quality_metrics
+
+    path = "test_images/normal/normal1.jpg"
+    cache = StaticFrameCache(64 * 1024 * 1024, metrics_fn=get_frame_quality_metrics)
+
+    frame = cache.get(path)
+
+    assert frame.metrics["brightness"] > 0
+    assert cache.stats()["bytes"] == os.path.getsize(path)
+
+
+def test_cache_raises_for_missing_file(tmp_path):
+    with pytest.raises(OSError):
+        StaticFrameCache(1000).get(tmp_path / "missing.jpg")
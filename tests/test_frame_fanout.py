@@ -0,0 +1,154 @@
+import threading
+import time
+
+from frame_fanout import FrameFanout
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class _Recorder:
+    def __init__(self):
+        self.completed = []
+        self.sent = []
+        self.follow_ups = []
+        self.lock = threading.Lock()
+
+    def send(self, job, url):
+        with self.lock:
+            self.sent.append((job.filename, url))
+        return True
+
+    def follow_up(self, job):
+        with self.lock:
+            self.follow_ups.append((job.filename, job.cloudinary_url))
+        return True
+
+    def on_complete(self, job):
+        with self.lock:
+            self.completed.append(job)
+
+
+def test_slow_upload_does_not_delay_websocket_send():
+    release = threading.Event()
+    rec = _Recorder()
+
+    def upload(job):
+        release.wait(5)
+        return f"https://cdn/{job.filename}"
+
+    fanout = FrameFanout(
+        upload=upload, send=rec.send, follow_up=rec.follow_up, on_complete=rec.on_complete
+    ).start()
+    try:
+        fanout.submit(b"jpeg", "f1.jpg")
+        assert _wait_for(lambda: rec.sent == [("f1.jpg", None)])
+        assert rec.completed == []
+
+        release.set()
+        assert _wait_for(lambda: len(rec.completed) == 1)
+    finally:
+        fanout.stop()
+
+    job = rec.completed[0]
+    assert job.upload_ok is True
+    assert job.ws_ok is True
+    assert rec.follow_ups == [("f1.jpg", "https://cdn/f1.jpg")]
+    assert fanout.stats()["follow_ups"] == 1
+
+
+def test_url_goes_in_metadata_when_upload_finishes_first():
+    rec = _Recorder()
+    uploaded = threading.Event()
+    send_gate = threading.Event()
+
+    def upload(job):
+        uploaded.set()
+        return "https://cdn/f1.jpg"
+
+    def send(job, url):
+        send_gate.wait(5)
+        return rec.send(job, url)
+
+    fanout = FrameFanout(upload=upload, send=send, follow_up=rec.follow_up, on_complete=rec.on_complete)
+    # Run the upload lane before the WebSocket lane picks the frame up.
+    fanout._upload_lane.start()
+    fanout.submit(b"jpeg", "f1.jpg")
+    assert uploaded.wait(2)
+    assert _wait_for(lambda: fanout._upload_lane.in_flight == 0)
+    send_gate.set()
+    fanout._ws_lane.start()
+    try:
+        assert _wait_for(lambda: len(rec.completed) == 1)
+    finally:
+        fanout.stop()
+
+    assert rec.sent == [("f1.jpg", "https://cdn/f1.jpg")]
+    assert rec.follow_ups == []
+
+
+def test_full_lane_drops_oldest_queued_frame():
+    release = threading.Event()
+    rec = _Recorder()
+    uploads = []
+
+    def upload(job):
+        release.wait(5)
+        uploads.append(job.filename)
+        return "https://cdn/x.jpg"
+
+    fanout = FrameFanout(upload=upload, on_complete=rec.on_complete, max_in_flight=2, upload_workers=1).start()
+    try:
+        fanout.submit(b"1", "f1.jpg")
+        assert _wait_for(lambda: fanout._upload_lane._running == 1)
+        fanout.submit(b"2", "f2.jpg")
+        fanout.submit(b"3", "f3.jpg")  # lane full: f2 (oldest queued) is dropped
+
+        assert _wait_for(lambda: [job.filename for job in rec.completed] == ["f2.jpg"])
+        assert rec.completed[0].upload_dropped is True
+        assert rec.completed[0].upload_ok is None
+
+        release.set()
+        assert _wait_for(lambda: len(rec.completed) == 3)
+    finally:
+        fanout.stop()
+
+    assert uploads == ["f1.jpg", "f3.jpg"]
+    assert fanout.stats()["upload_dropped"] == 1
+
+
+def test_failed_sink_is_reported_without_follow_up():
+    rec = _Recorder()
+
+    def send(job, url):
+        raise ConnectionError("offline")
+
+    fanout = FrameFanout(
+        upload=lambda job: "https://cdn/f1.jpg",
+        send=send,
+        follow_up=rec.follow_up,
+        on_complete=rec.on_complete,
+    ).start()
+    try:
+        fanout.submit(b"jpeg", "f1.jpg")
+        assert _wait_for(lambda: len(rec.completed) == 1)
+    finally:
+        fanout.stop()
+
+    assert rec.completed[0].ws_ok is False
+    assert rec.follow_ups == []
+
+
+def test_no_sinks_completes_immediately():
+    rec = _Recorder()
+    fanout = FrameFanout(on_complete=rec.on_complete).start()
+    fanout.submit(b"jpeg", "f1.jpg")
+    fanout.stop()
+
+    assert len(rec.completed) == 1
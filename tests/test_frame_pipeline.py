@@ -0,0 +1,74 @@
+import pytest
+
+import frame_pipeline
+from frame_pipeline import FramePipeline, MetricsStage, TransformStage
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+
+def _frame(width=64, height=48):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+
+
+class _CountingCV2:
+    """Proxy real cv2 while counting encode/decode calls."""
+
+    def __init__(self):
+        self.encodes = 0
+        self.decodes = 0
+
+    def __getattr__(self, name):
+        return getattr(cv2, name)
+
+    def imencode(self, *args, **kwargs):
+        self.encodes += 1
+        return cv2.imencode(*args, **kwargs)
+
+    def imdecode(self, *args, **kwargs):
+        self.decodes += 1
+        return cv2.imdecode(*args, **kwargs)
+
+
+def test_pipeline_runs_stages_and_encodes_once(monkeypatch):
+    counting = _CountingCV2()
+    monkeypatch.setattr(frame_pipeline, "cv2", counting)
+
+    pipeline = FramePipeline(
+        [
+            TransformStage("crop", lambda f: f[8:40, 16:48]),
+            TransformStage("gray", lambda f: cv2.cvtColor(cv2.cvtColor(f, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)),
+            MetricsStage(),
+        ],
+        jpeg_quality=90,
+    )
+
+    result = pipeline.process(_frame())
+
+    assert counting.encodes == 1
+    assert counting.decodes == 0
+    assert (result.width, result.height) == (32, 32)
+    assert result.jpeg[:2] == b"\xff\xd8"
+    assert set(result.metrics) == {"brightness", "contrast_stddev", "laplacian_var"}
+    assert set(result.timings_ms) == {"crop", "gray", "metrics", "encode"}
+
+
+def test_process_bytes_passes_source_through_when_unmodified(monkeypatch):
+    ok, buf = cv2.imencode(".jpg", _frame())
+    source = buf.tobytes()
+
+    counting = _CountingCV2()
+    monkeypatch.setattr(frame_pipeline, "cv2", counting)
+
+    result = FramePipeline([MetricsStage()]).process_bytes(source)
+
+    assert result.jpeg == source
+    assert result.metrics is not None
+    assert counting.decodes == 1
+    assert counting.encodes == 0
+
+
+def test_process_bytes_rejects_undecodable_buffer():
+    with pytest.raises(ValueError):
+        FramePipeline().process_bytes(b"not-a-jpeg")
@@ -1,5 +1,7 @@
 from types import SimpleNamespace
 
+import pytest
+
 import frame_quality
 
 
@@ -166,3 +168,159 @@ def test_are_metrics_usable_respects_thresholds(monkeypatch):
         "contrast_stddev": 30.0,
         "laplacian_var": 200.0,
     }) is False
+
+
+def test_get_frame_quality_metrics_accepts_in_memory_buffer(monkeypatch):
+    decoded = []
+
+    class _BufferCV2(_FakeCV2):
+        IMREAD_GRAYSCALE = 0
+
+        def imread(self, _path, _flag):
+            raise AssertionError("buffer input must not hit the filesystem")
+
+        def imdecode(self, buf, _flag):
+            decoded.append(bytes(buf))
+            return _Gray(width=640, height=480)
+
+    monkeypatch.setattr(frame_quality, "cv2", _BufferCV2(brightness=99.0))
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_RESIZE_WIDTH", 320)
+
+    metrics = frame_quality.get_frame_quality_metrics(b"jpeg-bytes")
+
+    assert metrics["brightness"] == 99.0
+    assert decoded == [b"jpeg-bytes"]
+
+
+def test_is_frame_usable_rejects_empty_buffer(monkeypatch):
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_CHECK_ENABLED", True)
+
+    assert frame_quality.is_frame_usable(b"") is False
+
+
+def test_is_frame_usable_reuses_supplied_metrics(monkeypatch):
+    monkeypatch.setattr(frame_quality, "cv2", None)
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_CHECK_ENABLED", True)
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_MIN_BRIGHTNESS", 25.0)
+
+    metrics = {"brightness": 5.0, "contrast_stddev": 30.0, "laplacian_var": 200.0}
+
+    assert frame_quality.is_frame_usable("missing.jpg", metrics=metrics) is False
+
+
+def test_metrics_cache_serves_repeat_lookups_without_decoding(monkeypatch, tmp_path):
+    image = tmp_path / "img.jpg"
+    image.write_bytes(b"x")
+
+    fake_cv2 = _FakeCV2(brightness=120.0)
+    monkeypatch.setattr(frame_quality, "cv2", fake_cv2)
+    monkeypatch.setattr(frame_quality, "metrics_cache", frame_quality.MetricsCache(4))
+
+    first = frame_quality.get_frame_quality_metrics(str(image))
+    second = frame_quality.get_frame_quality_metrics(str(image))
+
+    assert first == second
+    assert fake_cv2.resize_calls == 1
+    stats = frame_quality.get_metrics_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_metrics_cache_invalidates_when_file_changes(monkeypatch, tmp_path):
+    image = tmp_path / "img.jpg"
+    image.write_bytes(b"x")
+
+    fake_cv2 = _FakeCV2()
+    monkeypatch.setattr(frame_quality, "cv2", fake_cv2)
+    monkeypatch.setattr(frame_quality, "metrics_cache", frame_quality.MetricsCache(4))
+
+    frame_quality.get_frame_quality_metrics(str(image))
+    image.write_bytes(b"xy")  # new size → new identity
+    frame_quality.get_frame_quality_metrics(str(image))
+
+    assert fake_cv2.resize_calls == 2
+    assert frame_quality.get_metrics_cache_stats()["misses"] == 2
+
+
+def test_metrics_cache_evicts_least_recently_used():
+    cache = frame_quality.MetricsCache(2)
+    cache.put("a", {"brightness": 1.0})
+    cache.put("b", {"brightness": 2.0})
+    assert cache.get("a") is not None  # refresh "a"
+    cache.put("c", {"brightness": 3.0})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["size"] == 2
+
+
+def test_evaluate_frame_decodes_once_and_lists_failed_thresholds(monkeypatch, tmp_path):
+    image = tmp_path / "img.jpg"
+    image.write_bytes(b"x")
+
+    fake_cv2 = _FakeCV2(brightness=20.0, contrast=5.0, laplacian_var=200.0)
+    monkeypatch.setattr(frame_quality, "cv2", fake_cv2)
+    monkeypatch.setattr(frame_quality, "metrics_cache", frame_quality.MetricsCache(0))
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_CHECK_ENABLED", True)
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_MIN_BRIGHTNESS", 25.0)
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_MIN_CONTRAST_STDDEV", 10.0)
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_MIN_LAPLACIAN_VAR", 80.0)
+    monkeypatch.setattr(frame_quality, "ENV_SENSE_DARKNESS_THRESHOLD", 40.0)
+    monkeypatch.setattr(frame_quality, "ENV_SENSE_OBSCURED_CONTRAST_MAX", 10.0)
+    monkeypatch.setattr(frame_quality, "ENV_SENSE_OBSCURED_LAPLACIAN_MAX", 50.0)
+
+    verdict = frame_quality.evaluate_frame(str(image))
+
+    assert fake_cv2.resize_calls == 1
+    assert verdict.usable is False
+    assert verdict.dark is True
+    assert verdict.obscured is False
+    assert verdict.failed_thresholds == ("min_brightness", "min_contrast_stddev")
+    assert verdict.metrics["brightness"] == 20.0
+
+
+def test_evaluate_frame_result_is_immutable():
+    verdict = frame_quality.evaluate_frame(
+        metrics={"brightness": 120.0, "contrast_stddev": 30.0, "laplacian_var": 200.0}
+    )
+
+    with pytest.raises(Exception):
+        verdict.usable = False
+    with pytest.raises(TypeError):
+        verdict.metrics["brightness"] = 0.0
+
+
+def test_evaluate_frame_with_supplied_metrics_skips_decode(monkeypatch):
+    monkeypatch.setattr(frame_quality, "cv2", None)
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_CHECK_ENABLED", True)
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_MAX_BRIGHTNESS", 210.0)
+
+    verdict = frame_quality.evaluate_frame(
+        b"never-decoded",
+        metrics={"brightness": 250.0, "contrast_stddev": 30.0, "laplacian_var": 200.0},
+    )
+
+    assert verdict.usable is False
+    assert verdict.failed_thresholds == ("max_brightness",)
+
+
+def test_evaluate_frame_missing_file_is_unreadable(monkeypatch):
+    monkeypatch.setattr(frame_quality, "cv2", _FakeCV2())
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_CHECK_ENABLED", True)
+
+    verdict = frame_quality.evaluate_frame("missing.jpg")
+
+    assert verdict.usable is False
+    assert verdict.metrics is None
+    assert verdict.failed_thresholds == ("unreadable",)
+
+
+def test_evaluate_frame_usable_when_check_disabled(monkeypatch):
+    monkeypatch.setattr(frame_quality, "FRAME_QUALITY_CHECK_ENABLED", False)
+
+    verdict = frame_quality.evaluate_frame(
+        metrics={"brightness": 1.0, "contrast_stddev": 1.0, "laplacian_var": 1.0}
+    )
+
+    assert verdict.usable is True
+    assert "min_brightness" in verdict.failed_thresholds
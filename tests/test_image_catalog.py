@@ -0,0 +1,110 @@
+import os
+import time
+
+import image_catalog
+from image_catalog import ImageCatalog
+
+
+def _touch(path, data=b"jpeg"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+def _settle(*dirs):
+    """Backdate directory mtimes so they are outside the racy window."""
+    past = time.time() - 60
+    for d in dirs:
+        os.utime(d, (past, past))
+
+
+def test_catalog_lists_images_recursively_in_case_insensitive_order(tmp_path):
+    _touch(tmp_path / "b.jpg")
+    _touch(tmp_path / "A.PNG")
+    _touch(tmp_path / "sub" / "c.jpeg")
+    _touch(tmp_path / "notes.txt")
+
+    catalog = ImageCatalog([("src", str(tmp_path))])
+
+    assert [p.relative_to(tmp_path).as_posix() for p in catalog.images("src")] == ["A.PNG", "b.jpg", "sub/c.jpeg"]
+
+
+def test_catalog_round_robins_across_sources_and_skips_empty_ones(tmp_path):
+    _touch(tmp_path / "one" / "1.jpg")
+    _touch(tmp_path / "one" / "2.jpg")
+    _touch(tmp_path / "two" / "x.jpg")
+    (tmp_path / "empty").mkdir()
+    catalog = ImageCatalog(
+        [("one", str(tmp_path / "one")), ("empty", str(tmp_path / "empty")), ("two", str(tmp_path / "two"))]
+    )
+
+    served = [(label, path.name) for label, path in (catalog.next_image() for _ in range(4))]
+
+    assert served == [("one", "1.jpg"), ("two", "x.jpg"), ("one", "2.jpg"), ("two", "x.jpg")]
+
+
+def test_catalog_without_images_returns_none(tmp_path):
+    catalog = ImageCatalog([("missing", str(tmp_path / "missing"))])
+
+    assert catalog.next_image() == (None, None)
+    assert catalog.next_from("missing") is None
+    assert catalog.count("missing") == 0
+
+
+def test_catalog_only_rescans_directories_whose_mtime_changed(tmp_path):
+    for i in range(50):
+        _touch(tmp_path / "old" / f"{i:03d}.jpg")
+    _touch(tmp_path / "new" / "a.jpg")
+    _settle(tmp_path, tmp_path / "old", tmp_path / "new")
+    catalog = ImageCatalog([("src", str(tmp_path))], refresh_interval_s=0)
+    index = catalog._index["src"]
+
+    assert catalog.count("src") == 51
+    assert index.scans == 3
+
+    # Unchanged tree: a refresh stats the three directories and lists none.
+    assert catalog.refresh() is False
+    assert index.scans == 3
+
+    _touch(tmp_path / "new" / "b.jpg")
+    assert catalog.count("src") == 52
+    assert index.scans == 4  # only "new" was re-listed
+
+
+def test_catalog_picks_up_new_and_deleted_images_and_keeps_cursor(tmp_path):
+    for name in ("a.jpg", "c.jpg"):
+        _touch(tmp_path / name)
+    catalog = ImageCatalog([("src", str(tmp_path))], refresh_interval_s=0)
+
+    assert catalog.next_from("src").name == "a.jpg"
+
+    _touch(tmp_path / "b.jpg")
+    assert catalog.next_from("src").name == "b.jpg"  # resumes after a.jpg
+
+    (tmp_path / "c.jpg").unlink()
+    assert catalog.next_from("src").name == "a.jpg"  # wrapped; c.jpg is gone
+
+
+def test_catalog_drops_removed_subdirectories(tmp_path):
+    _touch(tmp_path / "sub" / "a.jpg")
+    _touch(tmp_path / "top.jpg")
+    catalog = ImageCatalog([("src", str(tmp_path))], refresh_interval_s=0)
+    assert catalog.count("src") == 2
+
+    (tmp_path / "sub" / "a.jpg").unlink()
+    (tmp_path / "sub").rmdir()
+
+    assert [p.name for p in catalog.images("src")] == ["top.jpg"]
+
+
+def test_catalog_refresh_is_rate_limited(tmp_path, monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr(image_catalog.time, "monotonic", lambda: clock["now"])
+    _touch(tmp_path / "a.jpg")
+    catalog = ImageCatalog([("src", str(tmp_path))], refresh_interval_s=5.0)
+    assert catalog.count("src") == 1
+
+    _touch(tmp_path / "b.jpg")
+    assert catalog.count("src") == 1
+    clock["now"] += 5.0
+    assert catalog.count("src") == 2
@@ -0,0 +1,134 @@
+import math
+import random
+
+import pytest
+
+from level_tracker import LevelEstimate, LevelTracker
+from water_level_filter import WaterLevelFilter
+
+
+def make_tracker(**overrides):
+    params = {
+        "enabled": True,
+        "min_cm": 0.0,
+        "max_cm": 400.0,
+        "measurement_std_cm": 0.5,
+        "accel_std_cm_min2": 1.0,
+        "gate_sigma": 4.0,
+        "rebaseline_outlier_streak": 3,
+        "rebaseline_spread_max_cm": 2.0,
+    }
+    params.update(overrides)
+    return LevelTracker(**params)
+
+
+def _rising_trace(minutes, rise_cm_min, start_cm=150.0, noise_cm=0.3, seed=0):
+    rng = random.Random(seed)
+    for t in range(minutes * 60):  # one reading per second
+        yield float(t), start_cm - rise_cm_min * t / 60.0 + rng.gauss(0.0, noise_cm)
+
+
+def test_gating_statuses_match_water_level_filter():
+    tracker = make_tracker()
+    assert tracker.process(None) == (None, "no-reading")
+    assert tracker.process("abc") == (None, "non-numeric")
+    assert tracker.process(float("nan")) == (None, "non-finite")
+    assert tracker.process(500.0) == (None, "out-of-range")
+    assert tracker.estimate is None
+    assert make_tracker(enabled=False).process(42.0) == (42.0, "bypass")
+
+
+def test_tracks_rise_rate_without_moving_average_lag():
+    tracker = make_tracker()
+    average = WaterLevelFilter(
+        enabled=True, window_size=31, min_valid_samples=3, min_cm=0.0, max_cm=400.0,
+        modz_threshold=3.5, zero_mad_tolerance_cm=1.0,
+        rebaseline_outlier_streak=5, rebaseline_spread_max_cm=8.0,
+    )
+    for t, raw in _rising_trace(minutes=10, rise_cm_min=2.0):
+        tracker_cm, status = tracker.process(raw, timestamp=t)
+        assert status == "ok"
+        average_cm, _ = average.process(raw)
+
+    true_cm = 150.0 - 2.0 * (10 * 60 - 1) / 60.0
+    estimate = tracker.estimate
+    assert estimate.rise_rate_cm_min == pytest.approx(2.0, abs=0.2)
+    assert abs(tracker_cm - true_cm) < 0.3
+    # A 31-sample average trails a 2 cm/min rise by ~15 s ≈ 0.5 cm.
+    assert average_cm - true_cm > 0.4
+    assert estimate.distance_std_cm < 0.5
+    assert estimate.covariance[0][1] == estimate.covariance[1][0]
+
+
+def test_uncertainty_shrinks_as_readings_accumulate():
+    tracker = make_tracker()
+    stds = []
+    for t, raw in _rising_trace(minutes=2, rise_cm_min=0.0):
+        tracker.process(raw, timestamp=t)
+        stds.append(tracker.estimate.rise_rate_std_cm_min)
+    assert stds[-1] < stds[5] / 5
+
+
+def test_spike_is_gated_and_does_not_move_the_estimate():
+    tracker = make_tracker()
+    for t in range(30):
+        tracker.process(100.0 + (0.2 if t % 2 else -0.2), timestamp=float(t))
+    before = tracker.estimate.distance_cm
+
+    assert tracker.process(60.0, timestamp=30.0) == (None, "outlier-gate")
+    assert tracker.estimate.distance_cm == before
+    value, status = tracker.process(100.1, timestamp=31.0)
+    assert status == "ok" and abs(value - 100.0) < 0.3
+
+
+def test_sustained_step_rebaselines_the_track():
+    tracker = make_tracker()
+    for t in range(30):
+        tracker.process(100.0, timestamp=float(t))
+
+    assert tracker.process(70.0, timestamp=30.0)[1] == "outlier-gate"
+    assert tracker.process(70.5, timestamp=31.0)[1] == "outlier-gate"
+    value, status = tracker.process(70.2, timestamp=32.0)
+    assert status == "rebaseline" and value == 70.2
+    assert tracker.estimate.rise_rate_cm_min == 0.0
+    assert tracker.process(70.1, timestamp=33.0)[1] == "ok"
+
+
+def test_out_of_range_breaks_an_outlier_streak():
+    tracker = make_tracker()
+    for t in range(30):
+        tracker.process(100.0, timestamp=float(t))
+    tracker.process(70.0, timestamp=30.0)
+    tracker.process(70.0, timestamp=31.0)
+    tracker.process(999.0, timestamp=32.0)
+    assert tracker.process(70.0, timestamp=33.0)[1] == "outlier-gate"
+
+
+def test_dispersion_widens_measurement_noise():
+    calm, noisy = make_tracker(), make_tracker()
+    for tracker, dispersion in ((calm, 0.0), (noisy, 3.0)):
+        tracker.process(100.0, timestamp=0.0, dispersion_cm=dispersion)
+        tracker.process(103.0, timestamp=1.0, dispersion_cm=dispersion)
+    assert calm.process(200.0, timestamp=2.0)[1] == "outlier-gate"
+    assert noisy.estimate.distance_cm < calm.estimate.distance_cm
+
+
+def test_predict_extrapolates_without_changing_state():
+    tracker = make_tracker()
+    for t, raw in _rising_trace(minutes=5, rise_cm_min=3.0, noise_cm=0.0):
+        tracker.process(raw, timestamp=t)
+    now = tracker.estimate
+    later = tracker.predict(now.timestamp + 120.0)
+
+    assert later.distance_cm == pytest.approx(now.distance_cm - 6.0, abs=0.3)
+    assert later.covariance[0][0] > now.covariance[0][0]
+    assert tracker.estimate == now
+
+
+def test_time_to_distance():
+    rising = LevelEstimate(100.0, 2.0, ((0.1, 0.0), (0.0, 1e-6)), 0.0)
+    assert rising.time_to_distance_s(40.0) == pytest.approx(30 * 60)
+    assert rising.time_to_distance_s(120.0) == 0.0
+    falling = rising._replace(rise_rate_cm_min=-1.0)
+    assert math.isinf(falling.time_to_distance_s(40.0))
+
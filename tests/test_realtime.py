@@ -0,0 +1,99 @@
+import multiprocessing
+
+import pytest
+
+import realtime
+from realtime import JitterHistogram, apply_realtime
+
+
+def test_apply_realtime_default_is_noop(monkeypatch):
+    def forbidden(*_args):
+        raise AssertionError("must not touch scheduling")
+
+    monkeypatch.setattr(realtime.os, "sched_setscheduler", forbidden, raising=False)
+    monkeypatch.setattr(realtime.os, "sched_setaffinity", forbidden, raising=False)
+
+    assert apply_realtime() == []
+
+
+def test_apply_realtime_sets_policy_affinity_and_memory_lock(monkeypatch):
+    calls = []
+    monkeypatch.setattr(realtime.os, "SCHED_FIFO", 1, raising=False)
+    monkeypatch.setattr(realtime.os, "sched_param", lambda priority: priority, raising=False)
+    monkeypatch.setattr(
+        realtime.os, "sched_setscheduler", lambda pid, policy, param: calls.append(("sched", pid, policy, param)),
+        raising=False,
+    )
+    monkeypatch.setattr(
+        realtime.os, "sched_setaffinity", lambda pid, cpus: calls.append(("affinity", pid, cpus)), raising=False
+    )
+    monkeypatch.setattr(realtime, "_mlockall", lambda: calls.append(("mlockall",)))
+
+    applied = apply_realtime("fifo", 20, [3, 2], lock_memory=True)
+
+    assert applied == ["SCHED_FIFO priority 20", "CPUs 2,3", "memory locked"]
+    assert calls == [("sched", 0, 1, 20), ("affinity", 0, {2, 3}), ("mlockall",)]
+
+
+def test_apply_realtime_falls_back_without_privileges(monkeypatch, caplog):
+    def denied(*_args):
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(realtime.os, "SCHED_RR", 2, raising=False)
+    monkeypatch.setattr(realtime.os, "sched_param", lambda priority: priority, raising=False)
+    monkeypatch.setattr(realtime.os, "sched_setscheduler", denied, raising=False)
+    monkeypatch.setattr(realtime.os, "sched_setaffinity", denied, raising=False)
+    monkeypatch.setattr(realtime, "_mlockall", denied)
+
+    with caplog.at_level("WARNING"):
+        applied = apply_realtime("rr", 50, [1], lock_memory=True)
+
+    assert applied == []
+    assert "Cannot set SCHED_RR" in caplog.text
+    assert "Cannot pin to CPUs [1]" in caplog.text
+    assert "Cannot lock memory" in caplog.text
+
+
+def test_apply_realtime_warns_on_unknown_policy(caplog):
+    with caplog.at_level("WARNING"):
+        assert apply_realtime("deadline") == []
+    assert "Unknown scheduling policy 'deadline'" in caplog.text
+
+
+def test_jitter_histogram_buckets_and_percentiles():
+    hist = JitterHistogram()
+    for latency_s in [0.0, 0.0000005, 0.000003, 0.00005, 0.00006, 0.002]:
+        hist.record(latency_s)
+
+    assert hist.total == 6
+    assert hist.counts[0] == 2  # < 1 µs
+    assert hist.counts[2] == 1  # 3 µs in [2, 4)
+    assert hist.counts[6] == 2  # 50, 60 µs in [32, 64)
+    assert hist.counts[11] == 1  # 2000 µs in [1024, 2048)
+    assert hist.percentile_us(0.5) == 4
+    assert hist.percentile_us(1.0) == 2048
+    assert hist.summary() == "n=6 p50<4µs p99<2.048ms max<2.048ms"
+    assert "32µs–64µs" in hist.format()
+
+    hist.record(3600.0)
+    assert hist.counts[-1] == 1
+
+    hist.reset()
+    assert hist.total == 0
+    assert hist.percentile_us(0.5) is None
+    assert hist.summary() == "no samples"
+
+
+def test_jitter_histogram_shared_with_forked_process():
+    hist = JitterHistogram(multiprocessing.RawArray("Q", JitterHistogram.BUCKETS))
+    child = multiprocessing.get_context("fork").Process(target=hist.record, args=(0.0001,))
+    child.start()
+    child.join(timeout=10)
+
+    assert hist.total == 1
+    assert hist.counts[7] == 1
+
+
+def test_jitter_histogram_rejects_wrong_size():
+    with pytest.raises(ValueError):
+        JitterHistogram([0] * 3)
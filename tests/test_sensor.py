@@ -1,4 +1,12 @@
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
 import sensor
+from fake_gpio import FakeJSNSR04GPIO
 
 
 def test_get_water_level_mock_value_in_expected_range(monkeypatch):
@@ -39,3 +47,333 @@ def test_update_risk_led_logs_score_and_pin_when_gpio_unavailable(monkeypatch, c
         sensor.update_risk_led(80)
 
     assert "Risk score=80 tier=CRITICAL active_pin=3" in caplog.text
+
+
+def _install_fake_gpio(monkeypatch, backend, virtual_clock=True, **kwargs):
+    fake = FakeJSNSR04GPIO(
+        trig_pin=sensor.TRIG, echo_pin=sensor.ECHO, virtual_clock=virtual_clock, **kwargs
+    )
+    monkeypatch.setitem(sys.modules, "RPi", SimpleNamespace(GPIO=fake))
+    monkeypatch.setitem(sys.modules, "RPi.GPIO", fake)
+    if virtual_clock:
+        monkeypatch.setattr(sensor, "time", fake.clock())
+    monkeypatch.setattr(sensor, "ECHO_BACKEND", backend)
+    monkeypatch.setattr(sensor, "_edge_timer", None)
+    monkeypatch.setattr(sensor, "_edge_backend_failed", False)
+    monkeypatch.setattr(sensor, "SENSOR_TEMPERATURE_C", None)
+    monkeypatch.setattr(sensor, "TIMEOUT", 0.1)
+    return fake
+
+
+def test_edge_backend_measures_distance_with_fake_gpio(monkeypatch):
+    fake = _install_fake_gpio(monkeypatch, "edge", distance_cm=150.0)
+
+    distances = [sensor._read_single_distance_cm() for _ in range(3)]
+
+    assert distances == [pytest.approx(150.0, abs=0.01)] * 3
+    assert fake.triggers == 3
+    # Edge mode never polls ECHO after the trigger (only the pre-trigger check).
+    assert fake.input_calls == 3
+
+
+def test_poll_backend_measures_distance_with_fake_gpio(monkeypatch):
+    fake = _install_fake_gpio(monkeypatch, "poll", distance_cm=150.0, poll_cost_ns=2_000)
+
+    # Resolution is bounded by one input() call (2 µs ≈ 0.03 cm).
+    assert sensor._read_single_distance_cm() == pytest.approx(150.0, abs=0.1)
+    # ...but it costs one GPIO read per 2 µs of echo (~8.7 ms at 150 cm).
+    assert fake.input_calls > 4000
+
+
+def test_edge_backend_sleeps_instead_of_spinning(monkeypatch):
+    _install_fake_gpio(monkeypatch, "poll", virtual_clock=False, distance_cm=500.0)
+    cpu0 = time.thread_time()
+    sensor._read_single_distance_cm()
+    poll_cpu = time.thread_time() - cpu0
+
+    _install_fake_gpio(monkeypatch, "edge", virtual_clock=False, distance_cm=500.0)
+    cpu0 = time.thread_time()
+    assert sensor._read_single_distance_cm() == pytest.approx(500.0, rel=0.25)
+    edge_cpu = time.thread_time() - cpu0
+
+    # A 500 cm echo is a ~29 ms pulse: polling burns it on CPU, edge mode sleeps.
+    assert poll_cpu > 0.01
+    assert edge_cpu < poll_cpu / 2
+
+
+def test_ping_records_settle_sleep_oversleep_in_jitter_histogram(monkeypatch):
+    fake = _install_fake_gpio(monkeypatch, "edge", distance_cm=150.0)
+    clock = fake.clock()
+    late_sleep = clock.sleep
+
+    def oversleep(seconds):
+        late_sleep(seconds + (0.0005 if seconds == 0.06 else 0.0))
+
+    monkeypatch.setattr(sensor.time, "sleep", oversleep)
+    hist = sensor.JitterHistogram()
+    monkeypatch.setattr(sensor, "ping_jitter", hist)
+
+    sensor._read_single_distance_cm()
+
+    assert hist.total == 1
+    assert hist.counts[9] == 1  # 500 µs late → [256, 512) µs bucket
+
+
+def test_continuous_sampler_runs_worker_setup_on_its_thread():
+    seen = []
+    sampler = sensor.ContinuousSampler(
+        lambda: 50.0, interval_s=0.001, worker_setup=lambda: seen.append(threading.current_thread().name)
+    )
+    sampler.start()
+    deadline = time.monotonic() + 2.0
+    while not seen and time.monotonic() < deadline:
+        time.sleep(0.005)
+    sampler.stop()
+
+    assert seen == ["sensor_sampler"]
+
+
+def test_edge_backend_times_out_without_echo(monkeypatch):
+    _install_fake_gpio(monkeypatch, "edge", respond=False)
+    monkeypatch.setattr(sensor, "TIMEOUT", 0.02)
+
+    with pytest.raises(TimeoutError, match="echo HIGH"):
+        sensor._read_single_distance_cm()
+
+
+def test_edge_backend_falls_back_to_polling_when_detection_fails(monkeypatch):
+    fake = _install_fake_gpio(monkeypatch, "edge", distance_cm=100.0)
+
+    def refuse(*_args, **_kwargs):
+        raise RuntimeError("Failed to add edge detection")
+
+    monkeypatch.setattr(fake, "add_event_detect", refuse)
+
+    assert sensor._read_single_distance_cm() == pytest.approx(100.0, abs=0.1)
+    assert sensor._edge_backend_failed is True
+    assert fake.input_calls > 1
+
+
+def test_continuous_sampler_reports_windowed_median_age_and_count(monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr(sensor.time, "monotonic", lambda: clock["now"])
+    sampler = sensor.ContinuousSampler(lambda: None, window_s=1.0, min_valid=3)
+
+    sampler.add(80.0, timestamp=98.0)  # outside the window
+    sampler.add(50.0, timestamp=99.2)
+    sampler.add(None, timestamp=99.4)  # timeout / out of range
+    sampler.add(52.0, timestamp=99.6)
+    sampler.add(51.0, timestamp=99.9)
+
+    reading = sampler.latest()
+
+    assert reading.distance_cm == 51.0
+    assert reading.samples == 3
+    assert reading.age_s == pytest.approx(0.1)
+
+
+def test_continuous_sampler_needs_min_valid_and_fresh_samples(monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr(sensor.time, "monotonic", lambda: clock["now"])
+    sampler = sensor.ContinuousSampler(lambda: None, window_s=5.0, min_valid=2)
+
+    sampler.add(50.0, timestamp=99.0)
+    assert sampler.latest() is None
+
+    sampler.add(51.0, timestamp=97.0)
+    assert sampler.latest().samples == 2
+    # Newest sample is 1 s old.
+    assert sampler.latest(max_age_s=0.5) is None
+
+
+def test_continuous_sampler_thread_fills_ring_buffer():
+    pings = iter([40.0, 41.0, None, 42.0] + [43.0] * 1000)
+
+    def read():
+        value = next(pings)
+        if value is None:
+            raise TimeoutError("no echo")
+        return value
+
+    sampler = sensor.ContinuousSampler(read, buffer_size=8, window_s=10.0, interval_s=0.001, min_valid=3)
+    sampler.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while sampler.pings < 8 and time.monotonic() < deadline:
+            time.sleep(0.005)
+    finally:
+        sampler.stop()
+
+    assert sampler.errors >= 1
+    assert len(sampler._buffer) == 8
+    assert sampler.latest() is not None
+
+
+def test_process_sampler_publishes_pings_from_child_process():
+    pings = iter([40.0, None, TimeoutError("no echo")] + [43.0] * 100_000)
+
+    def read():
+        value = next(pings)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    sampler = sensor.ProcessSampler(read, buffer_size=16, window_s=10.0, interval_s=0.001, min_valid=3)
+    sampler.start()
+    try:
+        assert sampler.running
+        deadline = time.monotonic() + 5.0
+        while sampler.pings < 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        reading = sampler.latest()
+        errors = sampler.errors
+    finally:
+        sampler.stop()
+
+    assert errors == 1
+    assert reading.distance_cm == 43.0
+    assert reading.samples >= 3
+    assert not sampler.running
+    assert sampler.latest() is None
+
+
+def test_process_sampler_window_reads_only_valid_recent_pings(monkeypatch):
+    monkeypatch.setattr(sensor.time, "monotonic", lambda: 100.0)
+    sampler = sensor.ProcessSampler(lambda: None, buffer_size=8, window_s=1.0, min_valid=2)
+    sampler._ring = sensor.SharedPingRing.create(8)
+    try:
+        ring = sampler._ring
+        ring.publish(98.0, 80.0)  # outside the window
+        ring.publish(99.2, 50.0)
+        ring.publish(99.5, None, sensor.PING_TIMEOUT)
+        ring.publish(99.9, 52.0)
+
+        assert sampler.window_samples(100.0) == [(99.2, 50.0), (99.9, 52.0)]
+        reading = sampler.latest()
+    finally:
+        sampler.stop()
+
+    assert reading.distance_cm == 51.0
+    assert reading.age_s == pytest.approx(0.1)
+
+
+def test_get_water_level_returns_sampler_value_without_blocking(monkeypatch):
+    monkeypatch.setattr(sensor, "MOCK", False)
+    monkeypatch.setattr(sensor, "GPIO_AVAILABLE", True)
+
+    def no_burst():
+        raise AssertionError("burst must not run while the sampler is active")
+
+    monkeypatch.setattr(sensor, "_burst_reading", no_burst)
+    sampler = sensor.ContinuousSampler(lambda: None, window_s=10.0, min_valid=1)
+    sampler.add(61.5)
+    monkeypatch.setattr(sampler, "_thread", SimpleNamespace(is_alive=lambda: True))
+    monkeypatch.setattr(sensor, "_sampler", sampler)
+
+    reading = sensor.get_water_level_reading()
+
+    assert reading.distance_cm == 61.5
+    assert reading.samples == 1
+    assert sensor.get_water_level() == 61.5
+
+
+def _scripted_pings(monkeypatch, values):
+    pings = iter(values)
+    calls = []
+
+    def read():
+        calls.append(1)
+        value = next(pings)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    monkeypatch.setattr(sensor, "_read_single_distance_cm", read)
+    monkeypatch.setattr(sensor.time, "sleep", lambda _s: None)
+    monkeypatch.setattr(sensor, "SENSOR_BURST_ADAPTIVE", True)
+    monkeypatch.setattr(sensor, "SENSOR_BURST_SAMPLES", 7)
+    monkeypatch.setattr(sensor, "SENSOR_BURST_MIN_VALID", 3)
+    monkeypatch.setattr(sensor, "SENSOR_BURST_MAX_SAMPLES", 12)
+    monkeypatch.setattr(sensor, "SENSOR_BURST_TOLERANCE_CM", 0.3)
+    return calls
+
+
+def test_adaptive_burst_stops_early_when_pings_agree(monkeypatch):
+    calls = _scripted_pings(monkeypatch, [50.0, 50.05, 49.98] + [99.0] * 20)
+
+    reading = sensor._burst_reading()
+
+    assert len(calls) == 3
+    assert reading.distance_cm == 50.0
+    assert reading.samples == 3
+    assert reading.dispersion_cm <= 0.3
+
+
+def test_adaptive_burst_extends_noisy_bursts_up_to_cap(monkeypatch):
+    noisy = [40.0, 60.0, 45.0, 55.0, 42.0, 58.0, 47.0, 53.0, 41.0, 59.0, 50.0, 50.0, 50.0]
+    calls = _scripted_pings(monkeypatch, noisy)
+
+    reading = sensor._burst_reading()
+
+    assert len(calls) == 12
+    assert reading.samples == 12
+    assert reading.dispersion_cm > 0.3
+
+
+def test_adaptive_burst_can_settle_after_nominal_size(monkeypatch):
+    pings = [40.0, 60.0, 45.0, 55.0]
+    calls = _scripted_pings(monkeypatch, pings + [50.0] * 10)
+
+    reading = sensor._burst_reading()
+
+    assert len(calls) == 9  # past the nominal 7, short of the cap
+    assert reading.dispersion_cm <= 0.3
+
+
+def test_fixed_burst_when_adaptive_disabled(monkeypatch):
+    calls = _scripted_pings(monkeypatch, [50.0] * 20)
+    monkeypatch.setattr(sensor, "SENSOR_BURST_ADAPTIVE", False)
+
+    reading = sensor._burst_reading()
+
+    assert len(calls) == 7
+    assert reading.samples == 7
+    assert reading.dispersion_cm == 0.0
+
+
+def test_burst_counts_only_valid_pings(monkeypatch):
+    _scripted_pings(monkeypatch, [TimeoutError("no echo"), None, 50.0, 50.1, 50.0] + [50.0] * 20)
+
+    reading = sensor._burst_reading()
+
+    assert reading.samples == 3
+
+
+def test_dispersion_to_signal_strength(monkeypatch):
+    monkeypatch.setattr(sensor, "SENSOR_SIGNAL_DISPERSION_FULL_SCALE_CM", 5.0)
+
+    assert sensor.dispersion_to_signal_strength(0.0) == 100
+    assert sensor.dispersion_to_signal_strength(2.5) == 50
+    assert sensor.dispersion_to_signal_strength(9.0) == 0
+    assert sensor.dispersion_to_signal_strength(None) == 0
+
+
+def test_predicted_risk_score_escalates_on_confident_rise(monkeypatch):
+    from level_tracker import LevelEstimate
+
+    monkeypatch.setattr(sensor, "RISK_FALLBACK_SAFE_ABOVE_CM", 50.0)
+    monkeypatch.setattr(sensor, "RISK_FALLBACK_WARNING_ABOVE_CM", 30.0)
+    rate_var = (0.1 / 60.0) ** 2  # ±0.1 cm/min
+
+    steady = LevelEstimate(60.0, 0.0, ((0.1, 0.0), (0.0, rate_var)), 0.0)
+    rising = steady._replace(rise_rate_cm_min=2.0)  # warning in ~5 min, critical in ~15
+    uncertain = LevelEstimate(60.0, 2.0, ((0.1, 0.0), (0.0, (2.0 / 60.0) ** 2)), 0.0)
+
+    assert sensor.predicted_risk_score(None, 600) is None
+    assert sensor.predicted_risk_score(steady, 600) == 0
+    assert sensor.predicted_risk_score(rising, 600) == 50
+    assert sensor.predicted_risk_score(rising, 1200) == 80
+    assert sensor.predicted_risk_score(rising, 0) == 0
+    assert sensor.predicted_risk_score(uncertain, 1200) == 0
+    # Never below the tier of the current level.
+    assert sensor.predicted_risk_score(steady._replace(distance_cm=20.0, rise_rate_cm_min=-5.0), 600) == 80
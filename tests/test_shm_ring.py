@@ -0,0 +1,68 @@
+import multiprocessing
+
+import pytest
+
+from shm_ring import PING_ERROR, PING_OK, PING_OUT_OF_RANGE, PING_TIMEOUT, SharedPingRing
+
+
+@pytest.fixture
+def ring():
+    r = SharedPingRing.create(4)
+    yield r
+    r.close()
+
+
+def test_ring_returns_records_newest_first(ring):
+    ring.publish(1.0, 50.0)
+    ring.publish(2.0, None, PING_OUT_OF_RANGE)
+    ring.publish(3.0, None, PING_TIMEOUT)
+
+    assert list(ring.iter_newest()) == [
+        (3.0, None, PING_TIMEOUT),
+        (2.0, None, PING_OUT_OF_RANGE),
+        (1.0, 50.0, PING_OK),
+    ]
+    assert ring.published == 3
+    assert ring.errors == 1
+
+
+def test_ring_keeps_only_the_last_capacity_records(ring):
+    for i in range(10):
+        ring.publish(float(i), 40.0 + i)
+
+    assert [ts for ts, _, _ in ring.iter_newest()] == [9.0, 8.0, 7.0, 6.0]
+    assert ring.published == 10
+
+
+def test_ring_skips_slot_being_overwritten(ring):
+    for i in range(6):
+        ring.publish(float(i), 40.0 + i)
+    # Writer is mid-way through seq 6, which reuses the slot of seq 2.
+    ring._stamps[6 % ring.capacity] = 2 * 6 + 1
+
+    # Seq 5, 4, 3 are intact; seq 2's slot is torn, so iteration stops there.
+    assert [ts for ts, _, _ in ring.iter_newest()] == [5.0, 4.0, 3.0]
+
+
+def _writer(ring, n):
+    for i in range(n):
+        ring.publish(float(i), 100.0 + i, PING_ERROR if i % 2 else PING_OK)
+
+
+def test_ring_is_shared_with_forked_writer():
+    ring = SharedPingRing.create(8)
+    try:
+        child = multiprocessing.get_context("fork").Process(target=_writer, args=(ring, 20))
+        child.start()
+        child.join(timeout=10)
+
+        assert child.exitcode == 0
+        assert ring.published == 20
+        assert ring.errors == 10
+        assert list(ring.iter_newest())[0] == (19.0, 119.0, PING_ERROR)
+
+        reader = SharedPingRing.attach(ring.name)
+        assert len(list(reader.iter_newest())) == 8
+        reader.close()
+    finally:
+        ring.close()
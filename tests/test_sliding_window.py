@@ -0,0 +1,69 @@
+import random
+import statistics
+
+import pytest
+
+import sliding_window
+from sliding_window import IndexableSkiplist, SlidingMedianWindow
+
+
+def _reference_mad(values):
+    med = statistics.median(values)
+    return statistics.median([abs(x - med) for x in values])
+
+
+def test_skiplist_keeps_sorted_order_with_duplicates():
+    rng = random.Random(1)
+    sl = IndexableSkiplist(expected_size=50)
+    values = [rng.choice([1.0, 2.5, 2.5, 7.0]) + rng.randint(0, 5) for _ in range(200)]
+    for v in values:
+        sl.insert(v)
+    assert list(sl) == sorted(values)
+    assert [sl[i] for i in range(len(sl))] == sorted(values)
+
+    for v in values[::2]:
+        sl.remove(v)
+    remaining = sorted(values[1::2])
+    assert list(sl) == remaining
+    assert sl.rank(4.0) == sum(1 for v in remaining if v < 4.0)
+
+
+def test_skiplist_remove_missing_raises():
+    sl = IndexableSkiplist()
+    sl.insert(1.0)
+    with pytest.raises(KeyError):
+        sl.remove(2.0)
+    with pytest.raises(IndexError):
+        sl[1]
+
+
+@pytest.mark.parametrize("use_skiplist", [False, True])
+@pytest.mark.parametrize("maxlen", [1, 2, 7, 40, 41, 100])
+def test_window_matches_statistics_exactly(monkeypatch, use_skiplist, maxlen):
+    if use_skiplist:
+        monkeypatch.setattr(sliding_window, "SKIPLIST_MIN_SIZE", 0)
+    rng = random.Random(maxlen)
+    window = SlidingMedianWindow(maxlen)
+    values = []
+    for _ in range(600):
+        # Quantised values so ties and zero deviations are common.
+        v = round(rng.gauss(100.0, 3.0), 1) if rng.random() < 0.9 else rng.uniform(0, 400)
+        window.append(v)
+        values = (values + [v])[-maxlen:]
+        assert list(window) == values
+        assert window.median() == statistics.median(values)
+        assert window.mad() == _reference_mad(values)
+        assert window.mean() == pytest.approx(sum(values) / len(values), rel=1e-12)
+
+
+def test_window_clear_and_extend():
+    window = SlidingMedianWindow(3)
+    window.extend([5.0, 1.0, 3.0, 9.0])
+    assert list(window) == [1.0, 3.0, 9.0]
+    assert window.median() == 3.0
+    window.clear()
+    assert len(window) == 0
+    with pytest.raises(ValueError):
+        window.median()
+    window.append(2.0)
+    assert window.mean() == 2.0
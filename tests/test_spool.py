@@ -0,0 +1,175 @@
+import os
+import sqlite3
+
+from spool import Spool
+
+
+def _stored_rows(directory):
+    db = sqlite3.connect(str(directory / "spool.db"))
+    try:
+        return db.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+    finally:
+        db.close()
+
+
+def test_spool_uses_wal_mode(tmp_path):
+    spool = Spool(tmp_path)
+    try:
+        mode = spool._db.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        spool.close()
+    assert mode.lower() == "wal"
+
+
+def test_puts_are_buffered_until_batch_is_full(tmp_path):
+    spool = Spool(tmp_path, flush_batch=3, flush_interval_s=3600)
+    try:
+        spool.put("reading", {"n": 1})
+        spool.put("reading", {"n": 2})
+        assert _stored_rows(tmp_path) == 0
+        assert spool.count("reading") == 2
+
+        spool.put("reading", {"n": 3})
+        assert _stored_rows(tmp_path) == 3
+        assert spool.flushes == 1
+    finally:
+        spool.close()
+
+
+def test_close_flushes_pending_items(tmp_path):
+    spool = Spool(tmp_path, flush_batch=100, flush_interval_s=3600)
+    spool.put("reading", {"n": 1})
+    spool.close()
+
+    reopened = Spool(tmp_path)
+    try:
+        assert [payload for _, payload in reopened.peek("reading", 10)] == [{"n": 1}]
+    finally:
+        reopened.close()
+
+
+def test_peek_returns_oldest_timestamp_first_per_kind(tmp_path):
+    spool = Spool(tmp_path, flush_batch=100)
+    try:
+        spool.put("reading", {"n": "late"}, ts=300)
+        spool.put("reading", {"n": "early"}, ts=100)
+        spool.put("frame", {"n": "frame"}, ts=50)
+        spool.put("reading", {"n": "middle"}, ts=200)
+
+        assert [p["n"] for _, p in spool.peek("reading", 10)] == ["early", "middle", "late"]
+        assert [p["n"] for _, p in spool.peek("frame", 10)] == ["frame"]
+    finally:
+        spool.close()
+
+
+def test_ack_and_update(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    try:
+        spool.put("frame", {"pending_upload": True})
+        spool.put("frame", {"pending_upload": True})
+        (first_id, first), _ = spool.peek("frame", 2)
+
+        first["pending_upload"] = False
+        spool.update(first_id, first)
+        assert spool.peek("frame", 1)[0][1] == {"pending_upload": False}
+
+        spool.ack([first_id])
+        assert spool.count("frame") == 1
+    finally:
+        spool.close()
+
+
+def test_cap_evicts_oldest_rows_and_their_files(tmp_path):
+    spool = Spool(tmp_path, max_rows={"frame": 2}, flush_batch=1)
+    try:
+        paths = []
+        for i in range(3):
+            path = spool.store_file(b"jpeg-%d" % i, f"frame_{i}.jpg")
+            paths.append(path)
+            spool.put("frame", {"path": path}, ts=i, file=path)
+
+        assert spool.count("frame") == 2
+        assert spool.evicted == 1
+        assert [p["path"] for _, p in spool.peek("frame", 10)] == paths[1:]
+        assert not os.path.exists(paths[0])
+
+        ids = [item_id for item_id, _ in spool.peek("frame", 10)]
+        spool.ack(ids)
+        assert not os.path.exists(paths[1])
+        assert not os.path.exists(paths[2])
+    finally:
+        spool.close()
+
+
+def test_store_file_keeps_copies_of_the_same_name_apart(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    try:
+        first = spool.store_file(b"one", "normal1.jpg")
+        second = spool.store_file(b"two", "normal1.jpg")
+        assert first != second
+        assert first.endswith("_normal1.jpg")
+        spool.put("frame", {"path": first}, ts=1, file=first)
+        spool.put("frame", {"path": second}, ts=2, file=second)
+
+        spool.ack([spool.peek("frame", 1)[0][0]])
+
+        assert not os.path.exists(first)
+        assert open(second, "rb").read() == b"two"
+    finally:
+        spool.close()
+
+
+def test_peek_sees_buffered_items_without_committing(tmp_path):
+    spool = Spool(tmp_path, flush_batch=100, flush_interval_s=3600)
+    try:
+        spool.put("reading", {"n": 1}, ts=10)
+        spool.flush()
+        spool.put("reading", {"n": 0}, ts=5)
+        spool.put("reading", {"n": 2}, ts=20)
+
+        items = spool.peek("reading", 2)
+        assert [p["n"] for _, p in items] == [0, 1]
+        assert spool.flushes == 1
+        assert _stored_rows(tmp_path) == 1
+
+        spool.ack([item_id for item_id, _ in items])
+        assert [p["n"] for _, p in spool.peek("reading", 10)] == [2]
+        assert spool.count("reading") == 1
+    finally:
+        spool.close()
+
+
+def test_peeked_buffered_ids_stay_valid_across_a_flush(tmp_path):
+    spool = Spool(tmp_path, flush_batch=100, flush_interval_s=3600)
+    try:
+        path = spool.store_file(b"jpeg", "frame.jpg")
+        spool.put("frame", {"pending_upload": True}, ts=1, file=path)
+        spool.put("frame", {"pending_upload": True}, ts=2)
+        (item_id, _), _ = spool.peek("frame", 2)
+        assert item_id < 0
+
+        spool.update(item_id, {"pending_upload": False})
+        spool.flush()
+        assert spool.peek("frame", 1)[0][1] == {"pending_upload": False}
+
+        spool.ack([item_id])
+        assert not os.path.exists(path)
+        assert spool.count("frame") == 1
+    finally:
+        spool.close()
+
+
+def test_open_removes_files_without_a_row(tmp_path):
+    spool = Spool(tmp_path, flush_batch=100, flush_interval_s=3600)
+    kept = spool.store_file(b"kept", "kept.jpg")
+    spool.put("frame", {"path": kept}, file=kept)
+    spool.flush()
+    lost = spool.store_file(b"lost", "lost.jpg")  # row still buffered...
+    spool._db.close()  # ...when the process dies
+
+    reopened = Spool(tmp_path)
+    try:
+        assert os.path.exists(kept)
+        assert not os.path.exists(lost)
+    finally:
+        reopened.close()
@@ -0,0 +1,329 @@
+import threading
+import time
+
+import requests
+
+from spool import Spool
+from stand_in_server import StandInServer
+from telemetry import TelemetrySender
+
+
+class _FakeResponse:
+    def __init__(self, status_code=200, text=""):
+        self.status_code = status_code
+        self.text = text
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error", response=self)
+
+
+class _FakeSession:
+    def __init__(self, status_code=200, delay=0.0, exc=None):
+        self.status_code = status_code
+        self.delay = delay
+        self.exc = exc
+        self.posts = []
+        self.closed = False
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        if self.delay:
+            time.sleep(self.delay)
+        self.posts.append({"url": url, "json": json, "headers": headers, "timeout": timeout})
+        if self.exc is not None:
+            raise self.exc
+        return _FakeResponse(self.status_code)
+
+    def close(self):
+        self.closed = True
+
+
+def _payload(i):
+    return {"sensor_device_id": 1, "raw_distance_cm": float(i)}
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_submit_does_not_block_on_slow_backend():
+    session = _FakeSession(delay=0.5)
+    sender = TelemetrySender("http://backend/api", session=session)
+    sender.start()
+    try:
+        t0 = time.monotonic()
+        for i in range(5):
+            sender.submit(_payload(i))
+        assert time.monotonic() - t0 < 0.1
+    finally:
+        sender.stop(drain_timeout=0)
+
+
+def test_full_queue_drops_oldest_reading():
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", max_queue=3, session=session)
+
+    results = [sender.submit(_payload(i)) for i in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert sender.queue_depth == 3
+    stats = sender.stats()
+    assert stats["dropped"] == 2
+    assert stats["submitted"] == 5
+
+    sender.start()
+    sender.stop()
+    assert [p["json"]["raw_distance_cm"] for p in session.posts] == [2.0, 3.0, 4.0]
+
+
+def test_background_delivery_sends_headers_and_records_latency():
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", api_key="secret", timeout=3.0, session=session)
+    sender.start()
+    sender.submit(_payload(1))
+
+    assert _wait_for(lambda: sender.stats()["sent"] == 1)
+    sender.stop()
+
+    post = session.posts[0]
+    assert post["url"] == "http://backend/api"
+    assert post["headers"] == {"x-api-key": "secret"}
+    assert post["timeout"] == 3.0
+    stats = sender.stats()
+    assert stats["last_latency_ms"] is not None
+    assert stats["avg_latency_ms"] is not None
+    assert stats["queue_depth"] == 0
+    assert session.closed is True
+
+
+def test_deliver_counts_rate_limited_responses():
+    sender = TelemetrySender("http://backend/api", session=_FakeSession(status_code=429))
+
+    assert sender.deliver(_payload(1)) is False
+    assert sender.stats()["rate_limited"] == 1
+    assert sender.stats()["sent"] == 0
+
+
+def test_deliver_counts_timeouts_and_http_errors():
+    sender = TelemetrySender(
+        "http://backend/api", session=_FakeSession(exc=requests.exceptions.Timeout("slow"))
+    )
+    assert sender.deliver(_payload(1)) is False
+
+    sender._session = _FakeSession(status_code=500)
+    assert sender.deliver(_payload(2)) is False
+
+    assert sender.stats()["failed"] == 2
+
+
+def test_batching_flushes_when_batch_is_full():
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", session=session, batch_size=3, batch_max_age_s=60)
+    sender.start()
+    try:
+        for i in range(3):
+            sender.submit(_payload(i))
+        assert _wait_for(lambda: len(session.posts) == 1)
+    finally:
+        sender.stop(drain_timeout=0)
+
+    assert [p["raw_distance_cm"] for p in session.posts[0]["json"]] == [0.0, 1.0, 2.0]
+    stats = sender.stats()
+    assert stats["sent"] == 3
+    assert stats["batches"] == 1
+
+
+def test_batching_flushes_by_age():
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", session=session, batch_size=50, batch_max_age_s=0.1)
+    sender.start()
+    try:
+        sender.submit(_payload(1))
+        sender.submit(_payload(2))
+        assert _wait_for(lambda: len(session.posts) == 1)
+    finally:
+        sender.stop(drain_timeout=0)
+
+    assert len(session.posts[0]["json"]) == 2
+
+
+def test_batching_flush_request_sends_immediately():
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", session=session, batch_size=50, batch_max_age_s=60)
+    sender.start()
+    try:
+        sender.submit(_payload(1))
+        time.sleep(0.05)
+        assert session.posts == []
+        sender.submit(_payload(2), flush=True)
+        assert _wait_for(lambda: len(session.posts) == 1)
+    finally:
+        sender.stop(drain_timeout=0)
+
+    assert [p["raw_distance_cm"] for p in session.posts[0]["json"]] == [1.0, 2.0]
+
+
+def test_stop_flushes_pending_batch():
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", session=session, batch_size=50, batch_max_age_s=60)
+    sender.start()
+    sender.submit(_payload(1))
+    sender.stop()
+
+    assert len(session.posts) == 1
+    assert sender.stats()["sent"] == 1
+
+
+def test_batches_reach_local_stand_in_server():
+    with StandInServer() as server:
+        sender = TelemetrySender(
+            f"{server.url}/api/v1/sensor-readings/record",
+            api_key="secret",
+            batch_size=4,
+            batch_max_age_s=60,
+        )
+        sender.start()
+        for i in range(8):
+            sender.submit(_payload(i))
+        assert _wait_for(lambda: len(server.requests) == 2)
+        sender.stop()
+
+    first, second = server.requests
+    assert first.method == "POST"
+    assert first.path == "/api/v1/sensor-readings/record"
+    assert first.headers["x-api-key"] == "secret"
+    assert [r["raw_distance_cm"] for r in first.json() + second.json()] == [float(i) for i in range(8)]
+    assert sender.stats()["batches"] == 2
+
+
+def test_stand_in_server_rate_limit_counts_every_reading():
+    with StandInServer(responder=lambda request: (429, {"detail": "slow down"})) as server:
+        sender = TelemetrySender(server.url, batch_size=3, batch_max_age_s=60)
+        assert sender.deliver([_payload(1), _payload(2), _payload(3)]) is False
+        sender.stop(drain_timeout=0)
+
+    assert sender.stats()["rate_limited"] == 3
+
+
+def test_failed_delivery_is_spooled(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    sender = TelemetrySender(
+        "http://backend/api",
+        session=_FakeSession(exc=requests.exceptions.ConnectionError("offline")),
+        spool=spool,
+    )
+    try:
+        assert sender.deliver(_payload(1)) is False
+        assert [p for _, p in spool.peek("reading", 10)] == [_payload(1)]
+        assert sender.stats()["spooled"] == 1
+    finally:
+        spool.close()
+
+
+def test_client_errors_are_not_spooled(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    sender = TelemetrySender("http://backend/api", session=_FakeSession(status_code=400), spool=spool)
+    try:
+        assert sender.deliver(_payload(1)) is False
+        assert spool.count("reading") == 0
+    finally:
+        spool.close()
+
+
+def test_queue_overflow_spools_dropped_reading(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    sender = TelemetrySender("http://backend/api", max_queue=1, session=_FakeSession(), spool=spool)
+    try:
+        sender.submit(_payload(1))
+        assert sender.submit(_payload(2)) is False
+        # submit() leaves the spooling to the sender thread.
+        assert spool.count("reading") == 0
+        assert sender._next_batch() == ([], None)
+
+        sender.stop(drain_timeout=0)
+        assert [p for _, p in spool.peek("reading", 10)] == [_payload(1)]
+        assert sender.stats()["spooled"] == 1
+    finally:
+        spool.close()
+
+
+def test_running_sender_spools_overflowed_readings(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    release = threading.Event()
+
+    class _SlowSession(_FakeSession):
+        def post(self, url, **kwargs):
+            release.wait(5)
+            return super().post(url, **kwargs)
+
+    sender = TelemetrySender("http://backend/api", max_queue=1, session=_SlowSession(), spool=spool)
+    sender.start()
+    try:
+        sender.submit(_payload(1))  # picked up by the sender, blocks in post()
+        assert _wait_for(lambda: sender.queue_depth == 0)
+        sender.submit(_payload(2))
+        sender.submit(_payload(3))  # pushes reading 2 out of the queue
+        release.set()
+        assert _wait_for(lambda: sender.stats()["spooled"] == 1)
+        assert [p for _, p in spool.peek("reading", 10)] == [_payload(2)]
+    finally:
+        release.set()
+        sender.stop(drain_timeout=1)
+        spool.close()
+
+
+def test_spooled_readings_replay_in_order_after_recovery(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    for i, ts in ((1, 100), (0, 50), (2, 150)):
+        spool.put("reading", _payload(i), ts=ts)
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", session=session, spool=spool, replay_per_s=100)
+    sender.start()
+    try:
+        assert _wait_for(lambda: sender.stats()["replayed"] == 3)
+    finally:
+        sender.stop(drain_timeout=0)
+        spool.close()
+
+    assert [p["json"]["raw_distance_cm"] for p in session.posts] == [0.0, 1.0, 2.0]
+
+
+def test_replay_waits_for_live_queue_and_connectivity(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    spool.put("reading", _payload(99))
+    session = _FakeSession()
+    sender = TelemetrySender("http://backend/api", session=session, spool=spool, replay_per_s=100)
+    try:
+        sender.submit(_payload(1))
+        sender._online = False
+        batch, spool_ids = sender._next_batch()
+        assert spool_ids is None
+        assert batch == [_payload(1)]
+        with sender._cond:
+            assert sender._replay_due_locked() is False
+
+        sender._online = True
+        batch, spool_ids = sender._next_batch()
+        assert batch == [_payload(99)]
+        assert spool_ids is not None
+    finally:
+        spool.close()
+
+
+def test_spooled_readings_are_ordered_by_reading_time(tmp_path):
+    spool = Spool(tmp_path, flush_batch=1)
+    sender = TelemetrySender("http://backend/api", session=_FakeSession(), spool=spool)
+    try:
+        late = {**_payload(2), "timestamp": "2026-05-01T10:00:05Z"}
+        early = [{**_payload(i), "timestamp": f"2026-05-01T10:00:0{i}Z"} for i in (0, 1)]
+        sender._spool([late])  # e.g. pushed out of the queue first
+        sender._spool(early)  # an older batch that failed afterwards
+
+        assert [p["raw_distance_cm"] for _, p in spool.peek("reading", 10)] == [0.0, 1.0, 2.0]
+    finally:
+        spool.close()
@@ -0,0 +1,112 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import tune_filter  # noqa: E402
+
+
+def _step_trace_with_spikes():
+    values = [100.0 + 0.1 * (i % 3) for i in range(200)] + [80.0 + 0.1 * (i % 3) for i in range(200)]
+    for i in (50, 120, 300):
+        values[i] += 40.0
+    values[10] = math.nan
+    return tune_filter.Trace("step", values, interval_s=0.5)
+
+
+def test_load_trace_with_header_and_timestamps(tmp_path):
+    path = tmp_path / "trace.csv"
+    path.write_text(
+        "timestamp,raw_cm,note\n"
+        "2026-01-01T00:00:00Z,100.5,a\n"
+        "2026-01-01T00:00:02Z,,timeout\n"
+        "2026-01-01T00:00:04Z,99.8,b\n"
+    )
+    trace = tune_filter.load_trace(str(path))
+    assert trace.name == "trace.csv"
+    assert trace.values[0] == 100.5 and math.isnan(trace.values[1]) and trace.values[2] == 99.8
+    assert trace.interval_s == 2.0
+
+
+def test_load_trace_without_header_uses_first_column(tmp_path):
+    path = tmp_path / "plain.csv"
+    path.write_text("100.0\n101.0\nerr\n")
+    trace = tune_filter.load_trace(str(path), default_interval_s=0.25)
+    assert trace.values.tolist()[:2] == [100.0, 101.0]
+    assert math.isnan(trace.values[2])
+    assert trace.interval_s == 0.25
+
+
+def test_load_trace_missing_column_raises(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("ts,level\n1,100\n")
+    with pytest.raises(ValueError):
+        tune_filter.load_trace(str(path))
+    assert tune_filter.load_trace(str(path), column="level").values.tolist() == [100.0]
+
+
+def test_labels_find_spikes_and_step():
+    labels = tune_filter._Labels(_step_trace_with_spikes(), reference_window=15, spike_cm=5.0, step_cm=10.0)
+    assert np.flatnonzero(labels.spikes).tolist() == [50, 120, 300]
+    assert labels.steps == [200]
+
+
+def test_evaluate_reports_rejection_and_rebaseline_latency():
+    trace = _step_trace_with_spikes()
+    labels = [tune_filter._Labels(trace, 15, 5.0, 10.0)]
+    params = {
+        "window_size": 7,
+        "modz_threshold": 3.5,
+        "zero_mad_tolerance_cm": 1.0,
+        "rebaseline_outlier_streak": 3,
+        "rebaseline_spread_max_cm": 8.0,
+    }
+    fast = tune_filter.evaluate(params, [trace], labels, max_lag=20, settle_cm=2.0)
+    slow = tune_filter.evaluate(dict(params, rebaseline_outlier_streak=8), [trace], labels, 20, 2.0)
+
+    assert fast["spike_reject"] == 1.0
+    assert fast["rebaselines"] == 1 and fast["unsettled"] == 0
+    assert fast["rebaseline_s"] < slow["rebaseline_s"]
+    assert fast["rebaseline_s"] == pytest.approx(2 * 0.5)
+
+
+def test_rank_results_prefers_better_metrics_and_breaks_ties_on_false_rejects():
+    def result(name, lag, spike, rebase, false_reject):
+        return {
+            "params": name, "lag_s": lag, "spike_reject": spike, "rebaseline_s": rebase,
+            "steps": 1, "unsettled": 0, "false_reject": false_reject,
+        }
+
+    ranked = tune_filter.rank_results([
+        result("slow", 5.0, 1.0, 10.0, 0.0),
+        result("noisy", 1.0, 1.0, 2.0, 0.2),
+        result("best", 1.0, 1.0, 2.0, 0.01),
+    ])
+    assert [r["params"] for r in ranked] == ["best", "noisy", "slow"]
+
+
+def test_build_grid_random_subset_is_reproducible():
+    full = tune_filter.build_grid([7, 15], [3.0, 3.5], [1.0], [3, 5], [8.0])
+    assert len(full) == 8
+    sample = tune_filter.build_grid([7, 15], [3.0, 3.5], [1.0], [3, 5], [8.0], random_samples=3, seed=1)
+    assert len(sample) == 3 and all(p in full for p in sample)
+    assert sample == tune_filter.build_grid([7, 15], [3.0, 3.5], [1.0], [3, 5], [8.0], random_samples=3, seed=1)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_main_prints_table_and_env_snippet(tmp_path, capsys, workers):
+    path = tmp_path / "trace.csv"
+    path.write_text("raw_cm\n" + "\n".join(str(v) for v in _step_trace_with_spikes().values.tolist()))
+
+    ranked = tune_filter.main([
+        str(path), "--window", "7", "15", "--modz", "3.5", "--zero-mad-tol", "1.0",
+        "--streak", "3", "8", "--spread", "8.0", "--workers", str(workers),
+    ])
+    out = capsys.readouterr().out
+
+    assert len(ranked) == 4
+    assert "Evaluating 4 configuration(s) over 1 trace(s)" in out
+    assert "SENSOR_FILTER_REBASELINE_OUTLIER_STREAK=3" in out
+    for key in tune_filter.ENV_KEYS.values():
+        assert f"\n{key}=" in out
@@ -0,0 +1,72 @@
+import hashlib
+
+from upload_index import UploadIndex, content_digest
+
+
+def test_content_digest_matches_for_bytes_and_file(tmp_path):
+    data = b"\xff\xd8jpeg" * 50_000
+    path = tmp_path / "frame.jpg"
+    path.write_bytes(data)
+
+    expected = (hashlib.sha256(data).hexdigest(), len(data))
+    assert content_digest(data) == expected
+    assert content_digest(str(path)) == expected
+
+
+def test_get_sees_buffered_puts_and_counts_hits(tmp_path):
+    index = UploadIndex(tmp_path / "index.db", flush_batch=100, flush_interval_s=3600)
+
+    assert index.get("abc", "agos/") is None
+    index.put("abc", "agos/", "https://cdn/a.jpg", "agos/a", size=1000)
+
+    assert index.get("abc", "agos/") == {"secure_url": "https://cdn/a.jpg", "public_id": "agos/a"}
+    assert index.get("abc", "other/") is None
+    stats = index.stats()
+    assert (stats["hits"], stats["misses"], stats["bytes_saved"]) == (1, 2, 1000)
+    assert stats["entries"] == 1
+    assert stats["hit_rate"] == 1 / 3
+    index.close()
+
+
+def test_entries_survive_reopen(tmp_path):
+    index = UploadIndex(tmp_path / "index.db", flush_batch=100, flush_interval_s=3600)
+    index.put("abc", "agos/", "https://cdn/a.jpg")
+    index.close()
+
+    reopened = UploadIndex(tmp_path / "index.db")
+    assert reopened.get("abc", "agos/")["secure_url"] == "https://cdn/a.jpg"
+    reopened.close()
+
+
+def test_puts_are_committed_in_batches(tmp_path):
+    index = UploadIndex(tmp_path / "index.db", flush_batch=3, flush_interval_s=3600)
+    index.put("a", "f", "u1")
+    index.put("b", "f", "u2")
+    (stored,) = index._db.execute("SELECT COUNT(*) FROM uploads").fetchone()
+    assert stored == 0
+
+    index.put("c", "f", "u3")
+    (stored,) = index._db.execute("SELECT COUNT(*) FROM uploads").fetchone()
+    assert stored == 3
+    index.close()
+
+
+def test_oldest_entries_are_evicted_beyond_cap(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr("upload_index.time.time", lambda: next(clock))
+    index = UploadIndex(tmp_path / "index.db", max_entries=2, flush_batch=1)
+    for digest in ("a", "b", "c"):
+        index.put(digest, "f", f"https://cdn/{digest}.jpg")
+
+    assert index.get("a", "f") is None
+    assert index.get("c", "f") is not None
+    assert index.stats()["evicted"] == 1
+    index.close()
+
+
+def test_closed_index_ignores_puts(tmp_path):
+    index = UploadIndex(tmp_path / "index.db")
+    index.close()
+    index.put("a", "f", "u")
+    assert index.get("a", "f") is None
+    index.close()
@@ -1,6 +1,12 @@
+import threading
+import time
+from io import BytesIO
 from types import SimpleNamespace
 
+import pytest
+
 import uploader
+from stand_in_server import StandInServer
 
 
 def test_upload_image_success(monkeypatch):
@@ -42,3 +48,172 @@ def test_upload_image_handles_generic_exception(monkeypatch):
     monkeypatch.setattr(uploader.cloudinary.uploader, "upload", fake_upload)
 
     assert uploader.upload_image("image.jpg") is None
+
+
+def test_upload_image_accepts_in_memory_buffer(monkeypatch):
+    def fake_upload(file, folder):
+        assert file == b"jpeg-bytes"
+        assert folder == "agos/"
+        return {"secure_url": "https://cdn.example.com/frame.jpg"}
+
+    monkeypatch.setattr(uploader.cloudinary.uploader, "upload", fake_upload)
+
+    assert uploader.upload_image(bytearray(b"jpeg-bytes")) == "https://cdn.example.com/frame.jpg"
+
+
+def test_upload_image_dedups_identical_content(monkeypatch, tmp_path):
+    from upload_index import UploadIndex
+
+    calls = []
+
+    def fake_upload(file, folder):
+        calls.append(file)
+        return {"secure_url": f"https://cdn.example.com/{len(calls)}.jpg", "public_id": f"agos/{len(calls)}"}
+
+    monkeypatch.setattr(uploader.cloudinary.uploader, "upload", fake_upload)
+    monkeypatch.setattr(uploader, "_upload_index", UploadIndex(tmp_path / "index.db"))
+    path = tmp_path / "frame.jpg"
+    path.write_bytes(b"jpeg-bytes")
+
+    assert uploader.upload_image(str(path)) == "https://cdn.example.com/1.jpg"
+    assert uploader.upload_image(b"jpeg-bytes") == "https://cdn.example.com/1.jpg"
+    assert uploader.upload_image(b"other-bytes") == "https://cdn.example.com/2.jpg"
+    assert len(calls) == 2
+    stats = uploader.get_upload_dedup_stats()
+    assert (stats["hits"], stats["misses"], stats["bytes_saved"]) == (1, 2, len(b"jpeg-bytes"))
+
+
+def test_upload_file_passes_options_and_marks_cached_results(monkeypatch, tmp_path):
+    from upload_index import UploadIndex
+
+    def fake_upload(file, folder, tags):
+        assert folder == "agos/training/" and tags == ["training"]
+        return {"secure_url": "https://cdn.example.com/t.jpg", "public_id": "agos/training/t"}
+
+    monkeypatch.setattr(uploader.cloudinary.uploader, "upload", fake_upload)
+    monkeypatch.setattr(uploader, "_upload_index", UploadIndex(tmp_path / "index.db"))
+
+    first = uploader.upload_file(b"img", folder="agos/training/", tags=["training"])
+    again = uploader.upload_file(b"img", folder="agos/training/", tags=["training"])
+
+    assert "deduplicated" not in first
+    assert again == {
+        "secure_url": "https://cdn.example.com/t.jpg",
+        "public_id": "agos/training/t",
+        "deduplicated": True,
+    }
+
+
+def test_upload_dedup_stats_none_when_disabled(monkeypatch):
+    monkeypatch.setattr(uploader, "_upload_index", None)
+    assert uploader.get_upload_dedup_stats() is None
+
+
+def _cloudinary_error(name):
+    return getattr(uploader.cloudinary.exceptions, name)
+
+
+def test_transient_error_classification():
+    assert uploader.is_transient_error(_cloudinary_error("Error")("Socket error"))
+    assert uploader.is_transient_error(_cloudinary_error("GeneralError")("500"))
+    assert uploader.is_transient_error(_cloudinary_error("RateLimited")("420"))
+    assert not uploader.is_transient_error(_cloudinary_error("BadRequest")("bad"))
+    assert not uploader.is_transient_error(_cloudinary_error("AuthorizationRequired")("key"))
+    assert not uploader.is_transient_error(FileNotFoundError("missing.jpg"))
+
+
+def test_upload_service_retries_transient_errors(monkeypatch):
+    attempts = []
+
+    def fake_upload(file, folder):
+        attempts.append(file)
+        if len(attempts) < 3:
+            raise _cloudinary_error("GeneralError")("try later")
+        return {"secure_url": "https://cdn.example.com/ok.jpg"}
+
+    monkeypatch.setattr(uploader.cloudinary.uploader, "upload", fake_upload)
+    monkeypatch.setattr(uploader, "_upload_index", None)
+
+    with uploader.UploadService(workers=1, max_attempts=3, backoff_min_s=0.001, backoff_max_s=0.002) as service:
+        result = service.submit(BytesIO(b"frame")).result(timeout=5)
+        stats = service.stats()
+
+    assert result["secure_url"] == "https://cdn.example.com/ok.jpg"
+    assert attempts == [b"frame"] * 3
+    assert (stats["uploaded"], stats["retries"], stats["failed"], stats["in_flight"]) == (1, 2, 0, 0)
+    assert stats["bytes_uploaded"] == 5
+    assert stats["avg_latency_ms"] is not None
+
+
+def test_upload_service_does_not_retry_permanent_errors(monkeypatch):
+    attempts = []
+
+    def fake_upload(file, folder):
+        attempts.append(file)
+        raise _cloudinary_error("BadRequest")("Invalid image file")
+
+    monkeypatch.setattr(uploader.cloudinary.uploader, "upload", fake_upload)
+    monkeypatch.setattr(uploader, "_upload_index", None)
+
+    with uploader.UploadService(max_attempts=5, backoff_min_s=0.001) as service:
+        future = service.submit(b"not-a-jpeg")
+        with pytest.raises(_cloudinary_error("BadRequest")):
+            future.result(timeout=5)
+        assert service.stats()["failed"] == 1
+    assert len(attempts) == 1
+
+
+def test_upload_service_runs_uploads_concurrently(monkeypatch):
+    release = threading.Event()
+    running = []
+
+    def fake_upload(file, folder):
+        running.append(file)
+        assert release.wait(5)
+        return {"secure_url": f"https://cdn.example.com/{file.decode()}.jpg"}
+
+    monkeypatch.setattr(uploader.cloudinary.uploader, "upload", fake_upload)
+    monkeypatch.setattr(uploader, "_upload_index", None)
+
+    with uploader.UploadService(workers=3) as service:
+        futures = [service.submit(f"f{i}".encode()) for i in range(3)]
+        deadline = time.monotonic() + 5
+        while len(running) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(running) == 3
+        release.set()
+        assert [f.result(timeout=5)["secure_url"] for f in futures] == [
+            f"https://cdn.example.com/f{i}.jpg" for i in range(3)
+        ]
+        assert service.stats()["uploads_per_s"] > 0
+
+
+def test_upload_service_against_local_stand_in_server(monkeypatch):
+    monkeypatch.setattr(uploader, "_upload_index", None)
+    calls = []
+
+    def responder(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return 503, {"error": {"message": "Service unavailable"}}
+        return 200, {"secure_url": "https://res.example.com/demo/frame.jpg", "public_id": "agos/frame"}
+
+    with StandInServer(responder=responder) as server:
+        with uploader.UploadService(
+            workers=2,
+            backoff_min_s=0.001,
+            upload_prefix=server.url,
+            cloud_name="demo",
+            api_key="key",
+            api_secret="secret",
+            timeout=5,
+        ) as service:
+            result = service.submit(b"\xff\xd8frame-bytes", folder="agos/").result(timeout=10)
+            stats = service.stats()
+
+    assert result["public_id"] == "agos/frame"
+    assert len(calls) == 2
+    assert calls[-1].method == "POST"
+    assert calls[-1].path == "/v1_1/demo/image/upload"
+    assert b"\xff\xd8frame-bytes" in calls[-1].body
+    assert (stats["uploaded"], stats["retries"]) == (1, 1)
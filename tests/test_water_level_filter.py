@@ -1,5 +1,7 @@
 import math
 
+import pytest
+
 from water_level_filter import WaterLevelFilter
 
 
@@ -199,3 +201,18 @@ def test_inconsistent_outliers_do_not_trigger_rebaseline():
 
     value, status = f.process(100.0)
     assert value is not None and status == "ok"
+
+
+@pytest.mark.parametrize("window_size", [7, 60, 300])
+def test_incremental_window_matches_reference_implementation(window_size):
+    from filter_bench import DEFAULT_PARAMS, ReferenceWaterLevelFilter, outputs_match, synthetic_trace
+
+    trace = synthetic_trace(3000, seed=window_size)
+    reference = ReferenceWaterLevelFilter(window_size=window_size, **DEFAULT_PARAMS)
+    fast = WaterLevelFilter(window_size=window_size, **DEFAULT_PARAMS)
+    expected = [reference.process(raw) for raw in trace]
+    actual = [fast.process(raw) for raw in trace]
+
+    assert [s for _, s in actual] == [s for _, s in expected]
+    assert {"ok", "outlier-modz", "rebaseline", "out-of-range"} <= {s for _, s in actual}
+    assert outputs_match(expected, actual)
@@ -0,0 +1,196 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import ws_connection
+from ws_connection import WebSocketBackoff, WebSocketConnectionManager
+
+
+class FakeWS:
+    def __init__(self, fail_sends=0, frames_in=()):
+        self.frames = []
+        self.closed = False
+        self.pings = 0
+        self._fail_sends = fail_sends
+        self._frames_in = list(frames_in)
+        self._lock = threading.Lock()
+
+    def send(self, payload):
+        self._record(("text", payload))
+
+    def send_binary(self, payload):
+        self._record(("binary", payload))
+
+    def _record(self, frame):
+        if self._fail_sends:
+            self._fail_sends -= 1
+            raise ConnectionResetError("peer reset")
+        with self._lock:
+            self.frames.append(frame)
+
+    def ping(self):
+        self.pings += 1
+
+    def settimeout(self, _timeout):
+        pass
+
+    def recv_data_frame(self, control_frame):
+        if not self._frames_in:
+            raise TimeoutError("no frame")
+        return self._frames_in.pop(0), None
+
+    def close(self):
+        self.closed = True
+
+
+def _module(*sockets, error=None):
+    pending = list(sockets)
+    created = []
+
+    def create_connection(_url, timeout):
+        if error is not None:
+            raise error
+        created.append(pending.pop(0) if pending else FakeWS())
+        return created[-1]
+
+    return SimpleNamespace(create_connection=create_connection, created=created)
+
+
+def _manager(module, **kwargs):
+    params = {"backoff_min_s": 1.0, "backoff_max_s": 8.0}
+    params.update(kwargs)
+    return WebSocketConnectionManager("ws://stand-in/ws", module, **params)
+
+
+def test_connects_lazily_and_reuses_connection():
+    module = _module()
+    manager = _manager(module)
+
+    assert module.created == []
+    manager.send(b"a", text="meta")
+    manager.send(b"b")
+
+    assert len(module.created) == 1
+    assert module.created[0].frames == [("text", "meta"), ("binary", b"a"), ("binary", b"b")]
+    assert manager.stats()["sends"] == 2
+
+
+def test_text_only_send_skips_binary_frame():
+    module = _module()
+    manager = _manager(module)
+
+    manager.send(None, text='{"type": "image_url"}')
+
+    assert module.created[0].frames == [("text", '{"type": "image_url"}')]
+
+
+def test_stale_reused_connection_is_replaced_and_send_retried():
+    stale = FakeWS()
+    module = _module(stale, FakeWS())
+    manager = _manager(module)
+    manager.send(b"first")
+    stale._fail_sends = 1
+
+    manager.send(b"second")
+
+    assert stale.closed is True
+    assert module.created[1].frames == [("binary", b"second")]
+    assert manager.stats()["connects"] == 2
+
+
+def test_failed_connect_enters_jittered_backoff(monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr(ws_connection.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(ws_connection.random, "uniform", lambda a, b: b)
+    module = _module(error=OSError("refused"))
+    manager = _manager(module)
+
+    with pytest.raises(OSError):
+        manager.send(b"x")
+    with pytest.raises(WebSocketBackoff):
+        manager.send(b"x")  # fails fast, no connect attempt
+
+    clock["now"] += 1.0
+    with pytest.raises(OSError):
+        manager.send(b"x")
+    # Second consecutive failure doubles the ceiling.
+    assert manager._next_attempt_at == pytest.approx(clock["now"] + 2.0)
+
+
+def test_keepalive_drops_connection_without_pong(monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr(ws_connection.time, "monotonic", lambda: clock["now"])
+    module = _module(FakeWS(frames_in=[0x1]))  # a text ack, never a pong
+    manager = _manager(module, ping_interval=5.0, ping_timeout=2.0)
+    manager._ensure_keepalive = lambda: None
+    manager.send(b"x")
+
+    clock["now"] = 10.0
+    assert manager.ping_if_idle() is False
+    assert manager.connected is False
+
+
+def test_keepalive_pong_keeps_connection(monkeypatch):
+    clock = {"now": 0.0}
+    monkeypatch.setattr(ws_connection.time, "monotonic", lambda: clock["now"])
+    module = _module(FakeWS(frames_in=[ws_connection._OPCODE_PONG]))
+    manager = _manager(module, ping_interval=5.0, ping_timeout=2.0)
+    manager._ensure_keepalive = lambda: None
+    manager.send(b"x")
+
+    clock["now"] = 10.0
+    assert manager.ping_if_idle() is True
+    assert module.created[0].pings == 1
+    assert manager.connected is True
+
+
+def test_concurrent_sends_never_interleave_metadata_and_binary():
+    module = _module()
+    manager = _manager(module)
+
+    def worker(n):
+        for i in range(50):
+            manager.send(f"{n}-{i}".encode(), text=f"{n}-{i}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    frames = module.created[0].frames
+    assert len(frames) == 400
+    for text, binary in zip(frames[::2], frames[1::2]):
+        assert text[0] == "text" and binary[0] == "binary"
+        assert text[1].encode() == binary[1]
+
+
+def test_sends_are_not_blocked_while_waiting_for_pong():
+    pong_requested = threading.Event()
+    release_pong = threading.Event()
+
+    class SlowPongWS(FakeWS):
+        def recv_data_frame(self, control_frame):
+            pong_requested.set()
+            release_pong.wait(5)
+            return ws_connection._OPCODE_PONG, None
+
+    module = _module(SlowPongWS())
+    manager = _manager(module, ping_interval=0.001, ping_timeout=5.0)
+    manager._ensure_keepalive = lambda: None
+    manager.send(b"first")
+    manager._last_activity -= 1.0  # idle long enough to ping
+
+    result = {}
+    pinger = threading.Thread(target=lambda: result.setdefault("alive", manager.ping_if_idle()))
+    pinger.start()
+    try:
+        assert pong_requested.wait(5)
+        manager.send(b"during-ping")  # would block for ping_timeout if the lock were held
+        assert ("binary", b"during-ping") in module.created[0].frames
+    finally:
+        release_pong.set()
+        pinger.join(5)
+    assert result["alive"] is True
+    assert manager.connected is True
@@ -34,11 +34,12 @@ import shutil
 import sys
 
 import cloudinary
-import cloudinary.uploader
 from dotenv import load_dotenv
 
 from camera import PersistentCamera
-from frame_quality import are_metrics_usable, get_frame_quality_metrics
+from config import UPLOAD_BACKOFF_MAX_S, UPLOAD_BACKOFF_MIN_S, UPLOAD_MAX_ATTEMPTS, UPLOAD_TIMEOUT_S
+from frame_quality import evaluate_frame
+from uploader import UploadService
 
 load_dotenv()
 
@@ -57,6 +58,15 @@ cloudinary.config(
 DEFAULT_FOLDER = "agos/training_capture"
 LOCAL_BACKUP_DIR = "training_captures"
 
+# Uploads retry transient network/Cloudinary errors with backoff.
+_UPLOADS = UploadService(
+    workers=1,
+    max_attempts=UPLOAD_MAX_ATTEMPTS,
+    backoff_min_s=UPLOAD_BACKOFF_MIN_S,
+    backoff_max_s=UPLOAD_BACKOFF_MAX_S,
+    timeout=UPLOAD_TIMEOUT_S,
+)
+
 
 # ── Utilities ────────────────────────────────────────────────────────────────
 
@@ -77,7 +87,7 @@ def upload_to_cloudinary(image_path, folder, session):
     tags = ["training", f"session_{session}"]
 
     try:
-        result = cloudinary.uploader.upload(
+        result = _UPLOADS.upload(
             image_path,
             folder=folder,
             tags=tags,
@@ -166,15 +176,16 @@ def run(folder, do_upload):
             print(f"  [OK]   Saved locally: {local_path}")
 
             # Show quality metrics so user knows if image is good for training
-            metrics = get_frame_quality_metrics(local_path)
+            verdict = evaluate_frame(local_path)
+            metrics = verdict.metrics
             if metrics:
-                usable = are_metrics_usable(metrics)
+                usable = not verdict.failed_thresholds
                 status = "\u2713 GOOD" if usable else "\u2717 LOW QUALITY"
                 print(f"  [QA]   {status}  brightness={metrics['brightness']:.1f}  "
                       f"contrast={metrics['contrast_stddev']:.1f}  "
                       f"sharpness={metrics['laplacian_var']:.1f}")
                 if not usable:
-                    print("  [QA]   \u26a0 Image may be too dark/blurry — consider retaking")
+                    print(f"  [QA]   \u26a0 Failed: {', '.join(verdict.failed_thresholds)} — consider retaking")
 
             # Upload to Cloudinary
             if do_upload:
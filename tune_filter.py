@@ -0,0 +1,428 @@
+"""
+Parameter sweep for WaterLevelFilter over recorded raw-distance traces.
+
+Loads one or more CSV files of raw sensor distances, runs every filter
+configuration of a grid (or a random sample of it) across all CPU cores and
+ranks the configurations by:
+
+  * lag            — time shift that best aligns the filtered output with
+                     the reference level (lower is better);
+  * spike reject   — share of spikes the filter rejected (higher is better);
+  * rebaseline     — mean time for the output to settle on a new level after
+                     a step change (lower is better).
+
+Recorded traces carry no ground truth, so the reference level is a centred
+rolling median of the raw trace (``--reference-window`` samples).  A spike is
+an in-range sample more than ``--spike-cm`` away from it; a step is a jump of
+at least ``--step-cm`` in it.  The false-reject column (normal samples the
+filter threw away) is reported and breaks ties.
+
+CSV format: one reading per row.  With a header row the distance column is
+``--column`` (default: the first of raw_cm, distance_cm, distance, raw) and
+timestamps come from ``--time-column`` (default: timestamp/ts/time; epoch
+seconds or ISO 8601).  Without a header the first column is the distance.
+Empty or non-numeric cells are treated as failed readings.
+
+Usage:
+    python tune_filter.py traces/*.csv
+    python tune_filter.py day1.csv --window 7 15 30 --modz 3.0 3.5 4.5 --random 40
+    python tune_filter.py --synthetic 20000            # demo on a synthetic trace
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from config import (
+    SENSOR_FILTER_MAX_CM,
+    SENSOR_FILTER_MIN_CM,
+    SENSOR_FILTER_MIN_VALID_SAMPLES,
+    SENSOR_FILTER_MODZ_THRESHOLD,
+    SENSOR_FILTER_REBASELINE_OUTLIER_STREAK,
+    SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM,
+    SENSOR_FILTER_WINDOW_SIZE,
+    SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM,
+    SENSOR_INTERVAL,
+)
+from water_level_filter import WaterLevelFilter
+
+# Swept parameter → .env key.
+ENV_KEYS = {
+    "window_size": "SENSOR_FILTER_WINDOW_SIZE",
+    "modz_threshold": "SENSOR_FILTER_MODZ_THRESHOLD",
+    "zero_mad_tolerance_cm": "SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM",
+    "rebaseline_outlier_streak": "SENSOR_FILTER_REBASELINE_OUTLIER_STREAK",
+    "rebaseline_spread_max_cm": "SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM",
+}
+
+_DISTANCE_COLUMNS = ("raw_cm", "distance_cm", "distance", "raw")
+_TIME_COLUMNS = ("timestamp", "ts", "time")
+_OUTLIER_STATUSES = ("outlier-modz", "outlier-zero-mad")
+
+
+class Trace:
+    """Raw readings (NaN = failed reading) plus the sample interval in seconds."""
+
+    def __init__(self, name, values, interval_s):
+        self.name = name
+        self.values = np.asarray(values, dtype=np.float64)
+        self.interval_s = float(interval_s)
+
+
+# ── Loading ──────────────────────────────────────────────────────────────────
+
+
+def _to_float(cell):
+    try:
+        return float(cell)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _to_epoch(cell):
+    value = _to_float(cell)
+    if not math.isnan(value):
+        return value
+    try:
+        return datetime.fromisoformat(str(cell).strip().replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return math.nan
+
+
+def load_trace(path, column=None, time_column=None, default_interval_s=SENSOR_INTERVAL):
+    """Read one CSV trace; see the module docstring for the accepted layouts."""
+    with open(path, newline="") as fh:
+        rows = [row for row in csv.reader(fh) if row]
+    if not rows:
+        raise ValueError(f"{path}: empty file")
+
+    header = None
+    if math.isnan(_to_float(rows[0][0])) and any(math.isnan(_to_float(c)) for c in rows[0]):
+        header = [cell.strip().lower() for cell in rows[0]]
+        rows = rows[1:]
+
+    if header is None:
+        value_idx, time_idx = 0, None
+    else:
+        wanted = [column.lower()] if column else list(_DISTANCE_COLUMNS)
+        matches = [header.index(name) for name in wanted if name in header]
+        if not matches:
+            raise ValueError(f"{path}: no distance column (looked for {', '.join(wanted)})")
+        value_idx = matches[0]
+        wanted_time = [time_column.lower()] if time_column else list(_TIME_COLUMNS)
+        time_matches = [header.index(name) for name in wanted_time if name in header]
+        time_idx = time_matches[0] if time_matches else None
+
+    values = [_to_float(row[value_idx]) if value_idx < len(row) else math.nan for row in rows]
+
+    interval_s = default_interval_s
+    if time_idx is not None:
+        stamps = np.array([_to_epoch(row[time_idx]) if time_idx < len(row) else math.nan for row in rows])
+        steps = np.diff(stamps[~np.isnan(stamps)])
+        steps = steps[steps > 0]
+        if steps.size:
+            interval_s = float(np.median(steps))
+    return Trace(os.path.basename(path), values, interval_s)
+
+
+def synthetic_traces(samples, seed=0):
+    from filter_bench import synthetic_trace
+
+    raw = [math.nan if v is None else v for v in synthetic_trace(samples, seed=seed)]
+    return [Trace(f"synthetic-{seed}", raw, SENSOR_INTERVAL)]
+
+
+# ── Scoring ──────────────────────────────────────────────────────────────────
+
+
+class _Labels:
+    """Reference level, spike mask and step positions derived from a trace."""
+
+    def __init__(self, trace, reference_window, spike_cm, step_cm):
+        values = trace.values
+        in_range = np.isfinite(values) & (values >= SENSOR_FILTER_MIN_CM) & (values <= SENSOR_FILTER_MAX_CM)
+        self.in_range = in_range
+        self.reference = _centred_median(np.where(in_range, values, np.nan), reference_window)
+        deviation = np.abs(values - self.reference)
+        with np.errstate(invalid="ignore"):
+            self.spikes = in_range & (deviation > spike_cm)
+        jumps = np.flatnonzero(np.abs(np.diff(self.reference)) >= step_cm) + 1
+        # A step may show up as a few consecutive jumps; keep the first.
+        self.steps = [int(i) for k, i in enumerate(jumps) if k == 0 or i - jumps[k - 1] > reference_window]
+
+
+def _centred_median(values, window):
+    """Centred rolling median ignoring NaNs, forward/back-filled at the edges."""
+    window = max(1, int(window) | 1)
+    half = window // 2
+    padded = np.concatenate((np.full(half, np.nan), values, np.full(half, np.nan)))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    has_value = ~np.all(np.isnan(windows), axis=1)
+    reference = np.full(values.shape, np.nan)
+    with np.errstate(all="ignore"):
+        reference[has_value] = np.nanmedian(windows[has_value], axis=1)
+    return _fill_gaps(reference)
+
+
+def _fill_gaps(values):
+    """Forward-fill NaNs, then back-fill any leading ones."""
+    idx = np.where(np.isnan(values), 0, np.arange(values.size))
+    np.maximum.accumulate(idx, out=idx)
+    filled = values[idx]
+    if filled.size and np.isnan(filled[0]):
+        first = np.flatnonzero(~np.isnan(filled))
+        if first.size:
+            filled[: first[0]] = filled[first[0]]
+    return filled
+
+
+def _best_lag(output, reference, max_lag):
+    """Shift (in samples) of *output* behind *reference* with the lowest MAE."""
+    valid = ~np.isnan(output)
+    best, best_err = 0, math.inf
+    for lag in range(0, max(0, int(max_lag)) + 1):
+        out = output[lag:]
+        ref = reference[: reference.size - lag]
+        mask = valid[lag:]
+        if not mask.any():
+            break
+        err = float(np.mean(np.abs(out[mask] - ref[mask])))
+        if err < best_err - 1e-12:
+            best, best_err = lag, err
+    return best, best_err
+
+
+def _run_filter(f, values):
+    """Stream values through f.process(); return filtered values (NaN = no output) and statuses."""
+    filtered = np.full(len(values), np.nan)
+    statuses = []
+    for i, raw in enumerate(values.tolist()):
+        value, status = f.process(raw)
+        if value is not None:
+            filtered[i] = value
+        statuses.append(status)
+    return filtered, np.array(statuses)
+
+
+def evaluate(params, traces, labels, max_lag, settle_cm):
+    """Run one configuration over all traces and return its metrics dict."""
+    lag_s_weighted = 0.0
+    mae_weighted = 0.0
+    weight = 0
+    spikes = spikes_rejected = normal = normal_rejected = 0
+    settle_times = []
+    unsettled = 0
+    rebaselines = 0
+
+    for trace, label in zip(traces, labels):
+        f = WaterLevelFilter(
+            enabled=True,
+            min_valid_samples=SENSOR_FILTER_MIN_VALID_SAMPLES,
+            min_cm=SENSOR_FILTER_MIN_CM,
+            max_cm=SENSOR_FILTER_MAX_CM,
+            **params,
+        )
+        filtered, statuses = _run_filter(f, trace.values)
+        output = _fill_gaps(filtered)
+
+        lag, mae = _best_lag(output, label.reference, max_lag)
+        n = int(label.in_range.sum())
+        lag_s_weighted += lag * trace.interval_s * n
+        mae_weighted += mae * n
+        weight += n
+
+        rejected = np.isin(statuses, _OUTLIER_STATUSES)
+        spikes += int(label.spikes.sum())
+        spikes_rejected += int((rejected & label.spikes).sum())
+        normal_mask = label.in_range & ~label.spikes
+        normal += int(normal_mask.sum())
+        normal_rejected += int((rejected & normal_mask).sum())
+        rebaselines += int((statuses == "rebaseline").sum())
+
+        for step in label.steps:
+            close = np.abs(output[step:] - label.reference[step:]) <= settle_cm
+            hits = np.flatnonzero(close)
+            if hits.size:
+                settle_times.append(hits[0] * trace.interval_s)
+            else:
+                unsettled += 1
+
+    return {
+        "params": params,
+        "lag_s": lag_s_weighted / weight if weight else math.nan,
+        "mae_cm": mae_weighted / weight if weight else math.nan,
+        "spike_reject": spikes_rejected / spikes if spikes else math.nan,
+        "false_reject": normal_rejected / normal if normal else math.nan,
+        "rebaseline_s": sum(settle_times) / len(settle_times) if settle_times else math.nan,
+        "steps": len(settle_times) + unsettled,
+        "unsettled": unsettled,
+        "rebaselines": rebaselines,
+    }
+
+
+# ── Search ───────────────────────────────────────────────────────────────────
+
+
+def build_grid(windows, modz, zero_mad_tol, streaks, spreads, random_samples=0, seed=0):
+    """Every combination of the given values, or *random_samples* of them."""
+    keys = list(ENV_KEYS)
+    combos = [
+        dict(zip(keys, values))
+        for values in itertools.product(windows, modz, zero_mad_tol, streaks, spreads)
+    ]
+    if random_samples and random_samples < len(combos):
+        combos = random.Random(seed).sample(combos, random_samples)
+    return combos
+
+
+_worker_state = {}
+
+
+def _init_worker(traces, labels, max_lag, settle_cm):
+    _worker_state.update(traces=traces, labels=labels, max_lag=max_lag, settle_cm=settle_cm)
+
+
+def _evaluate_in_worker(params):
+    s = _worker_state
+    return evaluate(params, s["traces"], s["labels"], s["max_lag"], s["settle_cm"])
+
+
+def run_sweep(grid, traces, labels, max_lag=60, settle_cm=2.0, workers=None):
+    """Evaluate every configuration, in a process pool unless workers == 1."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [evaluate(params, traces, labels, max_lag, settle_cm) for params in grid]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(traces, labels, max_lag, settle_cm),
+    ) as pool:
+        return list(pool.map(_evaluate_in_worker, grid, chunksize=max(1, len(grid) // (workers * 4))))
+
+
+def _ranks(values, higher_is_better=False):
+    """Dense 0-based ranks; NaN (metric not measurable) ranks last."""
+    keyed = [(-v if higher_is_better else v) if not math.isnan(v) else math.inf for v in values]
+    order = sorted(set(keyed))
+    return [order.index(k) for k in keyed]
+
+
+def rank_results(results):
+    """Sort by the sum of per-metric ranks (lag, spike reject, rebaseline)."""
+    lag = _ranks([r["lag_s"] for r in results])
+    spike = _ranks([r["spike_reject"] for r in results], higher_is_better=True)
+    rebaseline = _ranks([r["rebaseline_s"] + r["unsettled"] * 1e9 if r["steps"] else math.nan for r in results])
+    for r, a, b, c in zip(results, lag, spike, rebaseline):
+        r["score"] = a + b + c
+    return sorted(
+        results,
+        key=lambda r: (r["score"], r["false_reject"] if not math.isnan(r["false_reject"]) else math.inf),
+    )
+
+
+def _fmt(value, spec):
+    return "n/a" if value is None or (isinstance(value, float) and math.isnan(value)) else format(value, spec)
+
+
+def format_table(ranked, top):
+    header = (
+        f"{'#':>3}  {'window':>6}  {'modz':>5}  {'zmad':>5}  {'streak':>6}  {'spread':>6}  "
+        f"{'lag_s':>6}  {'mae_cm':>6}  {'spike%':>6}  {'false%':>6}  {'rebase_s':>8}  {'score':>5}"
+    )
+    lines = [header, "-" * len(header)]
+    for i, r in enumerate(ranked[:top], 1):
+        p = r["params"]
+        rebase = _fmt(r["rebaseline_s"], ".1f")
+        if r["unsettled"]:
+            rebase += f"+{r['unsettled']}"
+        lines.append(
+            f"{i:>3}  {p['window_size']:>6}  {p['modz_threshold']:>5.2f}  {p['zero_mad_tolerance_cm']:>5.2f}  "
+            f"{p['rebaseline_outlier_streak']:>6}  {p['rebaseline_spread_max_cm']:>6.1f}  "
+            f"{_fmt(r['lag_s'], '.1f'):>6}  {_fmt(r['mae_cm'], '.2f'):>6}  "
+            f"{_fmt(r['spike_reject'] * 100, '.1f'):>6}  {_fmt(r['false_reject'] * 100, '.1f'):>6}  "
+            f"{rebase:>8}  {r['score']:>5}"
+        )
+    return "\n".join(lines)
+
+
+def env_snippet(result, n_configs, n_traces):
+    lines = [f"# tune_filter.py: best of {n_configs} configuration(s) over {n_traces} trace(s)"]
+    for key, env_key in ENV_KEYS.items():
+        lines.append(f"{env_key}={result['params'][key]}")
+    return "\n".join(lines)
+
+
+def _build_arg_parser():
+    parser = argparse.ArgumentParser(description="Sweep WaterLevelFilter parameters over recorded traces")
+    parser.add_argument("csv", nargs="*", help="Raw-distance CSV file(s)")
+    parser.add_argument("--column", help="Distance column name (CSV with header)")
+    parser.add_argument("--time-column", help="Timestamp column name (CSV with header)")
+    parser.add_argument(
+        "--sample-interval-s", type=float, default=SENSOR_INTERVAL,
+        help="Seconds between readings when the CSV has no timestamps (default: SENSOR_INTERVAL)",
+    )
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N", help="Use an N-sample synthetic trace")
+
+    parser.add_argument("--window", type=int, nargs="+", default=sorted({SENSOR_FILTER_WINDOW_SIZE, 7, 15, 31}))
+    parser.add_argument("--modz", type=float, nargs="+", default=sorted({SENSOR_FILTER_MODZ_THRESHOLD, 3.0, 3.5, 4.5}))
+    parser.add_argument(
+        "--zero-mad-tol", type=float, nargs="+",
+        default=sorted({SENSOR_FILTER_ZERO_MAD_TOLERANCE_CM, 0.5, 1.0, 2.0}),
+    )
+    parser.add_argument(
+        "--streak", type=int, nargs="+", default=sorted({SENSOR_FILTER_REBASELINE_OUTLIER_STREAK, 3, 5, 8})
+    )
+    parser.add_argument(
+        "--spread", type=float, nargs="+", default=sorted({SENSOR_FILTER_REBASELINE_SPREAD_MAX_CM, 4.0, 8.0})
+    )
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="Evaluate N random grid points")
+    parser.add_argument("--seed", type=int, default=0)
+
+    parser.add_argument("--reference-window", type=int, default=31, help="Centred median window (samples)")
+    parser.add_argument("--spike-cm", type=float, default=5.0, help="Deviation from reference that counts as a spike")
+    parser.add_argument("--step-cm", type=float, default=10.0, help="Reference jump that counts as a level step")
+    parser.add_argument("--settle-cm", type=float, default=2.0, help="Output within this of reference = settled")
+    parser.add_argument("--max-lag", type=int, default=60, help="Largest lag searched (samples)")
+
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=10, help="Rows to print")
+    return parser
+
+
+def main(argv=None):
+    args = _build_arg_parser().parse_args(argv)
+    if args.synthetic:
+        traces = synthetic_traces(args.synthetic, seed=args.seed)
+    elif args.csv:
+        traces = [
+            load_trace(path, args.column, args.time_column, default_interval_s=args.sample_interval_s)
+            for path in args.csv
+        ]
+    else:
+        raise SystemExit("Give one or more CSV files, or --synthetic N")
+
+    labels = [_Labels(t, args.reference_window, args.spike_cm, args.step_cm) for t in traces]
+    grid = build_grid(args.window, args.modz, args.zero_mad_tol, args.streak, args.spread, args.random, args.seed)
+    total = sum(t.values.size for t in traces)
+    print(
+        f"Evaluating {len(grid)} configuration(s) over {len(traces)} trace(s), {total:,} samples, "
+        f"{sum(len(label.steps) for label in labels)} level step(s), "
+        f"{sum(int(label.spikes.sum()) for label in labels)} spike(s)"
+    )
+
+    ranked = rank_results(run_sweep(grid, traces, labels, args.max_lag, args.settle_cm, args.workers))
+    print(format_table(ranked, args.top))
+    print()
+    print(env_snippet(ranked[0], len(grid), len(traces)))
+    return ranked
+
+
+if __name__ == "__main__":
+    main()
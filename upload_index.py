@@ -0,0 +1,169 @@
+"""Persistent content-hash → Cloudinary URL index for upload deduplication.
+
+Static-image modes upload the same few JPEGs every cycle, and the capture
+tools can re-upload an identical file after a retry.  UploadIndex remembers
+the SHA-256 of every uploaded image per Cloudinary folder together with the
+returned secure_url / public_id, so uploader.upload_image() can answer a
+repeat from SQLite without a network call.
+
+Live frames are all different, so most puts are one-off; like spool.Spool
+they are buffered and committed in batches (every ``flush_batch`` puts or
+``flush_interval_s`` seconds) to spare the SD card.  Lookups see buffered
+entries too.  Beyond ``max_entries`` rows the oldest are evicted.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    digest     TEXT NOT NULL,
+    folder     TEXT NOT NULL,
+    secure_url TEXT NOT NULL,
+    public_id  TEXT,
+    size       INTEGER NOT NULL,
+    created    REAL NOT NULL,
+    PRIMARY KEY (digest, folder)
+);
+CREATE INDEX IF NOT EXISTS uploads_created ON uploads (created);
+"""
+
+_CHUNK = 1 << 16
+
+
+def content_digest(image):
+    """Return (sha256 hex digest, size in bytes) of a buffer or file path."""
+    h = hashlib.sha256()
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        h.update(image)
+        return h.hexdigest(), len(image)
+    size = 0
+    with open(image, "rb") as fh:
+        while chunk := fh.read(_CHUNK):
+            h.update(chunk)
+            size += len(chunk)
+    return h.hexdigest(), size
+
+
+class UploadIndex:
+    """SQLite map of (content digest, folder) → uploaded asset, with hit counters."""
+
+    def __init__(self, path, max_entries=10000, flush_batch=20, flush_interval_s=30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(0, int(max_entries))
+        self.flush_batch = max(1, int(flush_batch))
+        self.flush_interval_s = max(0.0, float(flush_interval_s))
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evicted = 0
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_since = None
+        self._closed = False
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def get(self, digest, folder):
+        """Return {"secure_url", "public_id"} for known content, else None."""
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._pending.get((digest, folder))
+            if row is None:
+                row = self._db.execute(
+                    "SELECT secure_url, public_id, size FROM uploads WHERE digest = ? AND folder = ?",
+                    (digest, folder),
+                ).fetchone()
+            else:
+                row = row[:3]
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_saved += row[2]
+            return {"secure_url": row[0], "public_id": row[1]}
+
+    def put(self, digest, folder, secure_url, public_id=None, size=0):
+        """Remember an upload; committed with the next batch."""
+        with self._lock:
+            if self._closed:
+                return
+            self._pending[(digest, folder)] = (secure_url, public_id, int(size), time.time())
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            if (
+                len(self._pending) >= self.flush_batch
+                or time.monotonic() - self._pending_since >= self.flush_interval_s
+            ):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._closed or not self._pending:
+            return
+        pending, self._pending, self._pending_since = self._pending, {}, None
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO uploads (digest, folder, secure_url, public_id, size, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(digest, folder, *row) for (digest, folder), row in pending.items()],
+            )
+            self._enforce_cap_locked()
+
+    def _enforce_cap_locked(self):
+        if not self.max_entries:
+            return
+        (count,) = self._db.execute("SELECT COUNT(*) FROM uploads").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._db.execute(
+            "DELETE FROM uploads WHERE rowid IN (SELECT rowid FROM uploads ORDER BY created LIMIT ?)",
+            (excess,),
+        )
+        self.evicted += excess
+
+    def count(self):
+        with self._lock:
+            if self._closed:
+                return 0
+            (stored,) = self._db.execute("SELECT COUNT(*) FROM uploads").fetchone()
+            pending = sum(
+                1 for digest, folder in self._pending
+                if self._db.execute(
+                    "SELECT 1 FROM uploads WHERE digest = ? AND folder = ?", (digest, folder)
+                ).fetchone() is None
+            )
+        return stored + pending
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "entries": self.count(),
+            "evicted": self.evicted,
+        }
+
+    def close(self):
+        """Flush buffered entries and close; later lookups miss, puts are ignored."""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            self._db.close()
@@ -1,8 +1,25 @@
+import atexit
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import cloudinary
 import cloudinary.uploader
-from config import CLOUD_NAME, API_KEY, API_SECRET
+from config import (
+    CLOUD_NAME,
+    API_KEY,
+    API_SECRET,
+    UPLOAD_DEDUP_ENABLED,
+    UPLOAD_DEDUP_DB,
+    UPLOAD_DEDUP_MAX_ENTRIES,
+)
 import logging
 
+from upload_index import UploadIndex, content_digest
+
 cloudinary.config(cloud_name=CLOUD_NAME,
                   api_key=API_KEY,
                   api_secret=API_SECRET)
@@ -10,13 +27,248 @@ cloudinary.config(cloud_name=CLOUD_NAME,
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def upload_image(path):
+DEFAULT_FOLDER = "agos/"
+
+_upload_index = None
+if UPLOAD_DEDUP_ENABLED:
+    try:
+        _upload_index = UploadIndex(UPLOAD_DEDUP_DB, max_entries=UPLOAD_DEDUP_MAX_ENTRIES)
+        atexit.register(_upload_index.close)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Upload dedup disabled — cannot open '{UPLOAD_DEDUP_DB}': {e}")
+
+
+def _describe(image):
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return f"<{len(image):,} bytes in memory>"
+    return str(image)
+
+
+def upload_file(image, folder=DEFAULT_FOLDER, **options):
+    """Upload *image* to *folder* and return Cloudinary's result dict.
+
+    With upload dedup enabled, content already uploaded to the same folder
+    is answered from the index as {"secure_url", "public_id",
+    "deduplicated": True} without a network call; extra *options* (tags,
+    context, ...) do not take part in the match.  Upload errors propagate.
+    """
+    if isinstance(image, (bytearray, memoryview)):
+        image = bytes(image)
+    index = _upload_index
+    digest = size = None
+    if index is not None and isinstance(image, (bytes, str, os.PathLike)):
+        try:
+            digest, size = content_digest(image)
+        except OSError:
+            pass  # let the upload report the unreadable file
+        if digest is not None:
+            cached = index.get(digest, folder)
+            if cached is not None:
+                return {**cached, "deduplicated": True}
+
+    result = cloudinary.uploader.upload(image, folder=folder, **options)
+    if digest is not None and "secure_url" in result:
+        index.put(digest, folder, result["secure_url"], result.get("public_id"), size)
+    return result
+
+
+def get_upload_dedup_stats():
+    """Hit/miss counters of the upload dedup index, or None when disabled."""
+    return _upload_index.stats() if _upload_index is not None else None
+
+
+def upload_image(image):
+    """Upload a frame to Cloudinary and return its secure URL, or None.
+
+    *image* may be a file path or an encoded JPEG buffer (bytes); buffers
+    are streamed straight to Cloudinary without a temporary file.  Repeat
+    uploads of identical content are served from the dedup index when
+    UPLOAD_DEDUP_ENABLED is set.
+    """
     try:
-        result = cloudinary.uploader.upload(path, folder="agos/")
+        result = upload_file(image)
         if "secure_url" not in result:
-            logger.error(f"Upload result missing 'secure_url' key for {path}")
+            logger.error(f"Upload result missing 'secure_url' key for {_describe(image)}")
             return None
         return result["secure_url"]
     except (cloudinary.exceptions.Error, Exception) as e:
-        logger.error(f"Failed to upload image {path}: {e}")
+        logger.error(f"Failed to upload image {_describe(image)}: {e}")
         return None
+
+
+# Cloudinary answers these the same way however often they are retried.
+_PERMANENT_ERRORS = ("BadRequest", "AuthorizationRequired", "NotAllowed", "NotFound", "AlreadyExists")
+
+
+def is_transient_error(exc):
+    """True for upload failures worth retrying.
+
+    Network errors, unparseable responses (e.g. a proxy's 502 page), rate
+    limiting (420/429) and 5xx all surface as cloudinary.exceptions.Error;
+    4xx answers map to the subclasses in _PERMANENT_ERRORS.  Anything else
+    (a missing local file, a bad argument) is permanent.
+    """
+    exceptions = cloudinary.exceptions
+    if not isinstance(exc, exceptions.Error):
+        return False
+    permanent = tuple(getattr(exceptions, name) for name in _PERMANENT_ERRORS if hasattr(exceptions, name))
+    return not isinstance(exc, permanent)
+
+
+class UploadService:
+    """Concurrent Cloudinary uploads with retry and latency/throughput counters.
+
+    submit() takes a file path, bytes-like buffer or binary file-like object
+    and returns a concurrent.futures.Future resolving to the upload_file()
+    result dict; it raises the last error once retries are exhausted.
+    File-like objects are read on submit so the caller may close them and a
+    retry can resend the data.  Up to *workers* uploads run at once; queued
+    uploads wait without limit, so callers that must bound memory track
+    their own in-flight futures.
+
+    Transient failures (see is_transient_error) are retried up to
+    *max_attempts* in total after a full-jitter exponential backoff of
+    uniform(backoff_min_s, backoff_min_s * 2**retry), capped at
+    backoff_max_s.  *options* (e.g. timeout, upload_prefix) are passed to
+    every upload and may be overridden per submit().
+    """
+
+    def __init__(self, workers=2, max_attempts=3, backoff_min_s=0.5, backoff_max_s=8.0, **options):
+        self.workers = max(1, int(workers))
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_min_s = max(0.0, float(backoff_min_s))
+        self.backoff_max_s = max(self.backoff_min_s, float(backoff_max_s))
+        self.options = options
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="upload")
+        self._closed = False
+        self._cancel = threading.Event()
+        self._stats_lock = threading.Lock()
+
+        self.submitted = 0
+        self.uploaded = 0
+        self.deduplicated = 0
+        self.retries = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.bytes_uploaded = 0
+        self.last_latency_ms = None
+        self.max_latency_ms = 0.0
+        self._latency_total_ms = 0.0
+        self._first_submit_at = None
+        self._last_done_at = None
+
+    def submit(self, image, folder=DEFAULT_FOLDER, **options):
+        """Queue one upload; return its Future."""
+        if hasattr(image, "read"):
+            image = image.read()
+        if isinstance(image, (bytearray, memoryview)):
+            image = bytes(image)
+        if self._closed:
+            raise RuntimeError("UploadService is shut down")
+        now = time.monotonic()
+        with self._stats_lock:
+            self.submitted += 1
+            if self._first_submit_at is None:
+                self._first_submit_at = now
+        future = self._executor.submit(self._run, image, folder, {**self.options, **options}, now)
+        future.add_done_callback(self._count_cancelled)
+        return future
+
+    def _count_cancelled(self, future):
+        if future.cancelled():
+            with self._stats_lock:
+                self.cancelled += 1
+
+    def upload(self, image, folder=DEFAULT_FOLDER, **options):
+        """Upload synchronously (through the pool); return the result dict."""
+        return self.submit(image, folder, **options).result()
+
+    def _backoff_delay(self, retry):
+        ceiling = min(self.backoff_max_s, self.backoff_min_s * (2 ** retry))
+        return random.uniform(self.backoff_min_s, ceiling)
+
+    def _run(self, image, folder, options, submitted_at):
+        attempt = 1
+        while True:
+            try:
+                result = upload_file(image, folder, **options)
+                break
+            except Exception as e:
+                if attempt >= self.max_attempts or not is_transient_error(e) or self._cancel.is_set():
+                    with self._stats_lock:
+                        self.failed += 1
+                    logger.error(f"Upload of {_describe(image)} failed after {attempt} attempt(s): {e}")
+                    raise
+                delay = self._backoff_delay(attempt - 1)
+                with self._stats_lock:
+                    self.retries += 1
+                logger.warning(
+                    f"Upload of {_describe(image)} failed (attempt {attempt}/{self.max_attempts}): {e} "
+                    f"— retrying in {delay:.1f}s"
+                )
+                if self._cancel.wait(delay):
+                    with self._stats_lock:
+                        self.failed += 1
+                    raise
+                attempt += 1
+
+        done = time.monotonic()
+        latency_ms = (done - submitted_at) * 1000.0
+        with self._stats_lock:
+            self._last_done_at = done
+            if result.get("deduplicated"):
+                self.deduplicated += 1
+            else:
+                self.uploaded += 1
+                self.bytes_uploaded += _size_of(image)
+                self.last_latency_ms = latency_ms
+                self._latency_total_ms += latency_ms
+                self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        return result
+
+    def stats(self):
+        """Counters; latency is submit → done of network uploads, incl. queueing and retries."""
+        with self._stats_lock:
+            elapsed = (
+                self._last_done_at - self._first_submit_at
+                if self._first_submit_at is not None and self._last_done_at is not None
+                else 0.0
+            )
+            finished = self.uploaded + self.deduplicated + self.failed + self.cancelled
+            return {
+                "submitted": self.submitted,
+                "in_flight": self.submitted - finished,
+                "uploaded": self.uploaded,
+                "deduplicated": self.deduplicated,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "retries": self.retries,
+                "bytes_uploaded": self.bytes_uploaded,
+                "last_latency_ms": self.last_latency_ms,
+                "avg_latency_ms": (self._latency_total_ms / self.uploaded) if self.uploaded else None,
+                "max_latency_ms": self.max_latency_ms,
+                "uploads_per_s": (self.uploaded / elapsed) if elapsed > 0 else 0.0,
+                "bytes_per_s": (self.bytes_uploaded / elapsed) if elapsed > 0 else 0.0,
+            }
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """Stop accepting uploads; *cancel_pending* also drops queued ones and cuts retries short."""
+        self._closed = True
+        if cancel_pending:
+            self._cancel.set()
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def _size_of(image):
+    if isinstance(image, bytes):
+        return len(image)
+    try:
+        return os.path.getsize(image)
+    except (OSError, TypeError):
+        return 0
@@ -1,6 +1,10 @@
 from collections import deque
 import math
-import statistics
+import struct
+
+from sliding_window import SlidingMedianWindow
+
+_SNAPSHOT_COUNTS = struct.Struct("<III")  # outlier streak, history len, buffer len
 
 
 class WaterLevelFilter:
@@ -10,6 +14,9 @@ class WaterLevelFilter:
       1) Physical plausibility range check.
       2) MAD-based modified Z-score outlier rejection.
       3) Moving-average smoothing on accepted samples.
+
+    The accepted-sample window is a SlidingMedianWindow, so median, MAD and
+    mean cost O(log n) per sample and long windows stay cheap.
     """
 
     def __init__(
@@ -33,7 +40,7 @@ class WaterLevelFilter:
         self.zero_mad_tolerance_cm = float(zero_mad_tolerance_cm)
         self.rebaseline_outlier_streak = max(2, int(rebaseline_outlier_streak))
         self.rebaseline_spread_max_cm = max(0.0, float(rebaseline_spread_max_cm))
-        self._history = deque(maxlen=self.window_size)
+        self._history = SlidingMedianWindow(self.window_size)
         self._outlier_streak = 0
         self._outlier_buffer = deque(maxlen=self.rebaseline_outlier_streak)
 
@@ -51,10 +58,15 @@ class WaterLevelFilter:
             self._history.extend(self._outlier_buffer)
             self._outlier_streak = 0
             self._outlier_buffer.clear()
-            filtered = sum(self._history) / len(self._history)
+            filtered = self._history.mean()
             return filtered, "rebaseline"
         return None, reason
 
+    def _window_stats(self):
+        """Return (median, MAD) of the accepted-sample window."""
+        median = self._history.median()
+        return median, self._history.mad(median)
+
     def _range_valid(self, value):
         return self.min_cm <= value <= self.max_cm
 
@@ -80,9 +92,7 @@ class WaterLevelFilter:
 
         # Use accepted history to keep rejected spikes from polluting statistics.
         if len(self._history) >= self.min_valid_samples:
-            median = statistics.median(self._history)
-            abs_devs = [abs(x - median) for x in self._history]
-            mad = statistics.median(abs_devs)
+            median, mad = self._window_stats()
 
             if mad == 0:
                 if abs(value - median) > self.zero_mad_tolerance_cm:
@@ -95,5 +105,30 @@ class WaterLevelFilter:
         self._outlier_streak = 0
         self._outlier_buffer.clear()
         self._history.append(value)
-        filtered = sum(self._history) / len(self._history)
+        filtered = self._history.mean()
         return filtered, "ok"
+
+    # ── Snapshot (see filter_snapshot.py) ───────────────────────────────────
+
+    SNAPSHOT_MAGIC = b"WLF1"
+
+    def snapshot_state(self):
+        """Accepted-sample window, outlier buffer and streak as bytes."""
+        history = list(self._history)
+        buffer = list(self._outlier_buffer)
+        return _SNAPSHOT_COUNTS.pack(self._outlier_streak, len(history), len(buffer)) + struct.pack(
+            f"<{len(history) + len(buffer)}d", *history, *buffer
+        )
+
+    def restore_state(self, payload, age_s=0.0):
+        """Load a snapshot_state() payload (possibly from another window size)."""
+        streak, n_history, n_buffer = _SNAPSHOT_COUNTS.unpack_from(payload)
+        expected = _SNAPSHOT_COUNTS.size + 8 * (n_history + n_buffer)
+        if len(payload) != expected:
+            raise ValueError(f"payload is {len(payload)} bytes, expected {expected}")
+        values = struct.unpack_from(f"<{n_history + n_buffer}d", payload, _SNAPSHOT_COUNTS.size)
+        self._history.clear()
+        self._history.extend(values[:n_history])
+        self._outlier_buffer.clear()
+        self._outlier_buffer.extend(values[n_history:])
+        self._outlier_streak = min(streak, len(self._outlier_buffer))
@@ -0,0 +1,120 @@
+"""
+WebSocket send benchmark: per-frame connections vs. the shared connection.
+
+Starts a local `websockets` stand-in server on 127.0.0.1 and pushes the same
+JPEG through:
+  1. a fresh websocket-client connection per frame (the old main.py path);
+  2. one WebSocketConnectionManager reused for every frame (current path).
+
+Usage:
+    python ws_bench.py                        # 200 frames of test_images/normal/normal1.jpg
+    python ws_bench.py --frames 500 --metadata-first
+    python ws_bench.py --image path/to/frame.jpg
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from pathlib import Path
+
+import websocket
+import websockets
+
+from ws_connection import WebSocketConnectionManager
+
+
+def _start_stand_in_server():
+    """Run a websockets server in a background thread; return (url, stop)."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def handler(ws):
+        async for _message in ws:
+            pass
+
+    async def serve():
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        state["port"] = server.sockets[0].getsockname()[1]
+        state["server"] = server
+        ready.set()
+        await server.wait_closed()
+
+    thread = threading.Thread(target=lambda: loop.run_until_complete(serve()), daemon=True)
+    thread.start()
+    ready.wait(5)
+
+    def stop():
+        loop.call_soon_threadsafe(state["server"].close)
+        thread.join(timeout=5)
+
+    return f"ws://127.0.0.1:{state['port']}/ws/rpi?camera_device_id=1&location_id=1", stop
+
+
+def _per_frame(url, payload, text, frames):
+    timings = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        ws = websocket.create_connection(url, timeout=10)
+        try:
+            if text is not None:
+                ws.send(text)
+            ws.send_binary(payload)
+        finally:
+            ws.close()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def _persistent(url, payload, text, frames):
+    manager = WebSocketConnectionManager(url, websocket)
+    timings = []
+    try:
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            manager.send(payload, text=text)
+            timings.append(time.perf_counter() - t0)
+    finally:
+        manager.close()
+    return timings
+
+
+def _report(label, timings):
+    ms = sorted(t * 1000.0 for t in timings)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(
+        f"  {label:<22} mean={statistics.mean(ms):7.3f} ms  "
+        f"p50={statistics.median(ms):7.3f} ms  p95={p95:7.3f} ms  "
+        f"total={sum(ms) / 1000.0:6.2f} s"
+    )
+    return statistics.mean(ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket frame sends against a local stand-in server")
+    parser.add_argument("--frames", type=int, default=200, help="Frames per mode (default: 200)")
+    parser.add_argument(
+        "--image", type=str, default="test_images/normal/normal1.jpg",
+        help="JPEG to send (default: test_images/normal/normal1.jpg)",
+    )
+    parser.add_argument("--metadata-first", action="store_true", help="Send a JSON text frame before each image")
+    args = parser.parse_args()
+
+    payload = Path(args.image).read_bytes()
+    text = json.dumps({"type": "image", "size": len(payload)}) if args.metadata_first else None
+
+    url, stop = _start_stand_in_server()
+    try:
+        print(f"Sending {args.frames} × {len(payload):,} bytes to local stand-in server")
+        old = _report("per-frame connection", _per_frame(url, payload, text, args.frames))
+        new = _report("shared connection", _persistent(url, payload, text, args.frames))
+        print(f"  speed-up: {old / new:.1f}×")
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
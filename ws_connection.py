@@ -0,0 +1,242 @@
+"""Long-lived WebSocket connection shared by the camera loop.
+
+Opening a new connection per frame costs a TCP + WebSocket handshake (plus
+TLS for wss://) on every send.  WebSocketConnectionManager keeps one
+connection open instead:
+
+  * lazy connect on first send;
+  * transparent reconnect when a reused connection turns out to be stale;
+  * jittered exponential backoff after failed connects, during which sends
+    fail fast instead of blocking the caller;
+  * optional keepalive pings (WS_PING_INTERVAL / WS_PING_TIMEOUT);
+  * a lock so metadata + binary frames from different threads never
+    interleave on the wire.
+"""
+
+import logging
+import random
+import select
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_OPCODE_CLOSE = 0x8
+_OPCODE_PONG = 0xA
+
+
+class WebSocketBackoff(Exception):
+    """Raised by send() while waiting out the reconnect backoff."""
+
+    def __init__(self, retry_in_s):
+        super().__init__(f"reconnect backoff active, retry in {retry_in_s:.1f}s")
+        self.retry_in_s = retry_in_s
+
+
+class WebSocketConnectionManager:
+    """Thread-safe, lazily connected, self-healing WebSocket client."""
+
+    def __init__(
+        self,
+        url,
+        ws_module,
+        connect_timeout=10.0,
+        ping_interval=0.0,
+        ping_timeout=0.0,
+        backoff_min_s=1.0,
+        backoff_max_s=30.0,
+    ):
+        self.url = url
+        self._ws_module = ws_module
+        self.connect_timeout = connect_timeout
+        self.ping_interval = max(0.0, float(ping_interval or 0.0))
+        self.ping_timeout = max(0.0, float(ping_timeout or 0.0))
+        self.backoff_min_s = max(0.0, float(backoff_min_s))
+        self.backoff_max_s = max(self.backoff_min_s, float(backoff_max_s))
+
+        self._lock = threading.Lock()  # serialises sends and connection changes
+        self._recv_lock = threading.Lock()  # only the keepalive reads
+        self._ws = None
+        self._consecutive_failures = 0
+        self._next_attempt_at = 0.0
+        self._last_activity = 0.0
+        self._stop = threading.Event()
+        self._keepalive_thread = None
+
+        self.connects = 0
+        self.sends = 0
+        self.send_failures = 0
+        self.pings = 0
+
+    # ── Connection lifecycle ────────────────────────────────────────────────
+
+    @property
+    def connected(self):
+        return self._ws is not None
+
+    def _backoff_delay(self):
+        """Full-jitter exponential backoff: uniform(min, min * 2**failures), capped."""
+        ceiling = min(self.backoff_max_s, self.backoff_min_s * (2 ** max(0, self._consecutive_failures - 1)))
+        return random.uniform(self.backoff_min_s, max(self.backoff_min_s, ceiling))
+
+    def _connect_locked(self):
+        now = time.monotonic()
+        if now < self._next_attempt_at:
+            raise WebSocketBackoff(self._next_attempt_at - now)
+        try:
+            self._ws = self._ws_module.create_connection(self.url, timeout=self.connect_timeout)
+        except Exception:
+            self._consecutive_failures += 1
+            self._next_attempt_at = time.monotonic() + self._backoff_delay()
+            raise
+        self._consecutive_failures = 0
+        self._next_attempt_at = 0.0
+        self._last_activity = time.monotonic()
+        self.connects += 1
+        self._ensure_keepalive()
+
+    def _drop_locked(self):
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass  # Best effort cleanup
+
+    def close(self):
+        """Close the connection and stop the keepalive thread."""
+        self._stop.set()
+        with self._lock:
+            self._drop_locked()
+        if self._keepalive_thread is not None:
+            self._keepalive_thread.join(timeout=1.0)
+            self._keepalive_thread = None
+
+    # ── Sending ─────────────────────────────────────────────────────────────
+
+    def _send_locked(self, payload, text):
+        if text is not None:
+            self._ws.send(text)
+        if payload is not None:
+            self._ws.send_binary(payload)
+        self._last_activity = time.monotonic()
+
+    def send(self, payload, text=None):
+        """Send an optional text frame followed by a binary frame.
+
+        *payload* may be None to send only the text frame.
+
+        Connects lazily.  If a reused connection fails mid-send it is
+        replaced and the send retried once; failures on a fresh connection
+        propagate to the caller.  Raises WebSocketBackoff without touching
+        the network while a reconnect backoff is pending.
+        """
+        with self._lock:
+            reused = self._ws is not None
+            if not reused:
+                self._connect_locked()
+            try:
+                self._send_locked(payload, text)
+            except Exception:
+                self._drop_locked()
+                if not reused:
+                    self.send_failures += 1
+                    raise
+                logger.info("[WS] Reused connection went stale — reconnecting")
+                try:
+                    self._connect_locked()
+                    self._send_locked(payload, text)
+                except Exception:
+                    self._drop_locked()
+                    self.send_failures += 1
+                    raise
+            self.sends += 1
+
+    # ── Keepalive ───────────────────────────────────────────────────────────
+
+    def _ensure_keepalive(self):
+        if self.ping_interval <= 0 or self._keepalive_thread is not None:
+            return
+        self._keepalive_thread = threading.Thread(
+            target=self._keepalive_loop, name="ws_keepalive", daemon=True
+        )
+        self._keepalive_thread.start()
+
+    def _await_pong(self, ws):
+        """Read frames from *ws* until a pong arrives or WS_PING_TIMEOUT elapses.
+
+        Runs without the send lock so senders are not held up for the
+        whole timeout.  The socket timeout is left alone (it also governs
+        concurrent sends); readiness is awaited with select() instead.
+        """
+        deadline = time.monotonic() + self.ping_timeout
+        try:
+            with self._recv_lock:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not _wait_readable(ws, remaining):
+                        return False
+                    opcode, _frame = ws.recv_data_frame(True)
+                    if opcode == _OPCODE_PONG:
+                        return True
+                    if opcode == _OPCODE_CLOSE:
+                        return False
+                    # Any other server message (e.g. acks) is drained and ignored.
+        except Exception:
+            return False
+
+    def ping_if_idle(self):
+        """Ping the server if nothing was sent for WS_PING_INTERVAL seconds.
+
+        Returns False (and drops the connection) when the ping fails or no
+        pong arrives within WS_PING_TIMEOUT; the next send reconnects.  The
+        pong is awaited after releasing the send lock.
+        """
+        with self._lock:
+            ws = self._ws
+            if ws is None:
+                return True
+            if time.monotonic() - self._last_activity < self.ping_interval:
+                return True
+            try:
+                ws.ping()
+                self.pings += 1
+                pinged = True
+            except Exception:
+                pinged = False
+        alive = pinged and (self._await_pong(ws) if self.ping_timeout > 0 else True)
+        with self._lock:
+            if self._ws is not ws:
+                return True  # replaced by a send meanwhile; the new one is fresh
+            if not alive:
+                logger.warning("[WS] Keepalive failed — dropping connection")
+                self._drop_locked()
+                return False
+            self._last_activity = time.monotonic()
+            return True
+
+    def _keepalive_loop(self):
+        while not self._stop.wait(self.ping_interval):
+            self.ping_if_idle()
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "sends": self.sends,
+            "send_failures": self.send_failures,
+            "pings": self.pings,
+            "consecutive_failures": self._consecutive_failures,
+        }
+
+
+def _wait_readable(ws, timeout):
+    """True once *ws* has data to read, False after *timeout* seconds."""
+    sock = getattr(ws, "sock", None)
+    if sock is None:
+        return True  # no socket to poll (e.g. a test double): just read
+    pending = getattr(sock, "pending", None)
+    if pending is not None and pending():
+        return True  # TLS bytes already decrypted and buffered
+    readable, _, _ = select.select([sock], [], [], timeout)
+    return bool(readable)
@@ -26,6 +26,7 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 from camera import capture_image
+from image_catalog import ImageCatalog
 
 load_dotenv()
 
@@ -59,35 +60,17 @@ TEST_IMAGES_DIR = os.getenv("TEST_IMAGES_DIR", "test_images")
 USE_TEST_IMAGES = os.getenv("USE_TEST_IMAGES", "false").strip().lower() == "true"
 
 
-def _load_test_images() -> list[Path]:
-    image_dir = Path(TEST_IMAGES_DIR)
-    if not image_dir.exists() or not image_dir.is_dir():
-        return []
-    allowed = {".jpg", ".jpeg", ".png"}
-    images = [
-        p
-        for p in image_dir.rglob("*")
-        if p.is_file() and p.suffix.lower() in allowed
-    ]
-    return sorted(
-        images, key=lambda p: p.relative_to(image_dir).as_posix().lower()
-    )
-
-
-_TEST_IMAGES = _load_test_images()
-_TEST_IMAGE_INDEX = 0
+_TEST_IMAGES = ImageCatalog([("test_images", TEST_IMAGES_DIR)])
 
 
 def _capture_frame() -> bytes:
-    global _TEST_IMAGE_INDEX
     if USE_TEST_IMAGES:
-        if not _TEST_IMAGES:
+        image_path = _TEST_IMAGES.next_from("test_images")
+        if image_path is None:
             raise FileNotFoundError(
                 f"USE_TEST_IMAGES=true but no images found under '{TEST_IMAGES_DIR}'. "
                 "Add test images or set USE_TEST_IMAGES=false."
             )
-        image_path = _TEST_IMAGES[_TEST_IMAGE_INDEX % len(_TEST_IMAGES)]
-        _TEST_IMAGE_INDEX += 1
         return image_path.read_bytes()
 
     # Use the project camera pipeline when not forcing test images.